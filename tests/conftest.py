@@ -0,0 +1,81 @@
+"""A small synthetic data directory the whole pipeline runs on.
+
+The property files are the repository's own, the locality shapefile is a
+grid of synthetic localities (see ``synthetic``) grouped into LGAs listed in
+an LGA text file, and the metropolitan GTFS feed is synthetic.
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from vic_suburbs import config, synthetic
+
+REPO_DATA = Path(__file__).resolve().parent.parent / "data"
+
+
+def write_shapefile(path, named_rings):
+    """Write polygons to a shapefile whose 7th field is the name, as in the locality shapefile."""
+    import shapefile
+
+    with shapefile.Writer(str(path), shapeType=shapefile.POLYGON) as writer:
+        for field in range(6):
+            writer.field(f"FIELD{field}", "C")
+        writer.field("NAME", "C", size=50)
+
+        for name, ring in named_rings:
+            # shapefile outer rings go clockwise
+            writer.poly([ring.tolist()[::-1]])
+            writer.record(*[""] * 6, name)
+
+
+def write_data_dir(data_dir):
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    for name in (config.JSON_FILE, config.XML_FILE):
+        shutil.copy(REPO_DATA / name, data_dir / name)
+
+    subs_bounds = synthetic.synthetic_localities(n_side=10, vertices_per_edge=5)
+    (data_dir / config.SUBURB_SHAPEFILE).parent.mkdir(parents=True)
+    write_shapefile(data_dir / config.SUBURB_SHAPEFILE, ((name, poly.get_xy()) for name, poly in subs_bounds.items()))
+
+    lga_store, lga_dict = synthetic.synthetic_lgas(subs_bounds, n_side=3, vertices_per_edge=5)
+    (data_dir / config.LGA_SHAPEFILE).parent.mkdir(parents=True)
+    write_shapefile(data_dir / config.LGA_SHAPEFILE,
+                    ((name, lga_store.vertices[lga_store.ring_offsets[k]:lga_store.ring_offsets[k + 1]])
+                     for k, name in enumerate(lga_store.names)))
+    with open(data_dir / "lga_to_suburb.txt", "w") as outfile:
+        for lga, suburbs in lga_dict.items():
+            outfile.write(f"{lga} : {suburbs!r}\n\n")
+
+    synthetic.write_gtfs_feed(data_dir / config.GTFS_ROOT / "metropolitan", n_trips=400)
+    return data_dir
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory):
+    return write_data_dir(tmp_path_factory.mktemp("data"))
+
+
+@pytest.fixture
+def run_args(data_dir, tmp_path):
+    """Command line arguments running on ``data_dir`` with every store under ``tmp_path``."""
+    return ["--data-dir", str(data_dir), "--lga-text", str(data_dir / "lga_to_suburb.txt"), "--no-covid",
+            "--cache-dir", str(tmp_path / "cache"), "--suburb-store", str(tmp_path / "localities")]
+
+
+@pytest.fixture(scope="session")
+def enricher(data_dir, tmp_path_factory):
+    """A ``point.PointEnricher`` without a cache on ``data_dir``."""
+    from vic_suburbs import point
+
+    return point.PointEnricher.from_pipeline(data_dir, lga_text=data_dir / "lga_to_suburb.txt",
+                                             suburb_store=tmp_path_factory.mktemp("localities"))
+
+
+@pytest.fixture(scope="session")
+def properties(data_dir):
+    from vic_suburbs import load
+
+    return load.load_properties(data_dir)
@@ -0,0 +1,20 @@
+import pytest
+
+from vic_suburbs import bench
+
+
+def test_suite_checks_implementations_against_the_baseline(monkeypatch):
+    def shifted_stations(ref, prop_df):
+        prop_df = bench._station_vectorized(ref, prop_df)
+        prop_df["closest_train_station_id"] = prop_df["closest_train_station_id"].shift(fill_value=0)
+        return prop_df
+
+    station = {"baseline": bench._station_baseline, "vectorized": bench._station_vectorized}
+    monkeypatch.setattr(bench, "IMPLEMENTATIONS", {"station": station})
+
+    results = bench.run_suite([300], baseline_limit=100)
+    assert [result["implementation"] for result in results] == ["baseline", "vectorized", "baseline", "fastest"]
+
+    station["shifted"] = shifted_stations
+    with pytest.raises(AssertionError, match="station shifted: closest_train_station_id differs"):
+        bench.run_suite([300], baseline_limit=100)
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from matplotlib.path import Path
+
+from vic_suburbs import cellgrid, polystore
+
+
+def edge_points(a, b, n=6):
+    """Return ``n`` wiggly points from ``a`` towards ``b``, the same whichever way the edge is walked."""
+    forward = tuple(a) <= tuple(b)
+    start, end = (a, b) if forward else (b, a)
+    t = np.linspace(0, 1, n, endpoint=False)[1:, None]
+    normal = np.array([start[1] - end[1], end[0] - start[0]])
+    points = start + t * (end - start) + 0.15 * np.sin(3 * np.pi * t) * normal
+    return np.vstack([[a], points if forward else points[::-1]])
+
+
+def irregular_polygons(n=6, seed=0):
+    """Return named rings of an ``n`` x ``n`` tessellation with jittered, often concave, cells, a C and a holed square."""
+    rng = np.random.default_rng(seed)
+    spacing = 0.035
+    nodes = np.stack(np.meshgrid(145 + spacing * np.arange(n + 1), -37.9 + spacing * np.arange(n + 1),
+                                 indexing="ij"), axis=-1)
+    nodes[1:-1, 1:-1] += rng.uniform(-0.4, 0.4, (n - 1, n - 1, 2)) * spacing
+
+    named_rings = []
+    for i in range(n):
+        for j in range(n):
+            corners = [nodes[i, j], nodes[i + 1, j], nodes[i + 1, j + 1], nodes[i, j + 1]]
+            ring = np.vstack([edge_points(a, b) for a, b in zip(corners, corners[1:] + corners[:1])])
+            named_rings.append((f"CELL {i}-{j}", [ring]))
+
+    # a concave C east of the tessellation, and a square with a hole filled by another polygon
+    c = np.array([[0, 0], [3, 0], [3, 1], [1, 1], [1, 2], [3, 2], [3, 3], [0, 3]]) * 0.02 + [145.25, -37.9]
+    outer = np.array([[0, 0], [4, 0], [4, 4], [0, 4]]) * 0.02 + [145.25, -37.8]
+    hole = np.array([[1, 1], [1, 3], [3, 3], [3, 1]]) * 0.02 + [145.25, -37.8]
+    named_rings += [("C", [c]), ("HOLED", [outer, hole]), ("FILLING", [hole[::-1]])]
+
+    return named_rings
+
+
+def matplotlib_locate(named_rings, lat, lng):
+    """Return the first polygon containing each point with matplotlib, rings combined with the even-odd rule."""
+    points = np.column_stack([lng, lat])
+    result = np.full(len(points), -1)
+
+    for p, (_, rings) in reversed(list(enumerate(named_rings))):
+        inside = np.zeros(len(points), dtype=bool)
+        for ring in rings:
+            inside ^= Path(ring).contains_points(points)
+        result[inside] = p
+
+    return result
+
+
+@pytest.fixture(scope="module")
+def named_rings():
+    return irregular_polygons()
+
+
+@pytest.fixture(scope="module")
+def store(named_rings):
+    return polystore.PolygonStore.from_rings(named_rings)
+
+
+@pytest.mark.parametrize("cell_size", [cellgrid.CELL_SIZE, 0.004])
+def test_locate_matches_the_store_and_matplotlib(named_rings, store, cell_size):
+    grid = cellgrid.ContainmentGrid.build(store, cell_size)
+    rng = np.random.default_rng(1)
+    # beyond the grid on every side
+    lat, lng = rng.uniform(-37.95, -37.6, 20000), rng.uniform(144.95, 145.4, 20000)
+
+    expected = matplotlib_locate(named_rings, lat, lng)
+    assert (expected == -1).any() and len(np.unique(expected)) == len(store) + 1
+
+    np.testing.assert_array_equal(store.locate(lat, lng), expected)
+    np.testing.assert_array_equal(grid.locate(lat, lng), expected)
+
+
+@pytest.mark.parametrize("cell_size", [cellgrid.CELL_SIZE, 0.004])
+def test_locate_on_shared_edges_and_vertices(named_rings, store, cell_size):
+    grid = cellgrid.ContainmentGrid.build(store, cell_size)
+    rings = [ring for _, polygon_rings in named_rings for ring in polygon_rings]
+    midpoints = [(ring + np.roll(ring, -1, axis=0)) / 2 for ring in rings]
+    lng, lat = np.vstack(rings + midpoints).T
+
+    located = grid.locate(lat, lng)
+    np.testing.assert_array_equal(located, store.locate(lat, lng))
+
+    # a point on a boundary goes to one of the polygons it touches, or none
+    for x, y, p in zip(lng, lat, located):
+        if p >= 0:
+            rings = named_rings[p][1]
+            assert any(Path(ring).contains_point((x, y), radius=r) for ring in rings for r in (1e-9, -1e-9))
@@ -0,0 +1,25 @@
+import os
+
+from vic_suburbs import dag
+
+
+def key(k, name="lga"):
+    return name, f"{k:016x}"
+
+
+def test_disk_cache_keeps_the_latest_results(tmp_path):
+    cache = dag.DiskCache(tmp_path, keep=2)
+
+    for k in range(4):
+        cache.put(key(k), k)
+        # distinct modification times whatever the file system resolution
+        os.utime(cache._path(key(k)), ns=(k * 10**9, k * 10**9))
+    cache.put(key(0, "lga_index"), "index")
+
+    assert key(0) not in cache and key(1) not in cache
+    assert cache.get(key(0, "lga_index")) == "index"
+
+    # reading a result keeps it over the ones written since
+    assert cache.get(key(2)) == 2
+    cache.put(key(4), 4)
+    assert key(2) in cache and key(3) not in cache and key(4) in cache
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from haversine import haversine
+
+from vic_suburbs import distance, enrich, synthetic
+
+
+def random_frame(n, seed, bbox=synthetic.MELBOURNE_BBOX):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"lat": rng.uniform(bbox[1], bbox[3], n), "lng": rng.uniform(bbox[0], bbox[2], n)})
+
+
+def random_stops(n, seed):
+    stops = random_frame(n, seed)
+    return {1000 + k: (lat, lng) for k, (lat, lng) in enumerate(zip(stops["lat"], stops["lng"]))}
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_closest_station_matches_haversine(dtype):
+    stops_dict = random_stops(220, seed=0)
+    prop_df = random_frame(5000, seed=1)
+
+    expected = enrich.add_closest_station(prop_df.copy(), stops_dict)
+    result = enrich.add_closest_station_vectorized(prop_df.copy(), stops_dict, block_size=1000, dtype=dtype)
+
+    np.testing.assert_array_equal(result["closest_train_station_id"], expected["closest_train_station_id"])
+    np.testing.assert_array_equal(result["distance_to_closest_train_station"],
+                                  expected["distance_to_closest_train_station"])
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_nearest_distances_match_haversine(dtype):
+    stops_dict = random_stops(50, seed=2)
+    prop_df = random_frame(500, seed=3)
+    stops = np.array(list(stops_dict.values()))
+
+    index, dist = distance.nearest(distance.Coordinates(prop_df["lat"], prop_df["lng"]),
+                                   distance.Coordinates(*stops.T), block_size=128, dtype=dtype)
+
+    expected = [haversine((lat, lng), tuple(stops[k])) for lat, lng, k in zip(prop_df["lat"], prop_df["lng"], index)]
+    np.testing.assert_allclose(dist, expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_nearest_ties_go_to_the_first_station(dtype):
+    # stops 7 and 3 share a platform, so do 12 and 11
+    stops_dict = {7: (-37.81, 144.96), 3: (-37.81, 144.96), 12: (-37.7, 145.3), 11: (-37.7, 145.3)}
+    prop_df = pd.DataFrame({"lat": [-37.81, -37.80, -37.72], "lng": [144.96, 144.961, 145.29]})
+
+    expected = enrich.add_closest_station(prop_df.copy(), stops_dict)
+    result = enrich.add_closest_station_vectorized(prop_df.copy(), stops_dict, dtype=dtype)
+
+    assert list(expected["closest_train_station_id"]) == [7, 7, 12]
+    np.testing.assert_array_equal(result["closest_train_station_id"], expected["closest_train_station_id"])
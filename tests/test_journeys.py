@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from vic_suburbs import config, enrich, journeys, point, timetable
+
+MC = config.MELBOURNE_CENTRAL
+A, B, C, D, E = 1, 2, 3, 4, 5
+
+# (trip, [(stop, time), ...])
+TRIPS = [
+    # 60 minutes direct from A, or 30 changing to the express at B
+    ("slow", [(A, "08:00:00"), (MC, "09:00:00")]),
+    ("feeder", [(A, "08:00:00"), (B, "08:10:00")]),
+    ("express", [(B, "08:15:00"), (MC, "08:30:00")]),
+    # from C the express leaves 30 seconds after arriving at B, too tight to change onto
+    ("tight", [(C, "08:00:00"), (B, "08:14:30")]),
+    ("late", [(B, "09:00:00"), (MC, "09:20:00")]),
+    # departures right at the edges of the window
+    ("first", [(D, "07:00:00"), (MC, "07:20:00")]),
+    ("after", [(D, "10:00:00"), (MC, "10:05:00")]),
+    ("outside", [(E, "10:00:00"), (MC, "10:10:00")]),
+]
+
+
+@pytest.fixture(scope="module")
+def compiled():
+    stop_times = pd.DataFrame([(trip, stop, time, time, sequence) for trip, stops in TRIPS
+                               for sequence, (stop, time) in enumerate(stops, 1)],
+                              columns=["trip_id", "stop_id", "arrival_time", "departure_time", "stop_sequence"])
+    return timetable.Timetable.from_stop_times(stop_times)
+
+
+def test_a_change_beats_a_slower_direct_trip(compiled):
+    profile = journeys.reverse_profile(compiled)
+
+    assert compiled.direct_minutes(A) == 60
+    assert profile.minutes(A) == 30
+    assert profile.earliest_arrival(A, 8 * 3600) == 8 * 3600 + 30 * 60
+    assert profile.minutes(MC) == 0
+
+
+def test_changes_take_change_seconds(compiled):
+    assert journeys.reverse_profile(compiled).minutes(C) == 80
+    assert journeys.reverse_profile(compiled, change_seconds=30).minutes(C) == 30
+    assert compiled.direct_minutes(C) == config.NOT_AVAILABLE
+
+
+def test_departures_at_the_window_edges(compiled):
+    profile = journeys.reverse_profile(compiled)
+
+    # 7am is in the window and 10am is not
+    assert profile.minutes(D) == 20
+    assert profile.minutes(E) == config.NOT_AVAILABLE
+    assert profile.minutes(E, window=(7 * 3600, 10 * 3600 + 1)) == 10
+
+
+def test_direct_flag_is_not_set_by_changes(compiled, enricher):
+    prop_df = pd.DataFrame({"closest_train_station_id": [A, B, C, E]})
+
+    prop_df = enrich.add_travel_time_transfers(prop_df, compiled)
+    assert prop_df["travel_min_to_MC"].tolist() == [30, 18, 80, config.NOT_AVAILABLE]
+    assert prop_df["direct_journey_flag"].tolist() == [1, 1, 0, 0]
+
+    # the point enricher flags the same stops
+    stops_dict = {A: (-37.70, 144.80), B: (-37.70, 145.30), C: (-38.10, 144.80), E: (-38.10, 145.30)}
+    stations = point.PointEnricher(enricher.grid, enricher.lga_dict, stops_dict,
+                                   enrich.station_travel_times(stops_dict, compiled, transfers=True),
+                                   direct_times=enrich.station_travel_times(stops_dict, compiled))
+    result = stations.enrich(*zip(*stops_dict.values()))
+    assert result["closest_train_station_id"] == [A, B, C, E]
+    assert result["travel_min_to_MC"] == prop_df["travel_min_to_MC"].tolist()
+    assert result["direct_journey_flag"] == prop_df["direct_journey_flag"].tolist()
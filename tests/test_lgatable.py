@@ -0,0 +1,30 @@
+from vic_suburbs import enrich, lgatable
+
+LGA_TEXT = """BANYULE : ['Abbotsford', 'Airport West', 'Albert Park', 'Alphington'] 
+
+MORNINGTON
+PENINSULA : ['Balnarring', 'Dromana', "Mount Martha", 'Mornington',
+'Red Hill', 'Red Hill
+South', 'Rosebud'] 
+
+YARRA RANGES : [] 
+
+VIC Government - LGA listing
+Page 3 of 3
+"""
+
+
+def test_parse_lga_text():
+    assert lgatable.parse_lga_text(LGA_TEXT) == {
+        "BANYULE": ["ABBOTSFORD", "AIRPORT WEST", "ALBERT PARK", "ALPHINGTON"],
+        "MORNINGTON PENINSULA": ["BALNARRING", "DROMANA", "MOUNT MARTHA", "MORNINGTON", "RED HILL",
+                                 "RED HILL SOUTH", "ROSEBUD"],
+        "YARRA RANGES": [],
+    }
+
+
+def test_read_lga_dict_parses_the_text_file(tmp_path):
+    path = tmp_path / "lga_to_suburb.txt"
+    path.write_text(LGA_TEXT)
+
+    assert enrich.read_lga_dict(path) == lgatable.parse_lga_text(LGA_TEXT)
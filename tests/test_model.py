@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vic_suburbs import model, scrape, synthetic
+
+
+def collinear_frame(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(50, 10, n)
+    return pd.DataFrame({"a": base + rng.normal(0, 3, n), "b": 2 * base + rng.normal(0, 8, n),
+                         "c": rng.uniform(0, 100, n), "d": rng.normal(5, 1, n)})
+
+
+def ols_vif(X, centered):
+    """The VIFs from one statsmodels OLS regression per column, with an intercept when ``centered``."""
+    import statsmodels.api as sm
+
+    values = X.to_numpy(dtype="float64")
+    vifs = []
+    for column in range(values.shape[1]):
+        others = np.delete(values, column, axis=1)
+        if centered:
+            others = sm.add_constant(others)
+        vifs.append(1 / (1 - sm.OLS(values[:, column], others).fit().rsquared))
+
+    return np.array(vifs)
+
+
+def test_calc_vif_fast_matches_calc_vif():
+    X = collinear_frame()
+
+    expected = model.calc_vif(X)
+    vif = model.calc_vif_fast(X)
+
+    assert list(vif["variables"]) == list(expected["variables"])
+    np.testing.assert_allclose(vif["VIF"], expected["VIF"], rtol=1e-6)
+
+
+@pytest.mark.parametrize("centered", [True, False])
+def test_calc_vif_fast_matches_ols(centered):
+    X = collinear_frame(seed=1)
+
+    vif = model.calc_vif_fast(X, centered=centered)
+
+    np.testing.assert_allclose(vif["VIF"], ols_vif(X, centered), rtol=1e-6)
+
+
+def test_calc_vif_fast_constant_column():
+    X = collinear_frame(seed=2).assign(e=3.0)
+
+    vif = model.calc_vif_fast(X)
+
+    assert np.isinf(vif["VIF"].iloc[-1]) and np.isfinite(vif["VIF"].iloc[:-1]).all()
+
+
+def covid_figures(n_lgas=60, seed=0):
+    series = synthetic.synthetic_covid_series([f"LGA{k}" for k in range(n_lgas)], seed=seed)
+    return pd.DataFrame([scrape.case_figures(df) for df in series.values()]).astype("int64")
+
+
+@pytest.mark.parametrize("transform, scaler", [("log", None), ("boxcox", "standard"), ("sqrt", "minmax")])
+def test_saved_model_predicts_the_same(tmp_path, transform, scaler):
+    covid = covid_figures()
+    fitted = model.CovidModel(transform, scaler).fit(covid.iloc[:40])
+
+    fitted.save(tmp_path / "model.pkl")
+    loaded = model.CovidModel.load(tmp_path / "model.pkl")
+
+    new_rows = covid_figures(seed=1)
+    np.testing.assert_array_equal(loaded.predict(new_rows), fitted.predict(new_rows))
+    assert loaded.lambdas == fitted.lambdas
+    assert loaded.score(covid.iloc[40:]) == fitted.score(covid.iloc[40:])
+
+
+def test_predict_batches_matches_predict():
+    covid = covid_figures()
+    fitted = model.fit_final_model(covid)
+
+    batches = list(fitted.predict_batches(covid.iloc[start:start + 7] for start in range(0, len(covid), 7)))
+
+    np.testing.assert_allclose(np.concatenate(batches), fitted.predict(covid))
+
+
+def test_compare_models_scores_every_combination():
+    scores = model.compare_models(covid_figures())
+
+    assert len(scores) == len(model.CovidModel.transforms) * len(model.CovidModel.scalers)
+    assert scores["r_squared"].notna().all()
@@ -0,0 +1,45 @@
+from vic_suburbs import config, names
+
+LGA_DICT = {
+    "BAYSIDE": ["BRIGHTON", "HAMPTON", "SANDRINGHAM"],
+    "GLEN EIRA": ["CAULFIELD NORTH", "BRIGHTON EAST", "ST KILDA EAST"],
+    "MELTON": ["MELTON", "MOUNT COTTRELL"],
+    "MORNINGTON PENINSULA": ["MCCRAE", "RED HILL"],
+}
+
+
+def test_exact_names():
+    index = names.NameIndex(LGA_DICT)
+
+    assert index.lookup("BRIGHTON") == "BAYSIDE"
+    assert index.lookup("BRIGHTON EAST") == "GLEN EIRA"
+    assert index.lookup("MELTON") == "MELTON"
+
+
+def test_spelling_variants():
+    index = names.NameIndex(LGA_DICT)
+
+    # one character off
+    assert index.lookup("CAULFEILD NORTH") == "GLEN EIRA"
+    assert index.lookup("SANDRINGHEM") == "BAYSIDE"
+    # qualifiers, abbreviations and punctuation
+    assert index.lookup("MELTON (MELTON CITY)") == "MELTON"
+    assert index.lookup("MCCRAE (C)") == "MORNINGTON PENINSULA"
+    assert index.lookup("Saint Kilda-East") == "GLEN EIRA"
+    assert index.lookup("MT. COTTRELL") == "MELTON"
+
+
+def test_no_match_is_not_available():
+    index = names.NameIndex(LGA_DICT)
+
+    assert index.lookup("WARRNAMBOOL") == config.NOT_AVAILABLE
+    # a missing word is another suburb, not a typo
+    assert index.lookup("HAMPTON EAST") == config.NOT_AVAILABLE
+    assert index.lookup(config.NOT_AVAILABLE) == config.NOT_AVAILABLE
+
+
+def test_match_lgas_drops_the_designation():
+    polygon_names = ["BAYSIDE CITY", "Glen Eira City", "MELTON SHIRE", "MORNINGTON PENINSULA SHIRE", "UNINCORPORATED"]
+
+    assert names.match_lgas(polygon_names, LGA_DICT) == ["BAYSIDE", "GLEN EIRA", "MELTON", "MORNINGTON PENINSULA",
+                                                         "UNINCORPORATED"]
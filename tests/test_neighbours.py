@@ -0,0 +1,53 @@
+import numpy as np
+
+from vic_suburbs import distance, neighbours, synthetic
+
+
+def random_points(n, seed, bbox=synthetic.MELBOURNE_BBOX):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(bbox[1], bbox[3], n), rng.uniform(bbox[0], bbox[2], n)
+
+
+def brute_force(queries, points):
+    return distance.haversine_matrix(queries, points)
+
+
+def test_nearest_and_within_match_brute_force():
+    points = distance.Coordinates(*random_points(200, seed=0))
+    queries = distance.Coordinates(*random_points(2000, seed=1))
+    index = neighbours.PointIndex(points)
+    matrix = brute_force(queries, points)
+
+    nearest = index.nearest(queries, 3, block_size=500)
+    assert np.array_equal(nearest.indices.reshape(-1, 3), np.argsort(matrix, axis=1, kind="stable")[:, :3])
+
+    within = index.within(queries, 2.0, block_size=500)
+    for row, dist in enumerate(matrix):
+        expected = np.argsort(dist, kind="stable")[:np.count_nonzero(dist <= 2.0)]
+        assert np.array_equal(within.indices[within.offsets[row]:within.offsets[row + 1]], expected)
+
+
+def test_non_finite_queries_terminate():
+    index = neighbours.PointIndex(distance.Coordinates(*random_points(50, seed=2)))
+    lat, lng = random_points(4, seed=3)
+    lat[1], lng[2] = np.nan, np.inf
+
+    with np.errstate(invalid="ignore"):
+        queries = distance.Coordinates(lat, lng)
+    nearest = index.nearest(queries, 2)
+    within = index.within(queries, 5.0)
+
+    assert np.array_equal(np.diff(nearest.offsets), [2, 2, 2, 2])
+    assert np.array_equal(nearest.indices[2:6], [-1, -1, -1, -1])
+    assert np.isnan(nearest.distances[2:6]).all()
+    assert np.isfinite(nearest.distances[[0, 1, 6, 7]]).all()
+    assert np.diff(within.offsets)[1] == 0 and np.diff(within.offsets)[2] == 0
+
+
+def test_nearest_across_the_antimeridian():
+    index = neighbours.PointIndex(distance.Coordinates(*random_points(50, seed=4)))
+    queries = distance.Coordinates([37.8, 0.0, -60.0], [-144.9, 0.0, 179.9])
+    matrix = brute_force(queries, index.points.take(np.argsort(index.order)))
+
+    nearest = index.nearest(queries, 3)
+    assert np.array_equal(nearest.indices.reshape(-1, 3), np.argsort(matrix, axis=1, kind="stable")[:, :3])
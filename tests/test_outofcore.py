@@ -0,0 +1,36 @@
+from urllib.parse import unquote
+
+import pandas as pd
+import pytest
+
+from vic_suburbs import cli, output
+
+
+def read_dataset(directory):
+    import pyarrow.parquet as pq
+
+    frames = []
+    for partition in sorted(directory.glob("lga=*")):
+        lga = unquote(partition.name.split("=", 1)[1])
+        frame = pq.read_table(sorted(partition.glob("*.parquet")), partitioning=None).to_pandas()
+        frames.append(frame.assign(lga=None if lga == "__HIVE_DEFAULT_PARTITION__" else lga))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_out_of_core_matches_the_pipeline(run_args, tmp_path, processes):
+    cli.main(run_args + ["--output", str(tmp_path / "out.parquet")])
+    expected = pd.read_parquet(tmp_path / "out.parquet")
+
+    dataset = tmp_path / "dataset"
+    cli.main(run_args + ["--out-of-core", str(dataset), "--chunk-size", "300", "--processes", str(processes),
+                         "--row-group-size", "128"])
+    result = read_dataset(dataset)
+
+    assert (dataset / output.DATASET_MARKER).exists()
+    assert result["property_id"].is_unique
+    result = result.set_index("property_id").loc[expected["property_id"]].reset_index()
+    for column in expected.columns:
+        assert result[column].astype(object).where(result[column].notna(), None).tolist() \
+            == expected[column].astype(object).where(expected[column].notna(), None).tolist(), column
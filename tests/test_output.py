@@ -0,0 +1,113 @@
+import pandas as pd
+import pytest
+
+from vic_suburbs import config, output
+
+NA = config.NOT_AVAILABLE
+
+
+def enriched_frame():
+    return pd.DataFrame({
+        "property_id": [1, 2, 3, 4],
+        "lat": [-37.8136276, -37.9, -38.0, -37.1234567],
+        "lng": [144.9630576, 145.0, 145.25, 144.5],
+        "addr_street": ["1 Main Street", "2 O'Brien Road", "", "4 Long Street"],
+        "suburb": ["CARLTON", "NOT ANYWHERE", NA, "CARLTON"],
+        "lga": ["MELBOURNE", NA, NA, "MELBOURNE"],
+        "closest_train_station_id": [19842, 19843, 19844, 19842],
+        "distance_to_closest_train_station": [0.0, 1.5, 12.345, 2.0],
+        "travel_min_to_MC": [0, 15, NA, 30],
+        "direct_journey_flag": [1, 1, 0, 1],
+        "min_to_MC_walking": [5.0, 31.2, NA, 60.0],
+        "isochrone_min": [30, 45, NA, 60],
+    })
+
+
+def to_csv_text(prop_df, tmp_path):
+    path = tmp_path / "expected.csv"
+    prop_df.to_csv(path, index=False)
+    return path.read_bytes()
+
+
+def write_csv_text(prop_df, tmp_path):
+    path = tmp_path / "written.csv"
+    output.write(prop_df, path, row_group_size=2)
+    return path.read_bytes()
+
+
+def test_csv_matches_to_csv(tmp_path):
+    prop_df = enriched_frame()
+
+    assert output.csv_table(prop_df) is not None
+    assert write_csv_text(prop_df, tmp_path) == to_csv_text(prop_df, tmp_path)
+
+
+def test_csv_numbers_are_not_quoted(tmp_path):
+    lines = write_csv_text(enriched_frame(), tmp_path).decode().splitlines()
+
+    assert lines[0].startswith("property_id,lat,lng,")
+    assert lines[1] == ("1,-37.8136276,144.9630576,1 Main Street,CARLTON,MELBOURNE,19842,0.0,0,1,5.0,30")
+
+
+@pytest.mark.parametrize("column, value", [
+    ("addr_street", "1, Main Street"),
+    ("addr_street", 'The "Block"'),
+    ("suburb", None),
+    ("lat", 1e-05),
+    ("distance_to_closest_train_station", float("nan")),
+    ("direct_journey_flag", True),
+    ("travel_min_to_MC", 15.0),
+    ("min_to_MC_walking", 31),
+])
+def test_csv_falls_back_to_pandas(tmp_path, column, value):
+    prop_df = enriched_frame()
+    prop_df[column] = prop_df[column].astype(object)
+    prop_df.loc[1, column] = value
+
+    assert output.csv_table(prop_df) is None
+    assert write_csv_text(prop_df, tmp_path) == to_csv_text(prop_df, tmp_path)
+
+
+def test_write_rejects_unknown_suffix(tmp_path):
+    with pytest.raises(ValueError):
+        output.write(enriched_frame(), tmp_path / "out.xlsx")
+
+
+def test_clear_keeps_other_directories(tmp_path):
+    (tmp_path / "notes.txt").write_text("keep me")
+
+    with pytest.raises(ValueError):
+        output.clear(tmp_path)
+    assert (tmp_path / "notes.txt").read_text() == "keep me"
+
+
+def test_clear_replaces_a_previous_dataset(tmp_path):
+    dataset = tmp_path / "dataset"
+    output.clear(dataset)
+    (dataset / "part-0.parquet").write_bytes(b"old")
+
+    output.clear(dataset)
+    assert sorted(path.name for path in dataset.iterdir()) == [output.DATASET_MARKER]
+
+
+def test_compact_partitions_drops_duplicates_across_chunks(tmp_path):
+    prop_df = enriched_frame()
+    prop_df = pd.concat([prop_df.assign(property_id=prop_df["property_id"] + 10 * k) for k in range(6)],
+                        ignore_index=True)
+    dataset = tmp_path / "dataset"
+    output.clear(dataset)
+
+    # every chunk repeats some rows of the previous one and of itself
+    chunks = [prop_df.iloc[0:10], prop_df.iloc[6:18], prop_df.iloc[14:24], prop_df.iloc[[20, 21, 20, 3]]]
+    for part, chunk in enumerate(chunks):
+        output.append_partitioned(chunk, dataset, part, row_group_size=3)
+
+    assert output.compact_partitions(dataset, row_group_size=3) == len(prop_df)
+
+    import pyarrow.parquet as pq
+
+    files = sorted(dataset.glob("lga=*/*"))
+    assert [path.name for path in files] == ["compacted.parquet"] * 2
+    result = pq.read_table(files, partitioning=None).to_pandas()
+    assert result["property_id"].is_unique
+    assert sorted(result["property_id"]) == sorted(prop_df["property_id"])
@@ -0,0 +1,113 @@
+"""The whole pipeline, through the command line, on the synthetic data directory of ``conftest``."""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from vic_suburbs import cli, config, pipeline, scrape, synthetic
+
+COLUMNS = ["property_id", "lat", "lng", "addr_street", "suburb", "lga", "closest_train_station_id",
+           "distance_to_closest_train_station", "travel_min_to_MC", "direct_journey_flag"]
+
+
+def run_cli(run_args, tmp_path, *args, output="out.csv"):
+    path = tmp_path / output
+    cli.main(run_args + ["--output", str(path), *args])
+    return pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path)
+
+
+def test_cli_runs_every_stage(run_args, tmp_path):
+    prop_df = run_cli(run_args, tmp_path)
+
+    assert list(prop_df.columns) == COLUMNS
+    assert len(prop_df) > 1000
+    assert prop_df["suburb"].str.startswith("SYNTHETIC").mean() > 0.9
+    assert prop_df["lga"].str.startswith("LGA").mean() > 0.9
+    assert (prop_df["travel_min_to_MC"] != config.NOT_AVAILABLE).any()
+
+
+def test_pipeline_run_matches_cli(run_args, data_dir, tmp_path):
+    expected = run_cli(run_args, tmp_path)
+    prop_df = pipeline.run(data_dir, data_dir / "lga_to_suburb.txt", covid=False,
+                           suburb_store=tmp_path / "localities")
+
+    prop_df.to_csv(tmp_path / "run.csv", index=False)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "run.csv"), expected)
+
+
+def test_cli_adds_point_layers(run_args, tmp_path):
+    schools = tmp_path / "schools.csv"
+    pd.DataFrame({"name": ["North", "South"], "latitude": [-37.6, -38.2], "longitude": [145.0, 145.0]}
+                 ).to_csv(schools, index=False)
+    parks = tmp_path / "parks.geojson"
+    with open(parks, "w") as outfile:
+        json.dump({"type": "FeatureCollection", "features": [
+            {"type": "Feature", "id": 7, "properties": {}, "geometry": {"type": "Point", "coordinates": [144.9, -37.8]}},
+        ]}, outfile)
+
+    prop_df = run_cli(run_args, tmp_path, "--poi", str(schools), str(parks))
+
+    assert set(prop_df["closest_schools_id"]) <= {"North", "South"}
+    assert (prop_df["closest_schools_id"] == np.where(prop_df["lat"] > -37.9, "North", "South")).all()
+    assert (prop_df["closest_parks_id"] == 7).all()
+    assert (prop_df["distance_to_closest_parks"] >= 0).all()
+
+
+def test_cli_writes_parquet_from_the_cache(run_args, tmp_path):
+    expected = run_cli(run_args, tmp_path)
+    prop_df = run_cli(run_args, tmp_path, output="out.parquet")
+
+    assert list(prop_df.columns) == COLUMNS
+    assert prop_df["travel_min_to_MC"].dtype == "Int64"
+    assert prop_df["travel_min_to_MC"].isna().sum() == (expected["travel_min_to_MC"] == config.NOT_AVAILABLE).sum()
+
+
+def test_cli_adds_isochrones(run_args, tmp_path):
+    prop_df = run_cli(run_args, tmp_path, "--isochrones", "60", "30", "45")
+
+    assert list(prop_df.columns) == COLUMNS + ["min_to_MC_walking", "isochrone_min"]
+    reached = prop_df["isochrone_min"] != config.NOT_AVAILABLE
+    assert reached.any() and not reached.all()
+    assert (prop_df.loc[~reached, "min_to_MC_walking"] == config.NOT_AVAILABLE).all()
+
+    minutes = prop_df.loc[reached, "min_to_MC_walking"].astype(float)
+    thresholds = prop_df.loc[reached, "isochrone_min"].astype(int)
+    assert thresholds.isin([30, 45, 60]).all()
+    # the smallest threshold each time is within, times are rounded to 0.1 minute
+    assert (minutes <= thresholds + 0.05).all()
+    assert (minutes > np.select([thresholds == 45, thresholds == 60], [30, 45], -np.inf) - 0.05).all()
+
+
+def test_cli_isochrones_follow_the_walking_speed(run_args, tmp_path):
+    fast = run_cli(run_args, tmp_path, "--isochrones", "45", "--walking-speed", "6", output="fast.parquet")
+    slow = run_cli(run_args, tmp_path, "--isochrones", "45", "--walking-speed", "3", output="slow.parquet")
+    transfers = run_cli(run_args, tmp_path, "--isochrones", "45", "--transfers", output="transfers.parquet")
+
+    assert fast["isochrone_min"].dtype == "Int64" and fast["min_to_MC_walking"].dtype == "Float64"
+    assert slow["isochrone_min"].notna().sum() < fast["isochrone_min"].notna().sum()
+    assert transfers["isochrone_min"].notna().any()
+
+
+def test_cached_feeds_follow_the_travel_date(run_args, tmp_path):
+    run_cli(run_args, tmp_path)
+    run_cli(run_args, tmp_path, "--travel-date", "2021-10-02")
+    cached = run_cli(run_args, tmp_path, "--transfers")
+    uncached = run_cli(run_args, tmp_path, "--transfers", "--no-cache")
+
+    pd.testing.assert_frame_equal(cached, uncached)
+
+
+def test_changing_the_covid_date_reruns_only_the_covid_stages(data_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(scrape, "fetch_cumulative_cases",
+                        lambda lga: synthetic.synthetic_covid_series([lga], date="2021-10-31", days=120)[lga])
+    kwargs = dict(lga_text=data_dir / "lga_to_suburb.txt", cache_dir=tmp_path / "cache",
+                  suburb_store=tmp_path / "localities")
+
+    first = pipeline.run(data_dir, covid_date="2021-09-30", **kwargs)
+    assert set(pipeline.PIPELINE.executed) == set(pipeline.PIPELINE.stages)
+
+    second = pipeline.run(data_dir, covid_date="2021-09-20", **kwargs)
+    assert sorted(pipeline.PIPELINE.executed) == ["covid", "covid_cases"]
+    pd.testing.assert_frame_equal(second[COLUMNS], first[COLUMNS])
+    assert (second["30_sep_cases"] != first["30_sep_cases"]).any()
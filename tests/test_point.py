@@ -0,0 +1,52 @@
+import numpy as np
+
+from vic_suburbs import point
+
+
+def test_lru_cache_evicts_the_least_recently_used():
+    cache = point.LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.info() == {"hits": 3, "misses": 1, "size": 2, "maxsize": 2}
+
+
+def test_quantize_rounds_to_the_precision():
+    lat_q, lng_q = point.quantize([-37.81234, -37.81236, -37.8126], [144.96, 144.96, 144.96], 4)
+
+    assert lat_q.tolist() == [-378123, -378124, -378126]
+    assert lng_q.tolist() == [1449600] * 3
+
+
+def test_cached_enricher_hits_at_the_quantized_precision(enricher):
+    cached = point.PointEnricher(enricher.grid, enricher.lga_dict, enricher.stops_dict, enricher.travel_times,
+                                 cache_size=10, precision=3, direct_times=enricher.direct_times)
+
+    first = cached.enrich_point(-37.8101, 144.9601)
+    # rounds to the same key, so gets the first point's row
+    assert cached.enrich_point(-37.81014, 144.96006) == first
+    assert cached.cache_info()["hits"] == 1
+
+    cached.enrich_point(-37.8111, 144.9601)
+    assert cached.cache_info() == {"hits": 1, "misses": 2, "size": 2, "maxsize": 10}
+
+
+def test_cached_and_uncached_enrichment_are_identical(enricher, properties):
+    lat, lng = properties["lat"].to_numpy(), properties["lng"].to_numpy()
+    # repeats within and across batches, with a cache too small for all of them
+    lat, lng = np.concatenate([lat, lat[::3]]), np.concatenate([lng, lng[::3]])
+    cached = point.PointEnricher(enricher.grid, enricher.lga_dict, enricher.stops_dict, enricher.travel_times,
+                                 cache_size=500, direct_times=enricher.direct_times)
+
+    expected = enricher.enrich(lat, lng)
+    for start in range(0, len(lat), 700):
+        batch = cached.enrich(lat[start:start + 700], lng[start:start + 700])
+        assert batch == {field: values[start:start + 700] for field, values in expected.items()}
+
+    assert cached.cache_info()["hits"] > 0 and cached.cache_info()["size"] == 500
+    assert cached.enrich_point(lat[5], lng[5]) == {field: values[5] for field, values in expected.items()}
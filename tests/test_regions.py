@@ -0,0 +1,79 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import write_shapefile
+from vic_suburbs import cellgrid, cli, config, names, polystore, regions, synthetic
+
+
+@pytest.fixture(scope="module")
+def localities():
+    subs_bounds = synthetic.synthetic_localities(n_side=10, vertices_per_edge=5)
+    lga_store, lga_dict = synthetic.synthetic_lgas(subs_bounds, n_side=3, vertices_per_edge=5)
+    return subs_bounds, lga_store, lga_dict
+
+
+def contained_suburbs(subs_bounds, lga_store):
+    """Return the suburbs lying inside a single LGA polygon."""
+    contained = set()
+    for suburb, poly in subs_bounds.items():
+        ring = poly.get_xy()
+        # pulled a little towards the centre, so no vertex is on an LGA border
+        centre = (ring.min(axis=0) + ring.max(axis=0)) / 2
+        ring = centre + 0.99 * (ring - centre)
+        if len(set(lga_store.locate(ring[:, 1], ring[:, 0]).tolist())) == 1:
+            contained.add(suburb)
+    return contained
+
+
+def test_region_index_matches_the_grid_and_the_name_table(localities):
+    subs_bounds, lga_store, lga_dict = localities
+    grid = cellgrid.ContainmentGrid.build(polystore.PolygonStore.from_subs_bounds(subs_bounds))
+    index = regions.RegionIndex.build(grid, cellgrid.ContainmentGrid.build(lga_store), lga_dict)
+    rng = np.random.default_rng(0)
+    bbox = synthetic.MELBOURNE_BBOX
+    lat, lng = rng.uniform(bbox[1] - 0.05, bbox[3] + 0.05, 20000), rng.uniform(bbox[0] - 0.05, bbox[2] + 0.05, 20000)
+
+    suburbs, lgas = index.locate_names(lat, lng)
+
+    np.testing.assert_array_equal(suburbs, grid.locate_names(lat, lng))
+    np.testing.assert_array_equal(lgas, np.array(lga_store.names + [config.NOT_AVAILABLE])[lga_store.locate(lat, lng)])
+
+    name_table = names.NameIndex(lga_dict)
+    contained = np.isin(suburbs, list(contained_suburbs(subs_bounds, lga_store)))
+    assert contained.mean() > 0.3 and not contained.all()
+    assert (lgas[contained] == [name_table.lookup(suburb) for suburb in suburbs[contained]]).all()
+    assert (suburbs == config.NOT_AVAILABLE).any() and (lgas[suburbs == config.NOT_AVAILABLE] == config.NOT_AVAILABLE).all()
+
+
+def test_cli_falls_back_to_the_name_table_outside_the_lga_polygons(data_dir, properties, run_args, tmp_path):
+    from vic_suburbs import enrich
+
+    # the LGA shapefile without the LGA of most properties
+    data_copy = tmp_path / "data"
+    shutil.copytree(data_dir, data_copy)
+    lga_store = polystore.PolygonStore.from_shapefile(data_dir / config.LGA_SHAPEFILE)
+    busiest = np.bincount(lga_store.locate(properties["lat"], properties["lng"]) + 1)[1:].argmax()
+    write_shapefile(data_copy / config.LGA_SHAPEFILE,
+                    ((name, lga_store.rings(k)[0]) for k, name in enumerate(lga_store.names) if k != busiest))
+    run_args = run_args + ["--data-dir", str(data_copy)]
+
+    cli.main(run_args + ["--output", str(tmp_path / "names.csv")])
+    cli.main(run_args + ["--output", str(tmp_path / "polygons.csv"), "--lga-polygons", str(tmp_path / "lgas")])
+    by_name = pd.read_csv(tmp_path / "names.csv")
+    by_polygon = pd.read_csv(tmp_path / "polygons.csv")
+
+    lga_dict = enrich.read_lga_dict(data_dir / "lga_to_suburb.txt")
+    located = lga_store.locate(by_polygon["lat"], by_polygon["lng"])
+    removed = located == busiest
+    assert removed.any()
+
+    pd.testing.assert_series_equal(by_polygon["suburb"], by_name["suburb"])
+    # outside every polygon, the LGA of the suburb's name
+    assert (by_polygon.loc[removed, "lga"] == by_name.loc[removed, "lga"]).all()
+    assert set(by_polygon.loc[removed & (by_name["suburb"] != config.NOT_AVAILABLE), "lga"]) <= set(lga_dict)
+    # elsewhere the LGA polygons
+    lga_names = np.array(lga_store.names + [config.NOT_AVAILABLE])
+    assert (by_polygon.loc[~removed, "lga"] == lga_names[located][~removed]).all()
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from vic_suburbs import cli, enrich, services, synthetic
+
+
+def calendar_frames():
+    calendar = pd.DataFrame({"service_id": ["WD", "WE"], "monday": [1, 0], "tuesday": [1, 0], "wednesday": [1, 0],
+                             "thursday": [1, 0], "friday": [1, 0], "saturday": [0, 1], "sunday": [0, 1],
+                             "start_date": ["20211001", "20211001"], "end_date": ["20211031", "20211031"]})
+    # a weekend service instead of the weekday one on Tuesday the 12th, the weekend service on
+    # Friday the 15th too, and a service only running on Thursday the 14th
+    exceptions = pd.DataFrame({"service_id": ["WD", "WE", "WE", "SPECIAL"],
+                               "date": ["20211012", "20211012", "20211015", "20211014"],
+                               "exception_type": [2, 1, 1, 1]})
+    return calendar, exceptions
+
+
+def running(calendar, date):
+    return [service for service, runs in zip(calendar.service_ids, calendar.running_on(date)) if runs]
+
+
+def test_calendar_dates_exceptions():
+    calendar = services.ServiceCalendar.from_frames(*calendar_frames())
+
+    assert (calendar.start.isoformat(), calendar.end.isoformat()) == ("2021-10-01", "2021-10-31")
+    assert running(calendar, "2021-10-11") == ["WD"]
+    assert running(calendar, "2021-10-12") == ["WE"]
+    assert running(calendar, "2021-10-14") == ["WD", "SPECIAL"]
+    assert running(calendar, "2021-10-15") == ["WD", "WE"]
+    assert running(calendar, "2021-10-16") == ["WE"]
+    assert running(calendar, "2021-11-01") == []
+
+    assert calendar.running_every(["2021-10-11", "2021-10-12"]).tolist() == [False, False, False]
+    assert calendar.running_every(["2021-10-13", "2021-10-15"]).tolist() == [True, False, False]
+    # the weekly pattern of calendar.txt ignores the exceptions
+    assert calendar.running_weekly(["monday", "friday"]).tolist() == [True, False, False]
+    assert calendar.select(["WE", "SPECIAL", "UNKNOWN"], calendar.running_on("2021-10-14")).tolist() \
+        == [False, True, False]
+
+
+def test_travel_date_outside_the_calendar(tmp_path):
+    gtfs_dir = synthetic.write_gtfs_feed(tmp_path / "feed", n_trips=20)
+
+    assert len(enrich.read_date_stop_times(gtfs_dir, "2021-10-04")) > 0
+    with pytest.raises(services.TravelDateError, match="outside the calendar .* from 2021-10-01 to 2021-12-31"):
+        enrich.read_date_stop_times(gtfs_dir, "2022-01-01")
+
+
+def test_cli_rejects_a_travel_date_outside_the_calendar(run_args, tmp_path):
+    with pytest.raises(SystemExit, match="--travel-date: travel date 2020-10-04 is outside the calendar"):
+        cli.main(run_args + ["--output", str(tmp_path / "out.csv"), "--travel-date", "2020-10-04"])
+
+    assert not (tmp_path / "out.csv").exists()
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from vic_suburbs import point, shared
+
+
+def transfers_enricher(enricher):
+    """``enricher`` with every other direct time dropped, as if those stations needed a change."""
+    direct_times = {stop: time for k, (stop, time) in enumerate(enricher.travel_times.items()) if k % 2 == 0}
+    return point.PointEnricher(enricher.grid, enricher.lga_dict, enricher.stops_dict, enricher.travel_times,
+                               direct_times=direct_times)
+
+
+def test_attached_reference_enriches_like_the_original(enricher, properties):
+    original = transfers_enricher(enricher)
+    lat, lng = properties["lat"].to_numpy()[:300], properties["lng"].to_numpy()[:300]
+
+    block, descriptor = original.share()
+    with block:
+        reference, attached = shared.attach_reference(descriptor)
+        try:
+            assert reference.direct_times == original.direct_times
+            assert reference.timetable is None
+            assert not reference.grid.owner.flags.writeable
+
+            copy = point.PointEnricher.from_reference(reference)
+            assert copy.enrich(lat, lng) == original.enrich(lat, lng)
+            for k in range(0, 300, 37):
+                assert copy.enrich_point(lat[k], lng[k]) == original.enrich_point(lat[k], lng[k])
+        finally:
+            attached.close()
+
+    # the block is gone once the owner closes it
+    with pytest.raises(FileNotFoundError):
+        shared.SharedArrays.attach(descriptor.arrays)
+
+
+def test_shared_timetable_round_trip(enricher, data_dir):
+    from vic_suburbs import feeds
+
+    compiled = feeds.load_feeds(data_dir, store=None).timetable
+    block, descriptor = shared.share_reference(enricher.grid, enricher.stops_dict, enricher.travel_times,
+                                               enricher.lga_dict, compiled=compiled)
+    with block:
+        reference, attached = shared.attach_reference(descriptor)
+        try:
+            for name in ["stop_ids", "stops", "arrivals", "departures", "trip_offsets"]:
+                np.testing.assert_array_equal(getattr(reference.timetable, name), getattr(compiled, name))
+            assert [reference.timetable.direct_minutes(stop) for stop in enricher.stops_dict] \
+                == [compiled.direct_minutes(stop) for stop in enricher.stops_dict]
+        finally:
+            attached.close()
+
+
+def test_enrich_parallel_matches_enrich(enricher, properties):
+    original = transfers_enricher(enricher)
+    lat, lng = properties["lat"].to_numpy(), properties["lng"].to_numpy()
+
+    assert point.enrich_parallel(original, lat, lng, workers=2, chunk_size=700) == original.enrich(lat, lng)
@@ -0,0 +1,32 @@
+import pytest
+
+from vic_suburbs import config, enrich, timetable
+
+
+@pytest.fixture(scope="module")
+def gtfs_dir(data_dir):
+    return data_dir / config.GTFS_ROOT / "metropolitan"
+
+
+def test_direct_minutes_matches_melb_cen_time(gtfs_dir):
+    stop_times = enrich.read_weekday_stop_times(gtfs_dir)
+    trip_dict = enrich.build_trip_dict(stop_times)
+    compiled = timetable.Timetable.from_stop_times(stop_times)
+    # every stop of the feed, including those without a weekday trip from 7am
+    stops = list(enrich.read_stops(gtfs_dir))
+
+    expected = {stop: enrich.melb_cen_time(stop, trip_dict, stop_times) for stop in stops}
+    assert expected[config.MELBOURNE_CENTRAL] == 0
+    assert config.NOT_AVAILABLE in expected.values()
+
+    assert {stop: compiled.direct_minutes(stop) for stop in stops} == expected
+
+
+def test_saved_timetable_loads_the_same(gtfs_dir, tmp_path):
+    compiled = timetable.Timetable.from_stop_times(enrich.read_weekday_stop_times(gtfs_dir))
+    compiled.save(tmp_path / "timetable", source="test")
+    loaded = timetable.Timetable.load(tmp_path / "timetable")
+
+    assert loaded.trip_ids == [str(trip) for trip in compiled.trip_ids] and loaded.source == "test"
+    for stop in compiled.stop_ids.tolist():
+        assert loaded.direct_minutes(stop) == compiled.direct_minutes(stop)
@@ -0,0 +1,12 @@
+"""Integrate Victorian property data with suburbs, LGAs, train stations and COVID cases.
+
+The pipeline is split into stages:
+
+- ``load``: read and deduplicate the json and xml property files
+- ``enrich``: suburb, LGA, closest train station and travel time to Melbourne Central
+- ``scrape``: COVID-19 case figures per LGA from covidlive.com.au
+- ``model``: normalisation/transformation experiments and the final linear model
+
+``pipeline.run`` chains the stages together and ``python -m vic_suburbs`` runs
+them headless from the command line.
+"""
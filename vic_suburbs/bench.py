@@ -0,0 +1,323 @@
+"""Benchmarks of the pipeline.
+
+``suite`` generates synthetic properties, a GTFS feed and COVID series (see
+``synthetic``) and times each enrichment stage and the whole chain of stages
+for each size. Every implementation registered in ``IMPLEMENTATIONS`` is
+timed, the first of each stage being the baseline, and must give the same
+columns as the baseline unless it is one of the ``VARIANTS``. Slow
+implementations are timed on the first ``--baseline-limit`` rows and
+extrapolated::
+
+    python -m vic_suburbs.bench suite --sizes 1000 10000 100000 --output bench.json
+
+``neighbours`` checks the k-nearest and radius station queries of
+``neighbours`` against the full distance matrix.
+
+``startup`` times a fresh interpreter importing the pipeline and loading the
+properties, and fails if it goes over the budget or pulls in any of the
+modelling, plotting or scraping libraries::
+
+    python -m vic_suburbs.bench startup --budget 1.5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from . import cellgrid, config, distance, enrich, names, poi, polystore, regions, scrape, synthetic, timetable
+
+# libraries that only the later stages need
+HEAVY_MODULES = ["matplotlib", "sklearn", "statsmodels", "scipy", "bs4", "haversine", "shapefile"]
+
+INGEST_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from vic_suburbs import cli, pipeline
+from vic_suburbs.load import load_properties
+imported = time.perf_counter()
+load_properties({data_dir!r})
+loaded = time.perf_counter()
+print(json.dumps({{"import": imported - start, "ingest": loaded - imported,
+                  "modules": sorted({{name.split(".")[0] for name in sys.modules}})}}))
+"""
+
+
+def startup_time(data_dir=config.DATA_DIR, repeat=3):
+    """Return the best timings of ``repeat`` fresh interpreters running the ingest-only path.
+
+    The total includes starting the interpreter. ``heavy`` lists the heavy
+    modules that ended up imported.
+    """
+    runs = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", INGEST_SCRIPT.format(data_dir=str(data_dir))],
+                             check=True, capture_output=True, text=True).stdout
+        result = json.loads(out)
+        result["total"] = time.perf_counter() - start
+        runs.append(result)
+
+    best = min(runs, key=lambda run: run["total"])
+
+    return {"total": best["total"], "import": best["import"], "ingest": best["ingest"],
+            "heavy": [name for name in HEAVY_MODULES if name in best["modules"]]}
+
+
+def check_startup(budget, data_dir=config.DATA_DIR, repeat=3):
+    """Raise AssertionError if the ingest-only path is over budget or imports a heavy module."""
+    result = startup_time(data_dir, repeat)
+
+    assert not result["heavy"], f"ingest-only path imported {', '.join(result['heavy'])}"
+    assert result["total"] <= budget, f"ingest-only path took {result['total']:.3f}s, budget is {budget:.3f}s"
+
+    return result
+
+
+Reference = namedtuple("Reference", ["subs_bounds", "store", "grid", "lga_dict", "stops_dict", "stop_times", "trip_dict",
+                                     "timetable", "covid_series", "regions"])
+
+
+def build_reference(shapefile=None, seed=0):
+    """Build the reference data of the benchmarks.
+
+    The real locality shapefile is used when ``shapefile`` exists, otherwise a
+    synthetic grid of localities. The GTFS feed is always synthetic and goes
+    through the same parsing as the real one.
+    """
+    if shapefile is not None and os.path.exists(f"{shapefile}.shp"):
+        subs_bounds = enrich.load_suburb_bounds(shapefile)
+    else:
+        subs_bounds = synthetic.synthetic_localities()
+
+    lga_store, lga_dict = synthetic.synthetic_lgas(subs_bounds)
+
+    with tempfile.TemporaryDirectory() as gtfs_dir:
+        synthetic.write_gtfs_feed(gtfs_dir, seed=seed)
+        stops_dict = enrich.read_stops(gtfs_dir)
+        stop_times = enrich.read_weekday_stop_times(gtfs_dir)
+
+    covid_series = synthetic.synthetic_covid_series(list(lga_dict), seed=seed)
+
+    store = polystore.PolygonStore.from_subs_bounds(subs_bounds)
+
+    grid = cellgrid.ContainmentGrid.build(store)
+    lga_grid = cellgrid.ContainmentGrid.build(lga_store)
+
+    return Reference(subs_bounds, store, grid, lga_dict, stops_dict, stop_times, enrich.build_trip_dict(stop_times),
+                     timetable.Timetable.from_stop_times(stop_times), covid_series,
+                     regions.RegionIndex.build(grid, lga_grid, lga_dict))
+
+
+def _suburb_baseline(ref, prop_df):
+    return enrich.add_suburbs(prop_df, ref.subs_bounds)
+
+
+def _suburb_store(ref, prop_df):
+    return enrich.add_suburbs_from_store(prop_df, ref.store)
+
+
+def _suburb_grid(ref, prop_df):
+    return enrich.add_suburbs_from_store(prop_df, ref.grid)
+
+
+def _lga_baseline(ref, prop_df):
+    return enrich.add_lga(prop_df, ref.lga_dict)
+
+
+def _lga_indexed(ref, prop_df):
+    return enrich.add_lga_indexed(prop_df, names.NameIndex(ref.lga_dict))
+
+
+def _lga_polygons(ref, prop_df):
+    # locates the suburbs again along with the LGAs, as the pipeline's suburbs and lga stages
+    return enrich.fill_lga_indexed(enrich.add_regions(prop_df, ref.regions), names.NameIndex(ref.lga_dict))
+
+
+def _station_baseline(ref, prop_df):
+    return enrich.add_closest_station(prop_df, ref.stops_dict)
+
+
+def _station_vectorized(ref, prop_df):
+    return enrich.add_closest_station_vectorized(prop_df, ref.stops_dict)
+
+
+def _station_float32(ref, prop_df):
+    return enrich.add_closest_station_vectorized(prop_df, ref.stops_dict, dtype="float32")
+
+
+def _station_indexed(ref, prop_df):
+    return poi.add_nearest(prop_df, [poi.Layer.from_stops(ref.stops_dict)])
+
+
+def _travel_baseline(ref, prop_df):
+    return enrich.add_travel_time(prop_df, ref.trip_dict, ref.stop_times)
+
+
+def _travel_compiled(ref, prop_df):
+    return enrich.add_travel_time_compiled(prop_df, ref.timetable)
+
+
+def _travel_transfers(ref, prop_df):
+    return enrich.add_travel_time_transfers(prop_df, ref.timetable)
+
+
+def _covid_baseline(ref, prop_df):
+    cases_dict = {lga: scrape.case_figures(df) for lga, df in ref.covid_series.items()}
+    return scrape.add_covid_cases(prop_df, cases_dict)
+
+
+# stage -> {implementation name: func(ref, prop_df)}, in pipeline order, each stage
+# reads the columns added by the previous ones
+IMPLEMENTATIONS = {
+    "suburb": {"baseline": _suburb_baseline, "store": _suburb_store, "grid": _suburb_grid},
+    "lga": {"baseline": _lga_baseline, "indexed": _lga_indexed, "polygons": _lga_polygons},
+    "station": {"baseline": _station_baseline, "vectorized": _station_vectorized, "float32": _station_float32,
+                "indexed": _station_indexed},
+    "travel": {"baseline": _travel_baseline, "compiled": _travel_compiled, "transfers": _travel_transfers},
+    "covid": {"baseline": _covid_baseline},
+}
+
+
+# stages whose cost depends on the number of unique stations rather than rows, they are not extrapolated
+PER_STATION_STAGES = {"travel"}
+
+# implementations computing something else than their baseline, e.g. journeys with changes, they are not checked
+VARIANTS = {("lga", "polygons"), ("travel", "transfers")}
+
+
+def check_same(stage, name, result, expected):
+    """Raise AssertionError if ``result`` differs from the baseline's ``expected`` on its rows."""
+    rows = len(expected)
+
+    for column in expected.columns:
+        mismatched = np.flatnonzero(result[column].iloc[:rows].to_numpy() != expected[column].to_numpy())
+        assert len(mismatched) == 0, (f"{stage} {name}: {column} differs from the baseline for {len(mismatched)} "
+                                      f"of {rows} properties, first at row {mismatched[0]}")
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_suite(sizes, baseline_limit=2000, shapefile=None, seed=0):
+    """Time every implementation of every stage, then the end-to-end chain, for each size.
+
+    The chain is reported for the baselines and for the fastest implementation of each stage.
+    Raises AssertionError when an implementation disagrees with the baseline, see ``check_same``.
+
+    Each stage gets the output of the last implementation of the previous
+    stage. When that was a baseline timed on a prefix, the following stages
+    only see the prefix too, and the times are extrapolated to the full size.
+    """
+    ref = build_reference(shapefile, seed)
+    results = []
+
+    for n in sizes:
+        prop_df = synthetic.synthetic_properties(n, ref.subs_bounds, seed=seed)
+        end_to_end = {"baseline": 0, "fastest": 0}
+
+        for stage, implementations in IMPLEMENTATIONS.items():
+            stage_input = prop_df
+            stage_times = {}
+
+            for name, func in implementations.items():
+                # baselines are too slow for large inputs, time them on a prefix
+                rows = min(len(stage_input), baseline_limit) if name == "baseline" else len(stage_input)
+                prop_df, seconds = timed(func, ref, stage_input.iloc[:rows].copy())
+
+                if name == "baseline":
+                    expected = prop_df
+                elif (stage, name) not in VARIANTS:
+                    check_same(stage, name, prop_df, expected)
+                extrapolated = seconds if stage in PER_STATION_STAGES else seconds * n / rows
+
+                results.append({"stage": stage, "implementation": name, "rows": n, "measured_rows": rows,
+                                "seconds": seconds, "per_row_us": 1e6 * seconds / rows,
+                                "extrapolated_s": extrapolated})
+                stage_times[name] = extrapolated
+
+            end_to_end["baseline"] += stage_times["baseline"]
+            end_to_end["fastest"] += min(stage_times.values())
+
+        for name, seconds in end_to_end.items():
+            results.append({"stage": "end_to_end", "implementation": name, "rows": n, "extrapolated_s": seconds})
+
+    return results
+
+
+def verify_neighbours(n=10_000, k=3, radius_km=1.5, shapefile=None, seed=0):
+    """Check the k-nearest and radius station queries against the full distance matrix.
+
+    Raises AssertionError on the first property whose stations differ.
+    """
+    ref = build_reference(shapefile, seed)
+    prop_df = synthetic.synthetic_properties(n, ref.subs_bounds, seed=seed)
+    stops = distance.Coordinates(*np.array(list(ref.stops_dict.values()), dtype="float64").T)
+    matrix = distance.haversine_matrix(distance.Coordinates(prop_df["lat"], prop_df["lng"]), stops)
+
+    for name, result in [("nearest", enrich.nearest_stations(prop_df, ref.stops_dict, k)),
+                         ("within", enrich.stations_within(prop_df, ref.stops_dict, radius_km))]:
+        for row, dist in enumerate(matrix):
+            expected = np.argsort(dist, kind="stable")
+            expected = expected[:k] if name == "nearest" else expected[:np.count_nonzero(dist <= radius_km)]
+            found = result.indices[result.offsets[row]:result.offsets[row + 1]]
+            assert np.array_equal(found, expected), f"{name} stations differ for property {row}"
+
+    return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vic_suburbs.bench", description="Benchmarks of the pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    startup = commands.add_parser("startup", help="time the ingest-only path in a fresh interpreter")
+    startup.add_argument("--budget", type=float, default=1.5, help="maximum seconds allowed")
+    startup.add_argument("--repeat", type=int, default=3)
+    startup.add_argument("--data-dir", default=config.DATA_DIR)
+
+    suite = commands.add_parser("suite", help="time each stage on synthetic inputs")
+    suite.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                       help="numbers of synthetic properties, e.g. 1000 10000000")
+    suite.add_argument("--baseline-limit", type=int, default=2000,
+                       help="number of rows the baselines are timed on")
+    suite.add_argument("--shapefile", default=os.path.join(config.DATA_DIR, config.SUBURB_SHAPEFILE),
+                       help="locality shapefile to draw properties from, synthetic localities if missing")
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--output", help="json file to write the results to")
+
+    verify = commands.add_parser("neighbours", help="check the k-nearest and radius station queries")
+    verify.add_argument("--rows", type=int, default=10_000)
+    verify.add_argument("--k", type=int, default=3)
+    verify.add_argument("--radius", type=float, default=1.5, help="km")
+    verify.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "neighbours":
+        print(f"{verify_neighbours(args.rows, args.k, args.radius, seed=args.seed)} properties match")
+
+    elif args.command == "suite":
+        results = run_suite(args.sizes, args.baseline_limit, args.shapefile, args.seed)
+        if args.output is not None:
+            with open(args.output, "w") as outfile:
+                json.dump(results, outfile, indent=2)
+        for result in results:
+            print(f"{result['stage']:>10} {result['implementation']:>12} {result['rows']:>10} "
+                  f"{result['extrapolated_s']:>12.3f}s")
+
+    elif args.command == "startup":
+        print(json.dumps(check_startup(args.budget, args.data_dir, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
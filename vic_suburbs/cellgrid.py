@@ -0,0 +1,236 @@
+"""Raster of cells classified against the locality polygons for fast containment.
+
+Every cell of a regular lng/lat grid over the polygons is either
+
+- inside exactly one polygon as far as the lookup is concerned (``owner`` >= 0),
+- outside every polygon (``OUTSIDE``), or
+- crossed by a polygon boundary (``BOUNDARY``), with the list of polygons
+  that could contain its points.
+
+Most points resolve with a cell lookup, only points in boundary cells run the
+exact point-in-polygon test of ``polystore``. Boundary cells are found
+conservatively: every edge is split into pieces no longer than a cell, and
+every cell touched by a piece's bounding box is a boundary cell. A cell that
+no boundary touches lies entirely on one side of each polygon, so its centre
+decides it. Results match ``PolygonStore.locate``, including which polygon
+wins where polygons overlap.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from . import config
+
+OUTSIDE = -1
+BOUNDARY = -2
+
+# about 1km, well below the size of a locality
+CELL_SIZE = 0.01
+
+ARRAYS = ["owner", "boundary_cells", "candidate_offsets", "candidates"]
+
+
+class ContainmentGrid:
+    def __init__(self, store, origin, cell_size, owner, boundary_cells=None, candidate_offsets=None, candidates=None):
+        self.store = store
+        self.origin = tuple(float(v) for v in origin)
+        self.cell_size = float(cell_size)
+        self.owner = owner
+        # sorted flat indices of the boundary cells, the polygons to test for the k-th one are
+        # candidates[candidate_offsets[k]:candidate_offsets[k + 1]]
+        self.boundary_cells = boundary_cells
+        self.candidate_offsets = candidate_offsets
+        self.candidates = candidates
+        self.directory = None
+
+    @property
+    def shape(self):
+        return self.owner.shape
+
+    def cell_index(self, lat, lng):
+        """Return the (column, row) of each point, -1 for points outside the grid."""
+        ix = np.floor((np.asarray(lng, dtype="float64") - self.origin[0]) / self.cell_size).astype("int64")
+        iy = np.floor((np.asarray(lat, dtype="float64") - self.origin[1]) / self.cell_size).astype("int64")
+        outside = (ix < 0) | (iy < 0) | (ix >= self.shape[0]) | (iy >= self.shape[1])
+        ix[outside] = -1
+        iy[outside] = -1
+        return ix, iy
+
+    def cell_centres(self, cells):
+        """Return the lat and lng of the centre of each flat cell index."""
+        ix, iy = np.unravel_index(cells, self.shape)
+        return self.origin[1] + (iy + 0.5) * self.cell_size, self.origin[0] + (ix + 0.5) * self.cell_size
+
+    @classmethod
+    def build(cls, store, cell_size=CELL_SIZE):
+        bboxes = np.asarray(store.bboxes)
+        origin = (bboxes[:, 0].min(), bboxes[:, 1].min())
+        shape = (int(np.ceil((bboxes[:, 2].max() - origin[0]) / cell_size)) + 1,
+                 int(np.ceil((bboxes[:, 3].max() - origin[1]) / cell_size)) + 1)
+        grid = cls(store, origin, cell_size, np.empty(shape, dtype="int32"))
+
+        boundary_pairs = []
+        inside_pairs = []
+
+        for p in range(len(store)):
+            boundary = np.unique(np.concatenate([grid._boundary_cells(ring) for ring in store.rings(p)]))
+            boundary_pairs.append(np.column_stack([boundary, np.full(len(boundary), p)]))
+
+            # cells of the bounding box that no edge of the polygon touches are decided by their centre
+            lng_min, lat_min, lng_max, lat_max = bboxes[p]
+            (ix0, ix1), (iy0, iy1) = grid.cell_index([lat_min, lat_max], [lng_min, lng_max])
+            ix, iy = np.meshgrid(np.arange(ix0, ix1 + 1), np.arange(iy0, iy1 + 1), indexing="ij")
+            cells = np.setdiff1d(np.ravel_multi_index((ix.ravel(), iy.ravel()), shape), boundary)
+            cx, cy = np.unravel_index(cells, shape)
+            centre_lng = origin[0] + (cx + 0.5) * cell_size
+            centre_lat = origin[1] + (cy + 0.5) * cell_size
+            inside = cells[store.contains(p, centre_lng, centre_lat)]
+            inside_pairs.append(np.column_stack([inside, np.full(len(inside), p)]))
+
+        boundary_pairs = np.concatenate(boundary_pairs)
+        inside_pairs = np.concatenate(inside_pairs)
+        boundary_cells = np.unique(boundary_pairs[:, 0])
+
+        owner = np.full(shape[0] * shape[1], OUTSIDE, dtype="int32")
+        # the first polygon wins where polygons overlap, as in PolygonStore.locate
+        inside_pairs = np.unique(inside_pairs, axis=0)
+        cells, first = np.unique(inside_pairs[:, 0], return_index=True)
+        owner[cells] = inside_pairs[first, 1]
+        owner[boundary_cells] = BOUNDARY
+
+        # candidates of a boundary cell: polygons whose boundary touches it or that contain it
+        pairs = np.concatenate([boundary_pairs, inside_pairs[np.isin(inside_pairs[:, 0], boundary_cells)]])
+        pairs = np.unique(pairs, axis=0)
+        counts = np.bincount(np.searchsorted(boundary_cells, pairs[:, 0]), minlength=len(boundary_cells))
+
+        grid.owner = owner.reshape(shape)
+        grid.boundary_cells = boundary_cells
+        grid.candidate_offsets = np.concatenate([[0], np.cumsum(counts)]).astype("int64")
+        grid.candidates = pairs[:, 1].astype("int32")
+        return grid
+
+    def _boundary_cells(self, ring):
+        """Return the flat index of every cell touched by an edge of the closed ring."""
+        start = ring
+        end = np.roll(ring, -1, axis=0)
+        length = np.hypot(*(end - start).T)
+
+        # split every edge into pieces no longer than a cell
+        pieces = np.maximum(1, np.ceil(length / self.cell_size).astype("int64"))
+        edge = np.repeat(np.arange(len(ring)), pieces)
+        step = np.arange(len(edge)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        t0 = (step / pieces[edge])[:, None]
+        t1 = ((step + 1) / pieces[edge])[:, None]
+        a = start[edge] + t0 * (end[edge] - start[edge])
+        b = start[edge] + t1 * (end[edge] - start[edge])
+
+        ix_a, iy_a = self.cell_index(a[:, 1], a[:, 0])
+        ix_b, iy_b = self.cell_index(b[:, 1], b[:, 0])
+        ix = np.concatenate([ix_a, ix_a, ix_b, ix_b])
+        iy = np.concatenate([iy_a, iy_b, iy_a, iy_b])
+
+        return np.unique(np.ravel_multi_index((ix, iy), self.shape))
+
+    def locate(self, lat, lng):
+        """Return the index of the first polygon containing each point, -1 if there is none."""
+        lat = np.asarray(lat, dtype="float64")
+        lng = np.asarray(lng, dtype="float64")
+        result, pair_points, pair_polygons = self.lookup(lat, lng)
+        return self.resolve(result, pair_points, pair_polygons, lat, lng)
+
+    def lookup(self, lat, lng):
+        """Return the polygon of each point decided by its cell, and the (point, polygon) pairs left to test.
+
+        Points in a boundary cell are -1 in the result and appear in one pair
+        per candidate polygon of their cell, in polygon order.
+        """
+        ix, iy = self.cell_index(lat, lng)
+
+        result = np.where(ix >= 0, self.owner[ix, iy], OUTSIDE).astype("int64")
+        points = np.flatnonzero(result == BOUNDARY)
+        result[points] = OUTSIDE
+
+        # expand each point in a boundary cell into (point, candidate polygon) pairs
+        counts, pair_polygons = self.candidates_of(np.ravel_multi_index((ix[points], iy[points]), self.shape))
+        return result, np.repeat(points, counts), pair_polygons
+
+    def candidates_of(self, cells):
+        """Return the number of candidate polygons of each boundary cell and all of them, cell after cell."""
+        rows = np.searchsorted(self.boundary_cells, cells)
+        starts = self.candidate_offsets[rows]
+        counts = self.candidate_offsets[rows + 1] - starts
+        position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return counts, self.candidates[np.repeat(starts, counts) + position].astype("int64")
+
+    def resolve(self, result, pair_points, pair_polygons, lat, lng):
+        """Fill in ``result`` with the first polygon of each pair that contains its point."""
+        if len(pair_points) == 0:
+            return result
+
+        # test polygons in index order so that the first containing polygon wins
+        order = np.argsort(pair_polygons, kind="stable")
+        pair_points, pair_polygons = pair_points[order], pair_polygons[order]
+        bounds = np.flatnonzero(np.diff(pair_polygons)) + 1
+
+        for group_points, p in zip(np.split(pair_points, bounds), pair_polygons[np.concatenate([[0], bounds])]):
+            group_points = group_points[result[group_points] == OUTSIDE]
+            if len(group_points):
+                result[group_points[self.store.contains(p, lng[group_points], lat[group_points])]] = p
+
+        return result
+
+    def locate_names(self, lat, lng):
+        """Return the name of the polygon containing each point, "not available" if there is none."""
+        names = np.array(self.store.names + [config.NOT_AVAILABLE], dtype=object)
+        return names[self.locate(lat, lng)]
+
+    def save(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for name in ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+
+        # grid.json is written last, a grid without it is incomplete
+        with open(directory / "grid.json", "w") as outfile:
+            json.dump({"origin": self.origin, "cell_size": self.cell_size, "source": self.store.source}, outfile)
+
+        self.directory = directory
+
+    @classmethod
+    def load(cls, store, directory):
+        directory = Path(directory)
+
+        with open(directory / "grid.json", "r") as infile:
+            meta = json.load(infile)
+
+        if meta["source"] != store.source:
+            raise ValueError(f"grid in {directory} was built from another version of the polygons")
+
+        grid = cls(store, meta["origin"], meta["cell_size"],
+                   *(np.load(directory / f"{name}.npy", mmap_mode="r") for name in ARRAYS))
+        grid.directory = directory
+        return grid
+
+    def __reduce__(self):
+        # a saved grid pickles as its location, like PolygonStore
+        if self.directory is not None:
+            return (ContainmentGrid.load, (self.store, str(self.directory)))
+        return (ContainmentGrid, (self.store, self.origin, self.cell_size, *(np.asarray(getattr(self, name))
+                                                                             for name in ARRAYS)))
+
+
+def load_or_build(store, directory, cell_size=CELL_SIZE):
+    """Load the grid saved in ``directory``, building it first if it is missing, stale or of another cell size."""
+    try:
+        grid = ContainmentGrid.load(store, directory)
+        if grid.cell_size == cell_size:
+            return grid
+    except (FileNotFoundError, ValueError):
+        pass
+
+    grid = ContainmentGrid.build(store, cell_size)
+    grid.save(directory)
+    return grid
@@ -0,0 +1,102 @@
+"""Command line entry point running the pipeline headless."""
+
+import argparse
+import logging
+from pathlib import Path
+
+from . import config, instrument, isochrones, outofcore, output, pipeline, services
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="vic_suburbs", description=__doc__)
+    parser.add_argument("--data-dir", type=Path, default=config.DATA_DIR, help="directory holding the input data")
+    parser.add_argument("--lga-text", type=Path, help="LGA to suburb text file, the pdf is read directly by default")
+    parser.add_argument("--output", type=Path, default=config.OUTPUT_FILE, help="file to write, .csv, .parquet or .feather")
+    parser.add_argument("--covid-date", default=config.COVID_DATE, help="date of the COVID figures (YYYY-MM-DD)")
+    parser.add_argument("--no-covid", action="store_true", help="skip scraping the COVID figures")
+    parser.add_argument("--cache-dir", type=Path, default=config.CACHE_DIR,
+                        help="directory caching the result of each stage")
+    parser.add_argument("--no-cache", action="store_true", help="run every stage without caching")
+    parser.add_argument("--suburb-store", type=Path, default=config.SUBURB_STORE,
+                        help="directory of the compiled locality polygons, compiled from the shapefile if missing")
+    parser.add_argument("--lga-polygons", nargs="?", const=config.LGA_STORE, type=Path, dest="lga_store",
+                        metavar="DIRECTORY",
+                        help="locate the LGAs in the LGA shapefile, compiled into DIRECTORY, rather than by suburb")
+    parser.add_argument("--poi", nargs="+", type=Path, default=[], dest="poi_layers", metavar="FILE",
+                        help="csv or GeoJSON point layers, e.g. schools.csv, to add the closest point of")
+    parser.add_argument("--isochrones", nargs="+", type=int, default=[], metavar="MINUTES",
+                        help="add the smallest of these times to Melbourne Central, walk to the station included, "
+                             "that each property is within, e.g. 30 45 60")
+    parser.add_argument("--walking-speed", type=float, default=isochrones.WALKING_SPEED_KMH,
+                        help="walking speed in km/h for --isochrones")
+    parser.add_argument("--transfers", action="store_true",
+                        help="travel times to Melbourne Central include journeys changing trains")
+    parser.add_argument("--travel-date",
+                        help="travel times for the trips running on this date (YYYY-MM-DD) rather than every weekday")
+    parser.add_argument("--feeds", nargs="+", default=config.GTFS_FEEDS,
+                        help="GTFS feeds under Vic_GTFS_data to take the stations from, e.g. metropolitan tram")
+    parser.add_argument("--workers", type=int, default=4, help="number of stages run concurrently")
+    parser.add_argument("--report", type=Path, help="write the time and memory of each stage to this json file")
+    parser.add_argument("--log-stages", action="store_true", help="log the time and memory of each stage as json")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also record the peak memory of each stage with tracemalloc (slower)")
+    parser.add_argument("--model", type=Path, help="fit the final COVID model and save it to this file")
+    parser.add_argument("--out-of-core", type=Path, metavar="DIRECTORY",
+                        help="stream the properties in chunks into a Parquet dataset partitioned by LGA")
+    parser.add_argument("--chunk-size", type=int, default=outofcore.CHUNK_SIZE, help="rows per chunk with --out-of-core")
+    parser.add_argument("--row-group-size", type=int, default=output.ROW_GROUP_SIZE,
+                        help="rows per row group of the Parquet and Feather output")
+    parser.add_argument("--processes", type=int, default=1, help="processes enriching the chunks with --out-of-core")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.model is not None and args.no_covid:
+        raise SystemExit("--model needs the COVID figures, remove --no-covid")
+    if args.model is not None and args.out_of_core is not None:
+        raise SystemExit("--model needs the properties in memory, remove --out-of-core")
+    if args.lga_store is not None and args.out_of_core is not None:
+        raise SystemExit("--lga-polygons is not supported with --out-of-core")
+    if args.isochrones and args.out_of_core is not None:
+        raise SystemExit("--isochrones is not supported with --out-of-core")
+
+    if args.log_stages:
+        logging.basicConfig(format="%(message)s")
+        logging.getLogger(instrument.__name__).setLevel(logging.INFO)
+
+    recorder = instrument.Recorder(trace_memory=args.trace_memory, log=args.log_stages)
+
+    with instrument.recording(recorder):
+        cache_dir = None if args.no_cache else args.cache_dir
+
+        try:
+            if args.out_of_core is not None:
+                outofcore.run(args.out_of_core, args.data_dir, args.chunk_size,
+                              covid_date=None if args.no_covid else args.covid_date, workers=args.processes,
+                              row_group_size=args.row_group_size, poi_layers=args.poi_layers,
+                              lga_text=args.lga_text, suburb_store=args.suburb_store, cache_dir=cache_dir,
+                              transfers=args.transfers, travel_date=args.travel_date, gtfs_feeds=args.feeds)
+            else:
+                run_in_memory(args, cache_dir)
+        except services.TravelDateError as error:
+            raise SystemExit(f"--travel-date: {error}")
+
+    if args.report is not None:
+        recorder.write(args.report)
+
+
+def run_in_memory(args, cache_dir):
+    prop_df = pipeline.run(args.data_dir, args.lga_text, args.covid_date, covid=not args.no_covid,
+                           cache_dir=cache_dir, workers=args.workers, suburb_store=args.suburb_store,
+                           transfers=args.transfers, travel_date=args.travel_date, gtfs_feeds=args.feeds,
+                           lga_store=args.lga_store, poi_layers=args.poi_layers,
+                           isochrone_minutes=args.isochrones, walking_speed=args.walking_speed)
+
+    with instrument.stage("write_output") as record:
+        output.write(prop_df, args.output, args.row_group_size)
+        record["rows"] = len(prop_df)
+
+    if args.model is not None:
+        pipeline.run_model(prop_df, args.model)
@@ -0,0 +1,34 @@
+"""Default file locations and constants shared by the pipeline stages."""
+
+from pathlib import Path
+
+DATA_DIR = Path("data")
+
+JSON_FILE = "jsonfile.json"
+XML_FILE = "xmlfile.xml"
+SUBURB_SHAPEFILE = "vic_suburb_bounadry/VIC_LOCALITY_POLYGON_shp"
+LGA_SHAPEFILE = "vic_lga_boundary/VIC_LGA_POLYGON_shp"
+LGA_PDF = "lga_to_suburb.pdf"
+LGA_TEXT = Path("lga_to_suburb.txt")
+# one directory per feed, see feeds
+GTFS_ROOT = "Vic_GTFS_data"
+GTFS_FEEDS = ["metropolitan"]
+
+OUTPUT_FILE = Path("solution.csv")
+CACHE_DIR = Path(".vic_suburbs_cache")
+# compiled locality polygons, see polystore
+SUBURB_STORE = CACHE_DIR / "localities"
+# compiled LGA polygons, see regions
+LGA_STORE = CACHE_DIR / "lgas"
+# compiled timetable of each GTFS feed
+FEED_STORE = CACHE_DIR / "feeds"
+
+# value used for every column that could not be derived
+NOT_AVAILABLE = "not available"
+
+# stop_id of Melbourne Central station
+MELBOURNE_CENTRAL = 19842
+
+# COVID figures are taken relative to this date
+COVID_DATE = "2021-09-30"
+COVID_URL = "https://covidlive.com.au/vic/"
@@ -0,0 +1,251 @@
+"""A small DAG executor running pipeline stages with fingerprinted caching.
+
+Each ``Stage`` declares the stages it takes as inputs, the run parameters it
+reads and the files it depends on. A stage's fingerprint hashes its name and
+version, those parameter values, the size and modification time of those
+files and the fingerprints of its inputs, so changing a parameter only
+invalidates the stages downstream of it. Results are cached under their
+fingerprint, and independent stages run concurrently in a thread pool.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from . import instrument
+
+logger = logging.getLogger(__name__)
+
+# results of each stage kept by DiskCache
+KEEP_RESULTS = 3
+
+
+class Stage:
+    """A step of the pipeline.
+
+    ``func`` is called with the results of ``inputs`` as positional arguments
+    followed by ``params`` as keyword arguments. ``files`` are format strings
+    filled in with the run parameters, e.g. ``"{data_dir}/xmlfile.xml"``, or
+    functions of the run parameters returning a list of paths.
+    Bump ``version`` when the code of the stage changes.
+    """
+
+    def __init__(self, name, func, inputs=(), params=(), files=(), version=1):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = list(params)
+        self.files = list(files)
+        self.version = version
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, inputs={self.inputs}, params={self.params})"
+
+
+def file_fingerprint(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return "missing"
+
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def stage_files(stage, params):
+    paths = []
+    for f in stage.files:
+        paths.extend(f(**params) if callable(f) else [f.format(**params)])
+    return paths
+
+
+class MemoryCache:
+    """Keep results in a dictionary for the lifetime of the object."""
+
+    def __init__(self):
+        self.results = {}
+
+    def __contains__(self, key):
+        return key in self.results
+
+    def get(self, key):
+        return self.results[key]
+
+    def put(self, key, value):
+        self.results[key] = value
+
+
+class DiskCache:
+    """Pickle results into ``directory``, one file per stage fingerprint.
+
+    Only the ``keep`` most recently used results of each stage are kept, so
+    runs over many dates don't pile up copies of the property dataframe.
+    """
+
+    def __init__(self, directory, keep=KEEP_RESULTS):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keep = keep
+
+    def _path(self, key):
+        name, fingerprint = key
+        return self.directory / f"{name}-{fingerprint}.pkl"
+
+    def __contains__(self, key):
+        return self._path(key).exists()
+
+    def get(self, key):
+        path = self._path(key)
+        # mark the result as used, see evict
+        os.utime(path)
+
+        with open(path, "rb") as infile:
+            return pickle.load(infile)
+
+    def evict(self, name):
+        """Delete all but the ``keep`` most recently used results of stage ``name``."""
+        # fingerprints are 16 hex digits, so e.g. lga never matches the results of lga_index
+        paths = [(path.stat().st_mtime_ns, path) for path in self.directory.glob(f"{name}-{'?' * 16}.pkl")]
+
+        for _, path in sorted(paths, reverse=True)[self.keep:]:
+            path.unlink(missing_ok=True)
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+
+        with open(tmp_path, "wb") as outfile:
+            pickle.dump(value, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # write then rename so that an interrupted run never leaves a truncated result
+        os.replace(tmp_path, path)
+        self.evict(key[0])
+
+
+def run_stage(stage, args, kwargs):
+    with instrument.stage(stage.name) as record:
+        result = stage.func(*args, **kwargs)
+        record["rows"] = instrument.count_rows(result)
+
+    return result
+
+
+class DAG:
+    def __init__(self, stages):
+        self.stages = {}
+
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"duplicate stage {stage.name!r}")
+            self.stages[stage.name] = stage
+
+        for stage in self.stages.values():
+            for name in stage.inputs:
+                if name not in self.stages:
+                    raise ValueError(f"stage {stage.name!r} takes unknown input {name!r}")
+
+        self.order = self._topological_order()
+        self.executed = []
+
+    def _topological_order(self):
+        order = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError("cycle between stages: " + " -> ".join(path + [name]))
+
+            state[name] = "visiting"
+            for input_name in self.stages[name].inputs:
+                visit(input_name, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+
+        return order
+
+    def fingerprints(self, params):
+        """Return the fingerprint of every stage for the run parameters."""
+        fingerprints = {}
+
+        for name in self.order:
+            stage = self.stages[name]
+            missing = [param for param in stage.params if param not in params]
+            if missing:
+                raise KeyError(f"stage {name!r} needs parameters {missing}")
+
+            description = {
+                "name": name,
+                "version": stage.version,
+                "params": {param: str(params[param]) for param in stage.params},
+                "files": {path: file_fingerprint(path) for path in stage_files(stage, params)},
+                "inputs": [fingerprints[input_name] for input_name in stage.inputs],
+            }
+            fingerprints[name] = hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()[:16]
+
+        return fingerprints
+
+    def run(self, params, targets=None, cache=None, workers=4):
+        """Run the stages needed for ``targets`` (all stages by default) and return their results.
+
+        Stages whose fingerprint is in ``cache`` are loaded instead of run,
+        and their inputs are not needed at all. ``self.executed`` lists the
+        stages that ran.
+        """
+        targets = list(self.stages) if targets is None else list(targets)
+        cache = MemoryCache() if cache is None else cache
+        fingerprints = self.fingerprints(params)
+        results = {}
+        pending = []
+
+        # walk back from the targets, stopping at cached stages
+        stack = list(targets)
+        seen = set()
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+
+            key = (name, fingerprints[name])
+            if key in cache:
+                logger.debug("stage %s: cached", name)
+                results[name] = cache.get(key)
+            else:
+                pending.append(name)
+                stack.extend(self.stages[name].inputs)
+
+        self.executed = []
+        pending = set(pending)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                ready = [name for name in self.order
+                         if name in pending and all(input_name in results for input_name in self.stages[name].inputs)]
+
+                for name in ready:
+                    stage = self.stages[name]
+                    args = [results[input_name] for input_name in stage.inputs]
+                    kwargs = {param: params[param] for param in stage.params}
+                    logger.debug("stage %s: running", name)
+                    running[pool.submit(run_stage, stage, args, kwargs)] = name
+                    pending.discard(name)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name = running.pop(future)
+                    # re-raises the exception of a failed stage
+                    results[name] = future.result()
+                    cache.put((name, fingerprints[name]), results[name])
+                    self.executed.append(name)
+
+        return {name: results[name] for name in targets}
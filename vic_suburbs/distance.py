@@ -0,0 +1,103 @@
+"""Vectorised great-circle distances between blocks of points.
+
+The haversine formula is the same as the ``haversine`` package's, with the
+same mean earth radius, so distances agree with it to floating point error.
+Distance matrices are computed for blocks of ``block_size`` query points at a
+time to cap memory at about ``block_size * n_targets`` values. With
+``dtype="float32"`` the matrices take half the memory, and the distance to
+the selected target is recomputed in float64.
+"""
+
+import numpy as np
+
+# mean earth radius used by the haversine package
+EARTH_RADIUS_KM = 6371.0088
+
+BLOCK_SIZE = 4096
+
+
+class Coordinates:
+    """Latitudes and longitudes in radians, with the cosine of the latitude, ready for the kernels."""
+
+    def __init__(self, lat, lng, dtype="float64"):
+        self.lat = np.radians(np.asarray(lat, dtype="float64")).astype(dtype)
+        self.lng = np.radians(np.asarray(lng, dtype="float64")).astype(dtype)
+        self.cos_lat = np.cos(self.lat)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def take(self, index):
+        subset = Coordinates.__new__(Coordinates)
+        subset.lat, subset.lng, subset.cos_lat = self.lat[index], self.lng[index], self.cos_lat[index]
+        return subset
+
+    def astype(self, dtype):
+        converted = Coordinates.__new__(Coordinates)
+        converted.lat, converted.lng, converted.cos_lat = (a.astype(dtype) for a in (self.lat, self.lng, self.cos_lat))
+        return converted
+
+
+def haversine_term(points, targets):
+    """Return the (len(points), len(targets)) haversine term, which grows with the distance."""
+    dlat = targets.lat[None, :] - points.lat[:, None]
+    dlng = targets.lng[None, :] - points.lng[:, None]
+    return np.sin(dlat * 0.5) ** 2 + points.cos_lat[:, None] * targets.cos_lat[None, :] * np.sin(dlng * 0.5) ** 2
+
+
+def term_to_km(h):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+
+
+def haversine_matrix(points, targets):
+    """Return the haversine distance in km between every point and every target."""
+    return term_to_km(haversine_term(points, targets))
+
+
+def equirectangular_matrix(points, targets):
+    """Return the equirectangular approximation of the distance in km, accurate over short distances."""
+    mean_lat = (points.lat[:, None] + targets.lat[None, :]) * 0.5
+    x = (targets.lng[None, :] - points.lng[:, None]) * np.cos(mean_lat)
+    y = targets.lat[None, :] - points.lat[:, None]
+    return EARTH_RADIUS_KM * np.hypot(x, y)
+
+
+def pair_distances(points, targets):
+    """Return the haversine distance in km between points[i] and targets[i], in float64."""
+    points, targets = points.astype("float64"), targets.astype("float64")
+    h = (np.sin((targets.lat - points.lat) * 0.5) ** 2
+         + points.cos_lat * targets.cos_lat * np.sin((targets.lng - points.lng) * 0.5) ** 2)
+    return term_to_km(h)
+
+
+def nearest(points, targets, block_size=BLOCK_SIZE, dtype="float64", method="haversine"):
+    """Return the index of the closest target of each point and the haversine distance to it in km.
+
+    Ties go to the first target, like taking the minimum over the targets in
+    order. With float32 the two closest candidates of each point are compared
+    again in float64, so rounding cannot change the result of a clear winner.
+    ``method="equirectangular"`` ranks the targets with the equirectangular
+    approximation instead, the returned distances are still haversine.
+    """
+    kernel = haversine_term if method == "haversine" else equirectangular_matrix
+    block_points = points.astype(dtype)
+    block_targets = targets.astype(dtype)
+    index = np.empty(len(points), dtype="int64")
+
+    for start in range(0, len(points), block_size):
+        block = slice(start, start + block_size)
+        scores = kernel(block_points.take(block), block_targets)
+
+        if np.dtype(dtype) == np.float64 or len(targets) < 2:
+            index[block] = np.argmin(scores, axis=1)
+            continue
+
+        # refine the two best candidates in float64, keeping the lower index on ties
+        best = np.argpartition(scores, 1, axis=1)[:, :2]
+        best.sort(axis=1)
+        rows = np.arange(start, min(start + block_size, len(points)))
+        first = pair_distances(points.take(rows), targets.take(best[:, 0]))
+        second = pair_distances(points.take(rows), targets.take(best[:, 1]))
+        index[block] = np.where(second < first, best[:, 1], best[:, 0])
+
+    return index, pair_distances(points, targets.take(index))
@@ -0,0 +1,316 @@
+"""Integrate suburb, LGA, closest train station and travel time columns."""
+
+import csv
+
+import numpy as np
+import pandas as pd
+
+from . import config, distance, instrument, journeys, lgatable, neighbours, services
+
+# shapefile, matplotlib and haversine are imported on first use by the stage that needs them
+
+
+# suburb
+
+def load_suburb_bounds(path):
+    """Map each suburb name in the locality shapefile to its boundary polygon.
+
+    The suburb is the 7th element of each record, only the first part of each
+    shape is kept.
+    """
+    import shapefile
+    from matplotlib.patches import Polygon
+
+    sf = shapefile.Reader(str(path))
+
+    subs_bounds = {}
+
+    for rs in sf.shapeRecords():
+        sub = rs.record[6]
+        shape = rs.shape
+        pts = np.array(shape.points)
+        par = list(shape.parts) + [pts.shape[0]]
+
+        subs_bounds[sub] = Polygon(pts[par[0]:par[1]])
+
+    return subs_bounds
+
+
+def loc_sub(lat, lng, subs_bounds):
+    """Return the suburb whose boundary contains the point."""
+    # check if any suburb contains the point
+    for sub, poly in subs_bounds.items():
+        if poly.contains_point((lng, lat)):
+            return sub
+
+    # if no suburb contains the point
+    return config.NOT_AVAILABLE
+
+
+def add_suburbs(prop_df, subs_bounds):
+    prop_df["suburb"] = [loc_sub(lat, lng, subs_bounds) for lat, lng in zip(prop_df["lat"], prop_df["lng"])]
+    return prop_df
+
+
+def add_suburbs_from_store(prop_df, store):
+    """Same as ``add_suburbs`` but locating all the points at once.
+
+    ``store`` is a ``polystore.PolygonStore`` or a ``cellgrid.ContainmentGrid``.
+    """
+    prop_df["suburb"] = store.locate_names(prop_df["lat"].to_numpy(), prop_df["lng"].to_numpy())
+    return prop_df
+
+
+def add_regions(prop_df, regions):
+    """Add both the suburb and the LGA columns from the polygons, see ``regions.RegionIndex``."""
+    prop_df["suburb"], prop_df["lga"] = regions.locate_names(prop_df["lat"].to_numpy(), prop_df["lng"].to_numpy())
+    return prop_df
+
+
+# LGA
+
+def read_lga_dict(text_path=config.LGA_TEXT):
+    """Map each LGA to its list of uppercased suburbs, from the text converted from the pdf.
+
+    See ``lgatable`` to read the pdf directly.
+    """
+    with open(text_path, "r") as infile:
+        return lgatable.parse_lga_text(infile.read())
+
+
+def find_lga(suburb, lga_dict):
+    for lga, suburbs in lga_dict.items():
+        if suburb in suburbs:
+            return lga
+
+    return config.NOT_AVAILABLE
+
+
+def add_lga(prop_df, lga_dict):
+    prop_df["lga"] = prop_df["suburb"].apply(find_lga, args=(lga_dict,))
+    return prop_df
+
+
+def add_lga_indexed(prop_df, index):
+    """Same as ``add_lga`` through a ``names.NameIndex``, which also matches spelling variants."""
+    suburbs = prop_df["suburb"].unique()
+    lgas = dict(zip(suburbs, (index.lookup(suburb) for suburb in suburbs)))
+    prop_df["lga"] = prop_df["suburb"].map(lgas)
+    return prop_df
+
+
+def fill_lga_indexed(prop_df, index):
+    """Look up the LGA of the rows without one by suburb name, e.g. after ``add_regions`` outside every LGA polygon."""
+    missing = prop_df["lga"] == config.NOT_AVAILABLE
+    suburbs = prop_df.loc[missing, "suburb"].unique()
+    lgas = dict(zip(suburbs, (index.lookup(suburb) for suburb in suburbs)))
+    prop_df.loc[missing, "lga"] = prop_df.loc[missing, "suburb"].map(lgas)
+    return prop_df
+
+
+# closest train station
+
+def read_stops(gtfs_dir):
+    """Map each stop id to its (lat, lng).
+
+    The file is read as text rather than with pandas to keep every decimal
+    place of the coordinates.
+    """
+    with open(f"{gtfs_dir}/stops.txt", "r", newline="") as infile:
+        rows = csv.reader(infile)
+        # skip the row containing the field names
+        next(rows)
+
+        return {int(row[0]): (float(row[3]), float(row[4])) for row in rows}
+
+
+def closest_station(lat, lng, stops_dict):
+    """Return the closest stop and its haversine distance in km."""
+    from haversine import haversine
+
+    dist_dict = {stop: haversine((lat, lng), coords) for stop, coords in stops_dict.items()}
+    stop = min(dist_dict, key=dist_dict.get)
+
+    return stop, dist_dict[stop]
+
+
+def add_closest_station(prop_df, stops_dict):
+    closest = [closest_station(lat, lng, stops_dict) for lat, lng in zip(prop_df["lat"], prop_df["lng"])]
+
+    prop_df["closest_train_station_id"] = [stop for stop, _ in closest]
+    prop_df["distance_to_closest_train_station"] = [round(dist, 3) for _, dist in closest]
+    return prop_df
+
+
+def add_closest_station_vectorized(prop_df, stops_dict, block_size=distance.BLOCK_SIZE, dtype="float64"):
+    """Same as ``add_closest_station`` with the distances computed in blocks by ``distance.nearest``."""
+    stop_ids = np.array(list(stops_dict), dtype="int64")
+    stops = distance.Coordinates(*np.array(list(stops_dict.values())).T)
+    index, dist = distance.nearest(distance.Coordinates(prop_df["lat"], prop_df["lng"]), stops, block_size, dtype)
+
+    prop_df["closest_train_station_id"] = stop_ids[index]
+    prop_df["distance_to_closest_train_station"] = np.round(dist, 3)
+    return prop_df
+
+
+def nearest_stations(prop_df, stops_dict, k=3):
+    """Return the ``k`` closest stops of each property as ``neighbours.Neighbours``.
+
+    The indices are positions in ``stops_dict``, e.g. ``np.array(list(stops_dict))[result.indices]`` are stop ids.
+    """
+    index = neighbours.PointIndex.from_stops(stops_dict)
+    return index.nearest(distance.Coordinates(prop_df["lat"], prop_df["lng"]), k)
+
+
+def stations_within(prop_df, stops_dict, radius_km=1.5):
+    """Return the stops up to ``radius_km`` km from each property, as ``nearest_stations`` does."""
+    index = neighbours.PointIndex.from_stops(stops_dict)
+    return index.within(distance.Coordinates(prop_df["lat"], prop_df["lng"]), radius_km)
+
+
+# travel time to Melbourne Central
+
+def read_weekday_stop_times(gtfs_dir):
+    """Return the stop times of trips running on all weekdays, departing from 7am."""
+    calendar = pd.read_csv(f"{gtfs_dir}/calendar.txt")
+    weekdays = ["monday", "tuesday", "wednesday", "thursday", "friday"]
+    calendar = calendar[(calendar[weekdays] == 1).all(axis=1)]
+
+    trips = pd.read_csv(f"{gtfs_dir}/trips.txt")
+    trips = trips[trips["service_id"].isin(calendar["service_id"])]
+
+    return read_trip_stop_times(gtfs_dir, trips["trip_id"])
+
+
+def read_date_stop_times(gtfs_dir, date):
+    """Same as ``read_weekday_stop_times`` for the trips running on ``date``.
+
+    The calendar_dates.txt exceptions are applied, see ``services``. A date
+    outside the dates of the feed raises ``services.TravelDateError`` rather
+    than finding no trips.
+    """
+    calendar = services.ServiceCalendar.from_gtfs(gtfs_dir)
+    date = services.to_date(date)
+    if not calendar.start <= date <= calendar.end:
+        raise services.TravelDateError(f"travel date {date} is outside the calendar of {gtfs_dir}, "
+                         f"from {calendar.start} to {calendar.end}")
+
+    trips = pd.read_csv(f"{gtfs_dir}/trips.txt", dtype={"service_id": str})
+    trips = trips[calendar.select(trips["service_id"], calendar.running_on(date))]
+
+    return read_trip_stop_times(gtfs_dir, trips["trip_id"])
+
+
+def read_trip_stop_times(gtfs_dir, trip_ids):
+    """Return the stop times of ``trip_ids`` departing from 7am."""
+    stop_times = pd.read_csv(f"{gtfs_dir}/stop_times.txt")
+    stop_times = stop_times[stop_times["trip_id"].isin(trip_ids)]
+    stop_times = stop_times[(stop_times["departure_time"] >= "07:00:00") & (stop_times["departure_time"] < "24:00:00")
+                            & (stop_times["arrival_time"] < "24:00:00")].copy()
+
+    stop_times["arrival_time"] = pd.to_datetime(stop_times["arrival_time"], format="%H:%M:%S")
+    stop_times["departure_time"] = pd.to_datetime(stop_times["departure_time"], format="%H:%M:%S")
+    return stop_times
+
+
+def build_trip_dict(stop_times):
+    """Map each trip to the list of its stops in order."""
+    trip_stops = stop_times.groupby("trip_id")["stop_id"].unique()
+    return {trip: list(stops) for trip, stops in trip_stops.items()}
+
+
+def melb_cen_time(stop, trip_dict, stop_times):
+    """Return the average direct journey time in minutes from the stop to Melbourne Central.
+
+    Returns 0 if the stop is Melbourne Central, and "not available" if there is
+    no direct journey departing between 7am and 9am.
+    """
+    mc = config.MELBOURNE_CENTRAL
+    times = []
+    routes = []
+
+    # closest station is Melbourne Central
+    if stop == mc:
+        return 0
+
+    for route, stops_list in trip_dict.items():
+        # check both stops in the route and Melbourne Central's stop comes after the closest station stop
+        if (stop in stops_list) and (mc in stops_list) and (stops_list.index(stop) < stops_list.index(mc)):
+            routes.append(route)
+
+    # if no routes contain both stops, or if Melbourne Central comes before our stop, then there are no direct journeys
+    if len(routes) == 0:
+        return config.NOT_AVAILABLE
+
+    for r in routes:
+        trip_times = stop_times[stop_times["trip_id"] == r]
+        depart_time = trip_times.loc[trip_times["stop_id"] == stop, "departure_time"].values[0]
+
+        # check departure time from the stop is between 7am and 9am
+        if pd.Timestamp(depart_time).hour <= 9:
+            arrive_time = trip_times.loc[trip_times["stop_id"] == mc, "arrival_time"].values[0]
+            times.append((arrive_time - depart_time) / np.timedelta64(1, "m"))
+
+    # none of the potential routes satisfy the conditions
+    if len(times) == 0:
+        return config.NOT_AVAILABLE
+
+    return round(np.mean(times))
+
+
+def add_travel_time(prop_df, trip_dict, stop_times):
+    """Add ``travel_min_to_MC`` and ``direct_journey_flag``.
+
+    The time is computed once per unique closest station rather than per row.
+    """
+    with instrument.stage("melb_cen_time") as record:
+        stop_to_MC_times = {stop: melb_cen_time(stop, trip_dict, stop_times)
+                            for stop in prop_df["closest_train_station_id"].unique()}
+        record["rows"] = len(stop_to_MC_times)
+
+    prop_df["travel_min_to_MC"] = prop_df["closest_train_station_id"].map(stop_to_MC_times)
+    prop_df["direct_journey_flag"] = (prop_df["travel_min_to_MC"] != config.NOT_AVAILABLE).astype("int64")
+    return prop_df
+
+
+def station_travel_times(stops, timetable, transfers=False):
+    """Map each stop to its travel time to Melbourne Central in minutes, "not available" if none.
+
+    The times are those of ``add_travel_time_compiled``, or with
+    ``transfers`` those of ``add_travel_time_transfers``.
+    """
+    if transfers:
+        profile = journeys.reverse_profile(timetable)
+        return {stop: profile.minutes(stop) for stop in stops}
+    return {stop: timetable.direct_minutes(stop) for stop in stops}
+
+
+def add_travel_time_compiled(prop_df, timetable):
+    """Same as ``add_travel_time`` from a ``timetable.Timetable``."""
+    with instrument.stage("melb_cen_time") as record:
+        stop_to_MC_times = {stop: timetable.direct_minutes(stop)
+                            for stop in prop_df["closest_train_station_id"].unique()}
+        record["rows"] = len(stop_to_MC_times)
+
+    prop_df["travel_min_to_MC"] = prop_df["closest_train_station_id"].map(stop_to_MC_times)
+    prop_df["direct_journey_flag"] = (prop_df["travel_min_to_MC"] != config.NOT_AVAILABLE).astype("int64")
+    return prop_df
+
+
+def add_travel_time_transfers(prop_df, timetable, profile=None):
+    """Same as ``add_travel_time_compiled`` with ``travel_min_to_MC`` allowing changes of trip.
+
+    The times come from the ``journeys.reverse_profile`` to Melbourne Central,
+    ``direct_journey_flag`` still marks the stations with a direct journey.
+    """
+    profile = journeys.reverse_profile(timetable) if profile is None else profile
+
+    with instrument.stage("melb_cen_time") as record:
+        stations = prop_df["closest_train_station_id"].unique()
+        stop_to_MC_times = {stop: profile.minutes(stop) for stop in stations}
+        direct = {stop: timetable.direct_minutes(stop) != config.NOT_AVAILABLE for stop in stations}
+        record["rows"] = len(stations)
+
+    prop_df["travel_min_to_MC"] = prop_df["closest_train_station_id"].map(stop_to_MC_times)
+    prop_df["direct_journey_flag"] = prop_df["closest_train_station_id"].map(direct).astype("int64")
+    return prop_df
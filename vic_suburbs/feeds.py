@@ -0,0 +1,142 @@
+"""Several GTFS feeds loaded in parallel into one stops index and timetable.
+
+Each directory under ``Vic_GTFS_data`` holding a stops.txt is a feed, e.g.
+metropolitan, regional, tram or bus. The known feeds are numbered by their
+place in ``FEED_ORDER`` and the other selected feeds after them by name, so
+the numbers only depend on the selection. The stop ids of feed k are
+shifted by k * ``FEED_STRIDE`` so that they do not collide, the
+metropolitan ones, Melbourne Central included, are unchanged. Trip ids are
+prefixed with the feed name.
+
+Every feed is parsed and compiled in its own process into a
+``timetable.Timetable`` saved under ``config.FEED_STORE``, so selecting
+other feeds later reuses the compiled ones rather than parsing them again.
+Each compiled timetable has a directory of its own, named after the feed and
+a hash of its files, date and number, because a cached pipeline result
+holds the timetable as the path of its arrays.
+Stops of different feeds are different stops: there are no transfers
+between feeds.
+"""
+
+import hashlib
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from . import config, dag, enrich, timetable
+
+FEED_ORDER = ["metropolitan", "regional", "tram", "bus"]
+
+FEED_STRIDE = 10 ** 7
+
+FEED_FILES = ["stops.txt", "calendar.txt", "calendar_dates.txt", "trips.txt", "stop_times.txt"]
+
+Feeds = namedtuple("Feeds", ["numbers", "stops", "timetable"])
+
+
+def discover_feeds(root):
+    """Return the names of the feed directories under ``root``."""
+    return sorted(entry.name for entry in os.scandir(root)
+                  if entry.is_dir() and os.path.exists(os.path.join(entry.path, "stops.txt")))
+
+
+def feed_numbers(feeds):
+    """Map each selected feed to its number, the feeds not in ``FEED_ORDER`` after those by name."""
+    others = sorted(name for name in feeds if name not in FEED_ORDER)
+
+    numbers = {name: FEED_ORDER.index(name) for name in feeds if name in FEED_ORDER}
+    numbers.update((name, len(FEED_ORDER) + k) for k, name in enumerate(others))
+    return numbers
+
+
+def feed_files(data_dir, gtfs_feeds, **params):
+    """Return the files of the selected feeds, the DAG fingerprints them."""
+    return [f"{data_dir}/{config.GTFS_ROOT}/{name}/{file}" for name in gtfs_feeds for file in FEED_FILES]
+
+
+def namespaced(stop_ids, number):
+    return np.asarray(stop_ids, dtype="int64") + number * FEED_STRIDE
+
+
+def source_fingerprint(feed_dir, number, travel_date):
+    return {"directory": str(Path(feed_dir).resolve()), "number": number,
+            "files": {name: dag.file_fingerprint(f"{feed_dir}/{name}") for name in FEED_FILES},
+            "travel_date": None if travel_date is None else str(travel_date)}
+
+
+def store_directory(store, name, source):
+    """Return the directory of the timetable compiled from ``source`` in ``store``."""
+    digest = hashlib.sha256(json.dumps(source, sort_keys=True).encode()).hexdigest()[:16]
+    return Path(store) / f"{name}-{digest}"
+
+
+def compile_feed(feed_dir, name, number, travel_date=None):
+    """Compile the stop times of one feed, for every weekday or for ``travel_date``, with namespaced ids."""
+    if travel_date is None:
+        stop_times = enrich.read_weekday_stop_times(feed_dir)
+    else:
+        stop_times = enrich.read_date_stop_times(feed_dir, travel_date)
+
+    stop_times = stop_times.assign(trip_id=name + ":" + stop_times["trip_id"].astype(str),
+                                   stop_id=namespaced(stop_times["stop_id"], number))
+    return timetable.Timetable.from_stop_times(stop_times)
+
+
+def load_feed(feed_dir, name, number, travel_date=None, store=None):
+    """Return the stops and compiled timetable of one feed.
+
+    The timetable compiled in ``store`` is reused unless the feed files,
+    the date or the number changed, which compile into another directory.
+    """
+    stops_dict = enrich.read_stops(feed_dir)
+    stops = dict(zip(namespaced(list(stops_dict), number).tolist(), stops_dict.values()))
+
+    if store is None:
+        return stops, compile_feed(feed_dir, name, number, travel_date)
+
+    source = source_fingerprint(feed_dir, number, travel_date)
+    directory = store_directory(store, name, source)
+
+    try:
+        compiled = timetable.Timetable.load(directory)
+        if compiled.source == source:
+            return stops, compiled
+    except FileNotFoundError:
+        pass
+
+    compiled = compile_feed(feed_dir, name, number, travel_date)
+    # saved, the timetable goes back to the parent process as its path
+    compiled.save(directory, source)
+    return stops, compiled
+
+
+def load_feeds(data_dir=config.DATA_DIR, feeds=config.GTFS_FEEDS, travel_date=None, store=config.FEED_STORE,
+               workers=None):
+    """Load the selected feeds, each in its own process, and merge them into one ``Feeds``.
+
+    The compiled timetables are not saved when ``store`` is None.
+    """
+    root = f"{data_dir}/{config.GTFS_ROOT}"
+    found = discover_feeds(root)
+
+    missing = [name for name in feeds if name not in found]
+    if missing:
+        raise ValueError(f"no GTFS feed {missing} in {root}, found {found}")
+
+    numbers = feed_numbers(feeds)
+
+    jobs = [(f"{root}/{name}", name, numbers[name], travel_date, store) for name in feeds]
+
+    if len(jobs) == 1:
+        loaded = [load_feed(*jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as pool:
+            loaded = list(pool.map(load_feed, *zip(*jobs)))
+
+    stops = {stop: coords for feed_stops, _ in loaded for stop, coords in feed_stops.items()}
+    compiled = loaded[0][1] if len(loaded) == 1 else timetable.Timetable.merge(compiled for _, compiled in loaded)
+    return Feeds({name: numbers[name] for name in feeds}, stops, compiled)
@@ -0,0 +1,135 @@
+"""Per-stage timing and memory instrumentation.
+
+While a ``Recorder`` is active (see ``recording``), every ``stage`` block
+records its wall time, CPU time of the running thread, the peak RSS of the
+process at its end, optionally the peak memory traced by ``tracemalloc``, and
+the number of rows it produced. ``stage`` is a no-op when nothing is
+recording, so the pipeline code can always use it.
+
+Stages running concurrently share the process, so with more than one worker
+the peak RSS and traced memory of a stage include whatever ran alongside it.
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_active = None
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def count_rows(result):
+    """Return the number of rows of a stage result, or None if it has no length."""
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+class Recorder:
+    def __init__(self, trace_memory=False, log=False):
+        self.trace_memory = trace_memory
+        self.log = log
+        self.records = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name):
+        """Record the block as stage ``name``, set ``rows`` on the yielded record to count rows."""
+        stack = self._stack()
+        record = {"stage": name, "parent": stack[-1]["stage"] if stack else None, "rows": None}
+
+        if self.trace_memory:
+            # hand the peak so far to the enclosing stage before resetting it
+            if stack:
+                stack[-1]["_traced_peak"] = max(stack[-1]["_traced_peak"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            record["_traced_peak"] = 0
+
+        stack.append(record)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+
+        try:
+            yield record
+        finally:
+            record["wall_s"] = time.perf_counter() - wall_start
+            record["cpu_s"] = time.thread_time() - cpu_start
+            record["peak_rss_mb"] = peak_rss_mb()
+            stack.pop()
+
+            if self.trace_memory:
+                traced_peak = max(record.pop("_traced_peak"), tracemalloc.get_traced_memory()[1])
+                record["traced_peak_mb"] = traced_peak / 2 ** 20
+                if stack:
+                    stack[-1]["_traced_peak"] = max(stack[-1]["_traced_peak"], traced_peak)
+
+            with self._lock:
+                self.records.append(record)
+
+            if self.log:
+                logger.info(json.dumps(record))
+
+    def report(self):
+        """Return the records in the order the stages finished, with the process totals."""
+        return {"stages": self.records, "peak_rss_mb": peak_rss_mb(),
+                "total_wall_s": time.perf_counter() - self.started}
+
+    def write(self, path):
+        with open(path, "w") as outfile:
+            json.dump(self.report(), outfile, indent=2)
+
+
+@contextmanager
+def recording(recorder):
+    """Make ``recorder`` receive every ``stage`` until the block exits."""
+    global _active
+    previous = _active
+    _active = recorder
+
+    started_tracing = recorder.trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    try:
+        yield recorder
+    finally:
+        _active = previous
+        if started_tracing:
+            tracemalloc.stop()
+
+
+@contextmanager
+def stage(name):
+    """Record the block with the active recorder, if any."""
+    if _active is None:
+        yield {}
+    else:
+        with _active.stage(name) as record:
+            yield record
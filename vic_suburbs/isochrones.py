@@ -0,0 +1,87 @@
+"""Properties within given numbers of minutes of Melbourne Central, walk to the station included.
+
+The time of a property is the shortest walk to a station plus the travel
+time of that station, over the stations within walking distance of the
+longest threshold (``neighbours.PointIndex.within``), so a property may walk
+past its closest station to a faster one. Walks are at ``walking_speed_kmh``
+along the haversine distance.
+
+The properties are sorted by time once: the properties within each threshold
+are then a prefix of the same order, and the cutoffs of every threshold come
+from one binary search (``np.searchsorted``) rather than a filter per
+threshold.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from . import config, distance, neighbours
+
+WALKING_SPEED_KMH = 5.0
+
+# the properties within thresholds[i] minutes are order[:cutoffs[i]]
+Isochrones = namedtuple("Isochrones", ["thresholds", "order", "cutoffs"])
+
+
+def walking_minutes(lat, lng, travel_times, stops_dict, max_minutes, walking_speed_kmh=WALKING_SPEED_KMH,
+                    block_size=neighbours.BLOCK_SIZE):
+    """Return the shortest walk plus travel time of each point in minutes, inf past ``max_minutes``.
+
+    ``travel_times`` maps stop ids to minutes or "not available", as
+    ``enrich.station_travel_times``.
+    """
+    reachable = {stop: minutes for stop, minutes in travel_times.items()
+                 if minutes != config.NOT_AVAILABLE and minutes <= max_minutes and stop in stops_dict}
+    result = np.full(len(lat), np.inf)
+    if not reachable:
+        return result
+
+    index = neighbours.PointIndex.from_stops({stop: stops_dict[stop] for stop in reachable})
+    station_minutes = np.array(list(reachable.values()), dtype="float64")
+    reach_km = walking_speed_kmh * max_minutes / 60
+
+    lat = np.asarray(lat, dtype="float64")
+    lng = np.asarray(lng, dtype="float64")
+    for start in range(0, len(lat), block_size):
+        block = slice(start, start + block_size)
+        near = index.within(distance.Coordinates(lat[block], lng[block]), reach_km, block_size)
+        total = near.distances / walking_speed_kmh * 60 + station_minutes[near.indices]
+
+        # the smallest total of each point with stations in reach, empty segments dropped
+        found = np.diff(near.offsets) > 0
+        if found.any():
+            result[start:start + block_size][found] = np.minimum.reduceat(total, near.offsets[:-1][found])
+
+    result[result > max_minutes] = np.inf
+    return result
+
+
+def isochrones(minutes, thresholds):
+    """Return the ``Isochrones`` of the thresholds over the minutes of each property."""
+    thresholds = np.sort(np.asarray(thresholds, dtype="float64"))
+    order = np.argsort(minutes, kind="stable")
+    cutoffs = np.searchsorted(np.asarray(minutes)[order], thresholds, side="right")
+    return Isochrones(thresholds, order, cutoffs)
+
+
+def add_isochrones(prop_df, stops_dict, travel_times, thresholds, walking_speed_kmh=WALKING_SPEED_KMH):
+    """Add ``min_to_MC_walking`` and ``isochrone_min``, the smallest threshold in minutes the property is within.
+
+    Both are "not available" for properties beyond the longest threshold.
+    """
+    minutes = walking_minutes(prop_df["lat"], prop_df["lng"], travel_times, stops_dict, max(thresholds),
+                              walking_speed_kmh)
+    result = isochrones(minutes, thresholds)
+
+    walking = np.round(minutes, 1).astype(object)
+    walking[~np.isfinite(minutes)] = config.NOT_AVAILABLE
+
+    # the properties between consecutive cutoffs have that threshold as their smallest
+    isochrone = np.full(len(minutes), config.NOT_AVAILABLE, dtype=object)
+    for threshold, start, end in zip(result.thresholds, np.concatenate([[0], result.cutoffs[:-1]]), result.cutoffs):
+        isochrone[result.order[start:end]] = int(threshold)
+
+    prop_df["min_to_MC_walking"] = walking
+    prop_df["isochrone_min"] = isochrone
+    return prop_df
@@ -0,0 +1,128 @@
+"""Earliest arrival journeys with transfers, by the Connection Scan Algorithm.
+
+Every pair of consecutive stops of a trip in a ``timetable.Timetable`` is a
+connection. ``reverse_profile`` scans the connections once, latest departure
+first, and builds for every stop at the same time the Pareto profile of
+(departure, earliest arrival at the target) pairs. Changing trips at a stop
+takes ``CHANGE_SECONDS``. The feed has no transfers.txt, so there are no
+walking transfers between stops.
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+from . import config
+
+# minimum time to change trips at a stop
+CHANGE_SECONDS = 60
+
+# departures between 7am and 10am, as in enrich.melb_cen_time
+WINDOW = (7 * 3600, 10 * 3600)
+
+INFINITY = np.iinfo("int32").max
+
+
+def connections(timetable):
+    """Return the departure stop, arrival stop, departure and arrival times and trip of every connection.
+
+    The stops are dense stop indexes and the connections are in the order
+    of the flat timetable arrays.
+    """
+    trips = np.repeat(np.arange(len(timetable.trip_ids), dtype="int32"), np.diff(timetable.trip_offsets))
+    # a connection leaves every stop time except the last of its trip
+    departs = np.flatnonzero(trips[:-1] == trips[1:])
+    arrives = departs + 1
+
+    return (timetable.stops[departs], timetable.stops[arrives], timetable.departures[departs],
+            timetable.arrivals[arrives], trips[departs])
+
+
+class Profile:
+    def __init__(self, stop_ids, target, offsets, departures, arrivals):
+        self.stop_ids = stop_ids
+        self.target = target
+        self.offsets = offsets
+        self.departures = departures
+        self.arrivals = arrivals
+
+    def pairs(self, stop):
+        """Return the departures from the stop and the earliest arrivals at the target, by departure."""
+        index = np.searchsorted(self.stop_ids, stop)
+        if index == len(self.stop_ids) or self.stop_ids[index] != stop:
+            return self.departures[:0], self.arrivals[:0]
+
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.departures[start:end], self.arrivals[start:end]
+
+    def earliest_arrival(self, stop, time):
+        """Return the earliest arrival at the target leaving the stop from ``time``, None if there is none."""
+        departures, arrivals = self.pairs(stop)
+        index = np.searchsorted(departures, time)
+        return int(arrivals[index]) if index < len(departures) else None
+
+    def minutes(self, stop, window=WINDOW):
+        """Return the average journey time in minutes over the useful departures in ``window``.
+
+        Returns 0 for the target itself and "not available" if the target
+        cannot be reached from the stop in the window.
+        """
+        if stop == self.target:
+            return 0
+
+        departures, arrivals = self.pairs(stop)
+        keep = (departures >= window[0]) & (departures < window[1])
+
+        if not keep.any():
+            return config.NOT_AVAILABLE
+
+        return round(np.mean((arrivals[keep] - departures[keep]) / 60))
+
+
+def reverse_profile(timetable, target=config.MELBOURNE_CENTRAL, window=WINDOW, change_seconds=CHANGE_SECONDS):
+    """Return the ``Profile`` of every stop to ``target`` for departures from ``window[0]``."""
+    n_stops = len(timetable.stop_ids)
+    target_index = timetable.stop_index(target)
+    dep_stop, arr_stop, dep_time, arr_time, trip = connections(timetable)
+
+    keep = np.flatnonzero(dep_time >= window[0])
+    # latest departure first, and later connections of a trip first when the times are equal
+    order = keep[np.lexsort((-keep, -dep_time[keep].astype("int64")))]
+
+    # per stop, minus the departures (increasing) and the arrivals at the target (decreasing)
+    profile_departures = [[] for _ in range(n_stops)]
+    profile_arrivals = [[] for _ in range(n_stops)]
+    # earliest arrival at the target staying on each trip
+    trip_arrival = [INFINITY] * len(timetable.trip_ids)
+
+    for dep_s, arr_s, dep_t, arr_t, t in zip(dep_stop[order].tolist(), arr_stop[order].tolist(),
+                                             dep_time[order].tolist(), arr_time[order].tolist(),
+                                             trip[order].tolist()):
+        if arr_s == target_index:
+            arrival = arr_t
+        else:
+            # change trips at the arrival stop
+            departures = profile_departures[arr_s]
+            index = bisect_right(departures, -(arr_t + change_seconds)) - 1
+            arrival = profile_arrivals[arr_s][index] if index >= 0 else INFINITY
+
+        arrival = min(arrival, trip_arrival[t])
+        trip_arrival[t] = arrival
+
+        if arrival == INFINITY or dep_s == target_index:
+            continue
+
+        departures, arrivals = profile_departures[dep_s], profile_arrivals[dep_s]
+        if not arrivals or arrival < arrivals[-1]:
+            if departures and departures[-1] == -dep_t:
+                arrivals[-1] = arrival
+            else:
+                departures.append(-dep_t)
+                arrivals.append(arrival)
+
+    offsets = np.concatenate([[0], np.cumsum([len(arrivals) for arrivals in profile_arrivals])]).astype("int64")
+    # reversed so that each stop's pairs are by increasing departure
+    departures = np.array([-d for departures in profile_departures for d in reversed(departures)], dtype="int32")
+    arrivals = np.array([a for arrivals in profile_arrivals for a in reversed(arrivals)], dtype="int32")
+
+    return Profile(np.asarray(timetable.stop_ids), target, offsets, departures, arrivals)
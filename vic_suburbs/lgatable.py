@@ -0,0 +1,101 @@
+"""Extract the LGA to suburb table from the pdf in process.
+
+Each entry of the table reads ``LGA : ['Suburb', 'Suburb', ...]``. The text is
+extracted with pdfminer, the suburb lists are split with a regular
+expression instead of ``literal_eval``, and the parsed table is cached as
+json under the sha256 of the pdf, so later runs neither extract nor parse.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from . import config
+
+# one quoted suburb, single or double quoted as in a Python list repr
+SUBURB_PATTERN = re.compile(r"'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\"")
+ENTRY_PATTERN = re.compile(r"^\s*(.+?)\s+:\s+\[(.*)\]\s*$", re.S)
+# part of the name of the cached tables, bump it when parse_lga_text changes
+PARSER_VERSION = 2
+
+
+def pdf_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as infile:
+        for block in iter(lambda: infile.read(2 ** 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_suburb_list(text):
+    """Return the suburbs of the string of a list, e.g. "['Abbotsford', 'Airport West']"."""
+    return [single or double for single, double in SUBURB_PATTERN.findall(text)]
+
+
+def parse_lga_text(text):
+    """Map each LGA of the extracted text to its list of uppercased suburbs.
+
+    An entry may be wrapped over several lines, it ends at the closing bracket,
+    and wrapped lines are joined with a space. The lines right before an entry
+    are the start of a wrapped LGA name. Anything else, such as page footers
+    followed by a blank line, is skipped.
+    """
+    lga_dict = {}
+    entry = ""
+    name_lines = []
+
+    for line in text.splitlines():
+        line = line.strip()
+
+        if not entry and " : [" not in line:
+            # a blank line ends what could have been the start of a name
+            name_lines = name_lines + [line] if line else []
+            continue
+
+        entry = " ".join(name_lines + [line]) if not entry else f"{entry} {line}"
+        name_lines = []
+        if "]" not in line:
+            continue
+
+        match = ENTRY_PATTERN.match(entry)
+        if match:
+            # uppercase to match the suburb names of the shapefile
+            lga_dict[match.group(1)] = [suburb.upper() for suburb in parse_suburb_list(match.group(2))]
+        entry = ""
+
+    return lga_dict
+
+
+def extract_lga_dict(pdf_path):
+    from pdfminer.high_level import extract_text
+
+    return parse_lga_text(extract_text(str(pdf_path)))
+
+
+def load_lga_dict(pdf_path, cache_dir=config.CACHE_DIR):
+    """Return the LGA table of the pdf, from the cache when the same pdf was parsed before.
+
+    The pdf is parsed every time when ``cache_dir`` is None.
+    """
+    if cache_dir is None:
+        return extract_lga_dict(pdf_path)
+
+    cache_path = Path(cache_dir) / f"lga-v{PARSER_VERSION}-{pdf_sha256(pdf_path)}.json"
+
+    try:
+        with open(cache_path, "r") as infile:
+            return json.load(infile)
+    except FileNotFoundError:
+        pass
+
+    lga_dict = extract_lga_dict(pdf_path)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as outfile:
+        json.dump(lga_dict, outfile)
+    os.replace(tmp_path, cache_path)
+
+    return lga_dict
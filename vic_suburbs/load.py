@@ -0,0 +1,148 @@
+"""Load and parse the json and xml property files.
+
+``iter_properties`` streams both files in chunks for inputs larger than
+memory, see ``outofcore``.
+"""
+
+import json
+import re
+
+import pandas as pd
+
+from . import config, instrument
+
+# one pattern per xml tag
+XML_PATTERNS = {
+    "property_id": r"<property_id>(.*?)</property_id>",
+    "lat": r"<lat>(.*?)</lat>",
+    "lng": r"<lng>(.*?)</lng>",
+    "addr_street": r"<addr_street>(.*?)</addr_street>",
+}
+
+# characters read from a file at a time when streaming it
+READ_SIZE = 1 << 20
+
+
+def read_json(path):
+    """Read the json property file."""
+    return pd.read_json(path)
+
+
+def read_xml(path):
+    """Parse the xml property file with one regex per tag."""
+    with open(path, "r") as infile:
+        xml_text = infile.read()
+
+    xml_df = pd.DataFrame({column: re.findall(pattern, xml_text) for column, pattern in XML_PATTERNS.items()})
+
+    # match the column types of the json file
+    return xml_df.astype({"property_id": "int64", "lat": "float64", "lng": "float64"})
+
+
+def load_properties(data_dir=config.DATA_DIR):
+    """Concatenate both property files and drop rows that are exact duplicates.
+
+    ``lat`` and ``lng`` are rounded to seven decimal places to avoid rounding
+    discrepancies between the two sources.
+    """
+    with instrument.stage("read_json") as record:
+        json_df = read_json(f"{data_dir}/{config.JSON_FILE}")
+        record["rows"] = len(json_df)
+
+    with instrument.stage("read_xml") as record:
+        xml_df = read_xml(f"{data_dir}/{config.XML_FILE}")
+        record["rows"] = len(xml_df)
+
+    with instrument.stage("dedup") as record:
+        prop_df = pd.concat([json_df, xml_df], ignore_index=True)
+        prop_df["property_id"] = prop_df["property_id"].astype("object")
+        prop_df["lat"] = prop_df["lat"].round(7)
+        prop_df["lng"] = prop_df["lng"].round(7)
+
+        # identical street names exist in different suburbs, so only full duplicates are dropped
+        prop_df = prop_df.drop_duplicates()
+        record["rows"] = len(prop_df)
+
+    return prop_df
+
+
+def iter_json(path, chunk_size):
+    """Yield the records of the json property file in dataframes of up to ``chunk_size`` rows.
+
+    The file is a list of flat objects, decoded one at a time from a
+    buffer refilled as needed.
+    """
+    decoder = json.JSONDecoder()
+    records = []
+
+    with open(path, "r") as infile:
+        buffer, pos = "", 0
+
+        while True:
+            # skip the brackets and commas between records
+            while pos < len(buffer) and buffer[pos] in " \t\r\n[],":
+                pos += 1
+
+            try:
+                if pos == len(buffer):
+                    raise ValueError("buffer exhausted")
+                record, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                block = infile.read(READ_SIZE)
+                if not block:
+                    if pos < len(buffer):
+                        raise
+                    break
+                buffer, pos = buffer[pos:] + block, 0
+                continue
+
+            records.append(record)
+            if len(records) == chunk_size:
+                yield pd.DataFrame(records)
+                records = []
+
+    if records:
+        yield pd.DataFrame(records)
+
+
+def iter_xml(path, chunk_size):
+    """Same as ``read_xml`` yielding dataframes of up to ``chunk_size`` rows, reading the file in blocks."""
+    end_tag = "</property>"
+    columns = {column: [] for column in XML_PATTERNS}
+
+    def frame():
+        xml_df = pd.DataFrame({column: values[:chunk_size] for column, values in columns.items()})
+        for values in columns.values():
+            del values[:chunk_size]
+        return xml_df.astype({"property_id": "int64", "lat": "float64", "lng": "float64"})
+
+    with open(path, "r") as infile:
+        rest = ""
+
+        for block in iter(lambda: infile.read(READ_SIZE), ""):
+            text = rest + block
+            # only parse complete properties, the last one may be cut by the block
+            cut = text.rfind(end_tag) + len(end_tag) if end_tag in text else 0
+            text, rest = text[:cut], text[cut:]
+
+            for column, pattern in XML_PATTERNS.items():
+                columns[column].extend(re.findall(pattern, text))
+
+            while len(columns["property_id"]) >= chunk_size:
+                yield frame()
+
+    if columns["property_id"]:
+        yield frame()
+
+
+def iter_properties(data_dir=config.DATA_DIR, chunk_size=100_000):
+    """Yield the rows of both property files in chunks, prepared as in ``load_properties``.
+
+    Duplicates are not dropped here since they may be in different chunks.
+    """
+    for chunks in (iter_json(f"{data_dir}/{config.JSON_FILE}", chunk_size),
+                   iter_xml(f"{data_dir}/{config.XML_FILE}", chunk_size)):
+        for chunk in chunks:
+            chunk["lat"] = chunk["lat"].round(7)
+            chunk["lng"] = chunk["lng"].round(7)
+            yield chunk
@@ -0,0 +1,207 @@
+"""Normalisation/transformation of the COVID columns and the final linear model."""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from . import config
+
+# scipy, sklearn and statsmodels are slow to import, so each function imports what it uses
+
+# seed of every train/test split
+RANDOM_STATE = 111
+
+
+def covid_frame(prop_df):
+    """Return one row of COVID figures per LGA.
+
+    Rows without figures and rows where all the figures are zero are removed.
+    """
+    covid = prop_df[["lga", "30_sep_cases", "last_14_days_cases", "last_30_days_cases", "last_60_days_cases"]]
+    covid = covid[covid["30_sep_cases"] != config.NOT_AVAILABLE]
+    covid = covid.drop_duplicates("lga").drop(columns="lga").astype("int64")
+    covid = covid.loc[(covid != 0).any(axis=1)]
+
+    return covid.reset_index(drop=True)
+
+
+def calc_vif(X):
+    """Calculate the VIF of each column with one OLS regression per column."""
+    from statsmodels.stats.outliers_influence import variance_inflation_factor
+
+    vif = pd.DataFrame()
+    vif["variables"] = X.columns
+    vif["VIF"] = [variance_inflation_factor(X.values, i) for i in range(X.shape[1])]
+
+    return vif
+
+
+def calc_vif_fast(X, centered=True):
+    """Calculate all the VIFs at once from the inverse of the normalised cross-product matrix.
+
+    For each variable the diagonal element of the inverse equals 1 / (1 - R^2)
+    of regressing it on all the others. The pseudo-inverse is used when the
+    matrix is singular or badly conditioned.
+
+    With ``centered=True`` the columns are demeaned first, so the matrix is the
+    correlation matrix and the VIFs correspond to regressions with an
+    intercept, as ``calc_vif`` computes them with statsmodels 0.15 and later.
+    ``centered=False`` regresses without an intercept, matching earlier
+    statsmodels releases.
+    """
+    values = np.asarray(X, dtype="float64")
+
+    if centered:
+        values = values - values.mean(axis=0)
+
+    # normalise the cross-product matrix to have a unit diagonal
+    gram = values.T @ values
+    scale = np.sqrt(np.diag(gram))
+    constant = scale == 0
+    scale[constant] = 1
+    gram = gram / np.outer(scale, scale)
+
+    # invert, falling back to the pseudo-inverse for singular or near-singular matrices
+    if np.linalg.cond(gram) < 1 / np.finfo("float64").eps:
+        inverse = np.linalg.inv(gram)
+    else:
+        inverse = np.linalg.pinv(gram, hermitian=True)
+
+    vif_values = np.diag(inverse).copy()
+    # columns with no variation are perfectly collinear with the intercept
+    vif_values[constant] = np.inf
+
+    vif = pd.DataFrame()
+    vif["variables"] = X.columns
+    vif["VIF"] = vif_values
+
+    return vif
+
+
+class CovidModel:
+    """Linear model of ``30_sep_cases`` that keeps its fitted preprocessing.
+
+    The fitted scaler, the Box-Cox lambdas and the linear model are kept
+    together so that new LGA rows can be scored with a transform and predict
+    instead of refitting. The object can be saved to disk with ``save``.
+    """
+
+    features = ["last_14_days_cases", "last_30_days_cases", "last_60_days_cases"]
+    target = "30_sep_cases"
+    transforms = ["none", "sqrt", "log", "boxcox"]
+    scalers = {None: None, "standard": "StandardScaler", "minmax": "MinMaxScaler"}
+
+    def __init__(self, transform="log", scaler=None):
+        if transform not in self.transforms:
+            raise ValueError("transform must be one of " + ", ".join(self.transforms))
+        if scaler not in self.scalers:
+            raise ValueError("scaler must be one of None, 'standard', 'minmax'")
+
+        self.transform = transform
+        self.scaler = scaler
+        self.lambdas = {}
+        self.scale = None
+        self.lm = None
+
+    def _clip(self, values):
+        # the same adjustments as the experiments, so that every transformation is defined
+        if self.transform == "sqrt":
+            return np.where(values < 1, 0, values)
+        if self.transform in ("log", "boxcox"):
+            return np.where(values < 1, 1, values)
+        return values
+
+    def _forward(self, column, values):
+        from scipy import stats
+
+        values = self._clip(np.asarray(values, dtype="float64"))
+
+        if self.transform == "sqrt":
+            return np.sqrt(values)
+        if self.transform == "log":
+            return np.log(values)
+        if self.transform == "boxcox":
+            return stats.boxcox(values, lmbda=self.lambdas[column])
+        return values
+
+    def _inverse(self, values):
+        if self.transform == "sqrt":
+            return np.square(values)
+        if self.transform == "log":
+            return np.exp(values)
+        if self.transform == "boxcox":
+            from scipy.special import inv_boxcox
+
+            return inv_boxcox(values, self.lambdas[self.target])
+        return values
+
+    def fit(self, df):
+        from scipy import stats
+        from sklearn import preprocessing
+        from sklearn.linear_model import LinearRegression
+
+        if self.transform == "boxcox":
+            # keep the fitted lambda of each column instead of discarding it
+            for column in self.features + [self.target]:
+                _, self.lambdas[column] = stats.boxcox(self._clip(df[column].to_numpy(dtype="float64")))
+
+        X = np.column_stack([self._forward(column, df[column]) for column in self.features])
+        y = self._forward(self.target, df[self.target])
+
+        if self.scaler is not None:
+            self.scale = getattr(preprocessing, self.scalers[self.scaler])().fit(X)
+            X = self.scale.transform(X)
+
+        self.lm = LinearRegression().fit(X, y)
+        return self
+
+    def transform_features(self, df):
+        X = np.column_stack([self._forward(column, df[column]) for column in self.features])
+
+        if self.scale is not None:
+            X = self.scale.transform(X)
+
+        return X
+
+    def predict(self, df):
+        """Predict the cases of each row, on the original case scale."""
+        return self._inverse(self.lm.predict(self.transform_features(df)))
+
+    def score(self, df):
+        """Return the r-squared of the model on the transformed scale."""
+        return self.lm.score(self.transform_features(df), self._forward(self.target, df[self.target]))
+
+    def predict_batches(self, batches):
+        for batch in batches:
+            yield self.predict(batch)
+
+    def save(self, path):
+        with open(path, "wb") as outfile:
+            pickle.dump(self, outfile)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as infile:
+            return pickle.load(infile)
+
+
+def compare_models(covid):
+    """Return the test r-squared of every transformation and scaler combination."""
+    from sklearn.model_selection import train_test_split
+
+    train, test = train_test_split(covid, random_state=RANDOM_STATE)
+
+    scores = [{"transform": transform, "scaler": scaler,
+               "r_squared": CovidModel(transform, scaler).fit(train).score(test)}
+              for transform in CovidModel.transforms for scaler in CovidModel.scalers]
+
+    return pd.DataFrame(scores)
+
+
+def fit_final_model(covid, transform="log"):
+    """Fit the final, log transformed and not normalised, model on the training split."""
+    from sklearn.model_selection import train_test_split
+
+    train, _ = train_test_split(covid, random_state=RANDOM_STATE)
+    return CovidModel(transform).fit(train)
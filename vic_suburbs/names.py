@@ -0,0 +1,110 @@
+"""Normalised suburb name index joining shapefile localities to the LGA table.
+
+Names are reduced to a canonical key: uppercased, parenthetical qualifiers
+such as "(MELTON CITY)" removed, punctuation dropped, "SAINT" and "MOUNT"
+abbreviated to "ST" and "MT" and whitespace collapsed. Names whose key is not
+in the table fall back to the key sharing the most character trigrams, if it
+is similar enough. Every lookup is memoized, so each distinct suburb is
+resolved once.
+
+``match_lgas`` matches the names of the LGA boundary polygons, which carry
+their designation (e.g. "BAYSIDE CITY"), to the LGAs of the table.
+"""
+
+import re
+from collections import Counter
+
+from . import config
+
+ABBREVIATIONS = {"SAINT": "ST", "MOUNT": "MT"}
+
+# designations ending the LGA names of the boundary polygons, longest first
+LGA_DESIGNATIONS = ["RURAL CITY", "CITY", "SHIRE", "BOROUGH"]
+
+# minimum Jaccard similarity of the trigram sets for a near miss to match
+MIN_SIMILARITY = 0.6
+
+PARENTHESES = re.compile(r"\([^)]*\)")
+PUNCTUATION = re.compile(r"[^A-Z0-9 ]+")
+
+
+def canonical(name):
+    name = PARENTHESES.sub(" ", str(name).upper())
+    # hyphens separate words, apostrophes and full stops do not
+    name = PUNCTUATION.sub(lambda match: " " if "-" in match.group() else "", name)
+    return " ".join(ABBREVIATIONS.get(word, word) for word in name.split())
+
+
+def lga_key(name):
+    """Return the canonical key of an LGA name without its designation, e.g. "BAYSIDE" for "Bayside City"."""
+    key = canonical(name)
+    for designation in LGA_DESIGNATIONS:
+        if key.endswith(" " + designation):
+            return key[:-len(designation) - 1]
+    return key
+
+
+def match_lgas(polygon_names, lga_dict):
+    """Return the LGA of the table named by each polygon name, or the polygon name if none is."""
+    table = {}
+    for lga in lga_dict:
+        table.setdefault(lga_key(lga), lga)
+
+    return [table.get(lga_key(name), name) for name in polygon_names]
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    def __init__(self, lga_dict, min_similarity=MIN_SIMILARITY):
+        self.min_similarity = min_similarity
+        # the first LGA listing a suburb wins, as in enrich.find_lga
+        self.keys = {}
+        for lga, suburbs in lga_dict.items():
+            for suburb in suburbs:
+                self.keys.setdefault(canonical(suburb), lga)
+
+        self.key_trigrams = {key: trigrams(key) for key in self.keys}
+        self.postings = {}
+        for key, grams in self.key_trigrams.items():
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(key)
+
+        self.memo = {}
+
+    def closest_key(self, key):
+        """Return the indexed key with the most similar trigrams, or None if none is similar enough."""
+        grams = trigrams(key)
+        shared = Counter(indexed for gram in grams for indexed in self.postings.get(gram, ()))
+        best, best_similarity = None, 0.0
+
+        for indexed, count in shared.items():
+            # a missing word is a different suburb (BRIGHTON vs BRIGHTON EAST), only spelling is forgiven
+            if indexed.count(" ") != key.count(" "):
+                continue
+            similarity = count / (len(grams) + len(self.key_trigrams[indexed]) - count)
+            # ties go to the alphabetically first key, so the result does not depend on dict order
+            if similarity > best_similarity or (similarity == best_similarity and best is not None and indexed < best):
+                best, best_similarity = indexed, similarity
+
+        return best if best_similarity >= self.min_similarity else None
+
+    def lookup(self, suburb):
+        """Return the LGA of the suburb, "not available" if it cannot be matched."""
+        try:
+            return self.memo[suburb]
+        except KeyError:
+            pass
+
+        key = canonical(suburb)
+        if suburb == config.NOT_AVAILABLE:
+            key = None
+        elif key not in self.keys:
+            key = self.closest_key(key)
+
+        lga = self.keys[key] if key is not None else config.NOT_AVAILABLE
+        self.memo[suburb] = lga
+        return lga
@@ -0,0 +1,185 @@
+"""Batched k-nearest and radius queries over a grid index of points, such as the stations.
+
+``PointIndex`` sorts its points by the cell of a regular lat/lng grid they
+fall in, row after row, so the points of a run of cells along a grid row are
+one contiguous slice. A radius query takes the rows of cells spanned by the
+bounding box of each query's circle, computes the haversine distance to the
+points in them (``distance.pair_distances``) and keeps those within the
+radius. A k-nearest query runs radius queries, starting from the radius
+holding k points at the average density and doubling it for the queries
+that found fewer.
+
+Results are ``Neighbours`` in compressed sparse row form rather than a Python
+list per query: the neighbours of query i are
+``indices[offsets[i]:offsets[i + 1]]``, closest first, at ``distances`` km.
+Queries are processed ``block_size`` at a time so that the candidate pairs
+stay bounded whatever the number of queries. Queries with a NaN or infinite
+coordinate have no neighbours within any radius, and their k nearest are at
+index -1 and a NaN distance.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from . import distance
+
+Neighbours = namedtuple("Neighbours", ["offsets", "indices", "distances"])
+
+# about the spacing of the stations in the suburbs
+CELL_SIZE_KM = 1.0
+
+BLOCK_SIZE = 65536
+
+# a radius of half the circumference covers the whole earth
+MAX_RADIUS_KM = np.pi * distance.EARTH_RADIUS_KM
+
+
+def compress(queries, indices, distances, n_queries):
+    """Sort (query, index, distance) triples by query and distance into ``Neighbours``.
+
+    Equal distances keep the order of the triples, in which points at the
+    same coordinates, sharing a cell, are in index order.
+    """
+    order = np.argsort(distances, kind="stable")
+    # the stable sort of up to 65536 queries as uint16 is a radix sort
+    key = queries[order].astype("uint16") if n_queries <= 1 << 16 else queries[order]
+    order = order[np.argsort(key, kind="stable")]
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(queries, minlength=n_queries))]).astype("int64")
+    return Neighbours(offsets, indices[order].astype("int32"), distances[order])
+
+
+def concatenate(results):
+    """Join the ``Neighbours`` of consecutive blocks of queries."""
+    results = list(results)
+    ends = np.cumsum([0] + [result.offsets[-1] for result in results])
+    offsets = np.concatenate([result.offsets[:-1] + end for result, end in zip(results, ends)] + [ends[-1:]])
+
+    return Neighbours(offsets.astype("int64"),
+                      np.concatenate([result.indices for result in results] + [np.empty(0, "int32")]),
+                      np.concatenate([result.distances for result in results] + [np.empty(0)]))
+
+
+class PointIndex:
+    def __init__(self, points, ids=None, cell_size_km=CELL_SIZE_KM):
+        """Index ``points``, a ``distance.Coordinates``, optionally with the id of each point."""
+        points = points.astype("float64")
+        self.ids = ids
+        self.size = len(points)
+        self.cell_size = cell_size_km / distance.EARTH_RADIUS_KM
+
+        # cells and origin in radians, like the coordinates
+        self.origin = (points.lng.min(), points.lat.min()) if self.size else (0.0, 0.0)
+        ix = ((points.lng - self.origin[0]) // self.cell_size).astype("int64")
+        iy = ((points.lat - self.origin[1]) // self.cell_size).astype("int64")
+        self.shape = (int(ix.max()) + 1, int(iy.max()) + 1) if self.size else (1, 1)
+
+        # area of the grid in km2, for the first radius of k-nearest queries
+        self.area = (self.shape[0] * self.shape[1] * (cell_size_km ** 2)
+                     * (np.cos(points.lat).mean() if self.size else 1.0))
+
+        cells = iy * self.shape[0] + ix
+        self.order = np.argsort(cells, kind="stable")
+        self.points = points.take(self.order)
+        n_cells = self.shape[0] * self.shape[1]
+        self.cell_offsets = np.concatenate([[0], np.cumsum(np.bincount(cells, minlength=n_cells))])
+
+    @classmethod
+    def from_stops(cls, stops_dict, cell_size_km=CELL_SIZE_KM):
+        """Index the stops of a ``{stop_id: (lat, lng)}`` dictionary, with their ids."""
+        coords = np.array(list(stops_dict.values()), dtype="float64").reshape(-1, 2)
+        return cls(distance.Coordinates(coords[:, 0], coords[:, 1]), np.array(list(stops_dict), dtype="int64"),
+                   cell_size_km)
+
+    def __len__(self):
+        return self.size
+
+    def first_radius(self, k):
+        """Return the radius in km of a circle holding ``k`` points at the average density, at least one cell."""
+        cell_km = self.cell_size * distance.EARTH_RADIUS_KM
+        return max(cell_km, np.sqrt(k * self.area / (np.pi * max(self.size, 1))))
+
+    def candidates(self, points, radius_km):
+        """Return the (query, sorted position) pairs of the points in the cells around each query's circle.
+
+        Queries with a non-finite coordinate have none.
+        """
+        finite = np.isfinite(points.lat) & np.isfinite(points.lng)
+        lat = np.where(finite, points.lat, 0.0)
+        lng = np.where(finite, points.lng, 0.0)
+        dlat = np.minimum(radius_km, MAX_RADIUS_KM) / distance.EARTH_RADIUS_KM
+        # the circle spans asin(sin r / cos lat) of longitude, every longitude if it covers a pole
+        ratio = np.sin(np.minimum(dlat, np.pi / 2)) / np.maximum(np.cos(lat), 1e-12)
+        dlng = np.where(ratio < 1, np.arcsin(np.minimum(ratio, 1)), np.pi)
+
+        nx, ny = self.shape
+        ix0 = np.maximum((lng - dlng - self.origin[0]) // self.cell_size, 0).astype("int64")
+        ix1 = np.minimum((lng + dlng - self.origin[0]) // self.cell_size, nx - 1).astype("int64")
+        iy0 = np.maximum((lat - dlat - self.origin[1]) // self.cell_size, 0).astype("int64")
+        iy1 = np.minimum((lat + dlat - self.origin[1]) // self.cell_size, ny - 1).astype("int64")
+        # a circle across the antimeridian takes every column
+        wraps = (lng - dlng < -np.pi) | (lng + dlng > np.pi)
+        ix0 = np.where(wraps, 0, ix0)
+        ix1 = np.where(wraps, nx - 1, ix1)
+        rows = np.where(finite & (ix0 <= ix1), np.maximum(iy1 - iy0 + 1, 0), 0)
+
+        # one contiguous slice of points per (query, grid row)
+        row_queries = np.repeat(np.arange(len(points)), rows)
+        iy = iy0[row_queries] + np.arange(rows.sum()) - np.repeat(np.cumsum(rows) - rows, rows)
+        starts = self.cell_offsets[iy * nx + ix0[row_queries]]
+        counts = self.cell_offsets[iy * nx + ix1[row_queries] + 1] - starts
+
+        position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(row_queries, counts), np.repeat(starts, counts) + position
+
+    def _within(self, points, radius_km):
+        queries, positions = self.candidates(points, radius_km)
+        dist = distance.pair_distances(points.take(queries), self.points.take(positions))
+        keep = dist <= np.broadcast_to(radius_km, len(points))[queries]
+        return queries[keep], self.order[positions[keep]], dist[keep]
+
+    def within(self, points, radius_km, block_size=BLOCK_SIZE):
+        """Return the ``Neighbours`` of each query point up to ``radius_km`` km away."""
+        blocks = []
+        for start in range(0, len(points), block_size):
+            block = points.take(slice(start, start + block_size))
+            blocks.append(compress(*self._within(block, radius_km), len(block)))
+
+        return concatenate(blocks)
+
+    def nearest(self, points, k, block_size=BLOCK_SIZE):
+        """Return the ``Neighbours`` of each query point made of its ``k`` closest points.
+
+        Queries get fewer than ``k`` only when there are fewer points. Those
+        with a non-finite coordinate get as many at index -1 and a NaN distance.
+        """
+        want = min(k, self.size)
+        blocks = []
+
+        for start in range(0, len(points), block_size):
+            block = points.take(slice(start, start + block_size))
+            valid = np.isfinite(block.lat) & np.isfinite(block.lng)
+            invalid = np.repeat(np.flatnonzero(~valid), want)
+            found = [(invalid, np.full(len(invalid), -1), np.full(len(invalid), np.nan))]
+
+            pending = np.flatnonzero(valid)
+            radius = np.full(len(block), self.first_radius(want))
+
+            while len(pending):
+                queries, indices, dist = self._within(block.take(pending), radius[pending])
+                # every point is within the largest radius, stop there whatever rounding left out
+                done = (np.bincount(queries, minlength=len(pending)) >= want) | (radius[pending] >= MAX_RADIUS_KM)
+
+                keep = done[queries]
+                found.append((pending[queries[keep]], indices[keep], dist[keep]))
+                pending = pending[~done]
+                radius[pending] = np.minimum(radius[pending] * 2, MAX_RADIUS_KM)
+
+            result = compress(*(np.concatenate(part) for part in zip(*found)), len(block))
+            # keep the first k of each query
+            counts = np.diff(result.offsets)
+            first = np.arange(len(result.indices)) - np.repeat(result.offsets[:-1], counts) < k
+            offsets = np.concatenate([[0], np.cumsum(np.minimum(counts, k))]).astype("int64")
+            blocks.append(Neighbours(offsets, result.indices[first], result.distances[first]))
+
+        return concatenate(blocks)
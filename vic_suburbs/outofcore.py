@@ -0,0 +1,81 @@
+"""Out-of-core enrichment of property files larger than memory.
+
+The property files are streamed in chunks (see ``load.iter_properties``),
+each chunk goes through every enrichment stage with a ``point.PointEnricher``
+and is appended to a Parquet dataset partitioned by LGA, so memory stays flat
+whatever the size of the input. With several workers the chunks are enriched
+in processes attached to the reference data in shared memory.
+
+Exact duplicates, which may fall in different chunks, are dropped at the end
+one LGA partition at a time.
+"""
+
+from . import config, instrument, load, output, poi, point, scrape, shared
+
+CHUNK_SIZE = 200_000
+
+
+def enrich_chunk(enricher, chunk):
+    """Add the columns of ``point.FIELDS`` to a chunk of properties."""
+    return chunk.assign(**enricher.enrich(chunk["lat"].to_numpy(), chunk["lng"].to_numpy()))
+
+
+def _enrich_in_worker(chunk):
+    return enrich_chunk(point.worker_enricher(), chunk)
+
+
+def enrich_chunks(enricher, chunks, workers=1):
+    """Yield the enriched chunks in order, enriched by ``workers`` processes if more than one."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield enrich_chunk(enricher, chunk)
+        return
+
+    reference, descriptor = enricher.share()
+    with reference:
+        yield from shared.map_chunks(_enrich_in_worker, chunks, descriptor, workers)
+
+
+def run(output_dir, data_dir=config.DATA_DIR, chunk_size=CHUNK_SIZE, covid_date=None, workers=1, dedup=True,
+        row_group_size=output.ROW_GROUP_SIZE, poi_layers=(), **reference):
+    """Enrich the property files of ``data_dir`` into the Parquet dataset ``output_dir`` and return its rows.
+
+    The COVID columns are added when ``covid_date`` is given, scraped once
+    for every LGA of the table. ``reference`` is passed on to
+    ``point.PointEnricher.from_pipeline``, e.g. ``lga_text`` or ``transfers``.
+    The closest point of each of the ``poi_layers`` files is added to each chunk.
+    """
+    # before any work, a directory that is not a previous dataset is refused
+    output.clear(output_dir)
+
+    with instrument.stage("reference"):
+        enricher = point.PointEnricher.from_pipeline(data_dir, **reference)
+
+    with instrument.stage("layers"):
+        layers = poi.read_layers(poi_layers)
+
+    cases_dict = None
+    if covid_date is not None:
+        with instrument.stage("covid_cases") as record:
+            cases_dict = scrape.scrape_cases(list(enricher.lga_dict), covid_date)
+            record["rows"] = len(cases_dict)
+
+    rows = 0
+
+    chunks = load.iter_properties(data_dir, chunk_size)
+    for part, chunk in enumerate(enrich_chunks(enricher, chunks, workers)):
+        with instrument.stage("write_chunk") as record:
+            if layers:
+                chunk = poi.add_nearest(chunk, layers)
+            if cases_dict is not None:
+                chunk = scrape.add_covid_cases(chunk, cases_dict)
+            output.append_partitioned(chunk, output_dir, part, row_group_size=row_group_size)
+            record["rows"] = len(chunk)
+            rows += len(chunk)
+
+    if dedup:
+        with instrument.stage("dedup") as record:
+            rows = output.compact_partitions(output_dir, row_group_size)
+            record["rows"] = rows
+
+    return rows
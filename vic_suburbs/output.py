@@ -0,0 +1,234 @@
+"""Typed output of the enriched property dataframe.
+
+The pipeline marks every value it could not derive with the "not available"
+string, which leaves numeric columns as mixed objects. ``typed`` turns those
+into missing values of pandas nullable dtypes, so the columns keep their
+types in columnar formats.
+
+``write`` picks the format from the file suffix: Parquet and Feather files
+are written from the typed columns in row groups of ``row_group_size`` rows,
+csv files with pyarrow's writer, byte for byte the file of
+``DataFrame.to_csv``.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import config, scrape
+
+DTYPES = {
+    "property_id": "Int64",
+    "lat": "float64",
+    "lng": "float64",
+    "addr_street": "string",
+    "suburb": "string",
+    "lga": "string",
+    "closest_train_station_id": "Int64",
+    "distance_to_closest_train_station": "Float64",
+    "travel_min_to_MC": "Int64",
+    "direct_journey_flag": "Int8",
+    "min_to_MC_walking": "Float64",
+    "isochrone_min": "Int64",
+    **{column: "Int64" for column, _ in scrape.COVID_COLUMNS},
+}
+
+# rows per Parquet row group or Feather record batch
+ROW_GROUP_SIZE = 128 * 1024
+
+FORMATS = {".parquet": "parquet", ".feather": "feather", ".arrow": "feather", ".csv": "csv"}
+
+# file marking a partitioned dataset written by ``append_partitioned``, readers skip names starting with "_"
+DATASET_MARKER = "_vic_suburbs_dataset"
+
+
+def typed(prop_df):
+    """Return the dataframe with "not available" as missing values and the ``DTYPES`` of its columns."""
+    prop_df = prop_df.replace(config.NOT_AVAILABLE, pd.NA)
+    return prop_df.astype({column: dtype for column, dtype in DTYPES.items() if column in prop_df})
+
+
+def to_table(prop_df):
+    import pyarrow as pa
+
+    return pa.Table.from_pandas(typed(prop_df), preserve_index=False)
+
+
+def original_kind(column):
+    """Return the ``pd.api.types.infer_dtype`` of the values of a column other than "not available"."""
+    if column.dtype == object:
+        column = column[column != config.NOT_AVAILABLE]
+    return pd.api.types.infer_dtype(column, skipna=False)
+
+
+def csv_table(prop_df):
+    """Return the table of the rows ``DataFrame.to_csv`` writes, when pyarrow writes them alike unquoted.
+
+    Integers stay typed and missing values are nulls, written as "not
+    available". Floats are rendered as text, with the ".0" pandas keeps on
+    whole floats. Returns None when pandas would write something else:
+    other missing values, text that needs quotes, floats it prints in another
+    notation, values that ``typed`` converts (e.g. ``True`` to 1) or columns
+    of other types.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    # only "not available" is written for a missing value, pandas writes NaN and None as ""
+    if prop_df.isna().to_numpy().any():
+        return None
+
+    table = to_table(prop_df)
+    columns = []
+
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_integer(column.type):
+            if original_kind(prop_df[name]) != "integer":
+                return None
+            columns.append(column)
+        elif pa.types.is_floating(column.type):
+            if original_kind(prop_df[name]) != "floating":
+                return None
+            size = np.abs(column.to_numpy())
+            # both print floats the shortest way, but switch to exponents at other powers of ten
+            if ((size != 0) & ((size < 1e-4) | (size >= 1e15))).any():
+                return None
+            text = pc.cast(column, pa.string())
+            # pandas writes whole floats as "145.0" where arrow writes "145"
+            columns.append(pc.if_else(pc.match_substring_regex(text, r"^-?\d+$"),
+                                      pc.binary_join_element_wise(text, ".0", ""), text))
+        elif pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            if pc.any(pc.match_substring_regex(column, '[",\r\n]')).as_py():
+                return None
+            columns.append(column)
+        else:
+            return None
+
+    return pa.table(columns, names=table.column_names)
+
+
+def write_parquet(prop_df, path, row_group_size=ROW_GROUP_SIZE, compression="zstd"):
+    import pyarrow.parquet as pq
+
+    pq.write_table(to_table(prop_df), path, row_group_size=row_group_size, compression=compression)
+
+
+def write_feather(prop_df, path, row_group_size=ROW_GROUP_SIZE, compression="zstd"):
+    import pyarrow.feather as feather
+
+    feather.write_feather(to_table(prop_df), path, chunksize=row_group_size, compression=compression)
+
+
+def write_csv(prop_df, path, row_group_size=ROW_GROUP_SIZE):
+    """Write the same file as ``prop_df.to_csv(path, index=False)``.
+
+    pandas writes the header and, when ``csv_table`` is None, the rows too.
+    """
+    import pyarrow.csv as pcsv
+
+    table = csv_table(prop_df)
+    if table is None:
+        prop_df.to_csv(path, index=False)
+        return
+
+    prop_df.head(0).to_csv(path, index=False)
+    with open(path, "ab") as outfile:
+        pcsv.write_csv(table, outfile, pcsv.WriteOptions(include_header=False, batch_size=row_group_size,
+                                                         eol=os.linesep, null_string=config.NOT_AVAILABLE,
+                                                         quoting_style="none"))
+
+
+WRITERS = {"parquet": write_parquet, "feather": write_feather, "csv": write_csv}
+
+
+def write(prop_df, path, row_group_size=ROW_GROUP_SIZE):
+    """Write the dataframe in the format of the suffix of ``path``."""
+    suffix = Path(path).suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"unknown output format {suffix!r}, use one of {sorted(FORMATS)}")
+
+    WRITERS[FORMATS[suffix]](prop_df, path, row_group_size=row_group_size)
+
+
+def append_partitioned(prop_df, directory, part, partition_col="lga", row_group_size=ROW_GROUP_SIZE):
+    """Write a chunk to the Parquet dataset in ``directory``, one file per value of ``partition_col``.
+
+    Files are named after ``part``, so each chunk adds files next to those
+    of the previous ones.
+    """
+    import pyarrow.parquet as pq
+
+    pq.write_to_dataset(to_table(prop_df), directory, partition_cols=[partition_col],
+                        basename_template=f"part-{part:05d}-{{i}}.parquet",
+                        existing_data_behavior="overwrite_or_ignore", max_rows_per_group=row_group_size,
+                        min_rows_per_group=min(row_group_size, len(prop_df)) if len(prop_df) else 0)
+
+
+def compact_partitions(directory, row_group_size=ROW_GROUP_SIZE):
+    """Rewrite each partition of the dataset in ``directory`` as one file without duplicate rows.
+
+    Identical rows share their LGA, so the duplicates of the whole dataset
+    are dropped one partition at a time. The partition is streamed in
+    batches of ``row_group_size`` rows, keeping only a sorted array of the
+    64-bit hashes of the rows already written, so memory does not grow with
+    the size of the partition's rows. Returns the number of rows left.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = 0
+    for partition in sorted(Path(directory).iterdir()):
+        if not partition.is_dir():
+            continue
+
+        files = sorted(partition.glob("*.parquet"))
+        # the LGA is in the directory name, not in the files
+        schema = pq.ParquetFile(files[0]).schema_arrow
+        seen = np.empty(0, dtype="uint64")
+
+        # write next to the parts before removing them, so an interrupted compaction loses nothing
+        tmp_path = partition / "compacted.tmp"
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for path in files:
+                for batch in pq.ParquetFile(path).iter_batches(batch_size=row_group_size):
+                    keys = pd.util.hash_pandas_object(batch.to_pandas(), index=False).to_numpy()
+
+                    # the first of each row within the batch, then only those not written before
+                    keys, first = np.unique(keys, return_index=True)
+                    position = np.minimum(np.searchsorted(seen, keys), max(len(seen) - 1, 0))
+                    new = seen[position] != keys if len(seen) else np.ones(len(keys), dtype=bool)
+                    keep = np.sort(first[new])
+
+                    writer.write_table(pa.Table.from_batches([batch.take(keep)]).cast(schema),
+                                       row_group_size=row_group_size)
+                    # both are sorted, so the new keys are inserted in place
+                    seen = np.insert(seen, np.searchsorted(seen, keys[new]), keys[new])
+                    rows += len(keep)
+
+        compacted = partition / "compacted.parquet"
+        os.replace(tmp_path, compacted)
+        for path in files:
+            if path != compacted:
+                os.remove(path)
+
+    return rows
+
+
+def clear(directory):
+    """Remove a previous dataset in ``directory`` and mark it as a new one, chunks are appended to whatever is there.
+
+    A non-empty directory without the ``DATASET_MARKER`` of a previous
+    dataset is not ours to delete, it raises ValueError.
+    """
+    directory = Path(directory)
+    if directory.is_dir() and any(directory.iterdir()):
+        if not (directory / DATASET_MARKER).exists():
+            raise ValueError(f"{directory} is not empty and was not written by --out-of-core, "
+                             f"choose a new or empty directory")
+        shutil.rmtree(directory)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / DATASET_MARKER).touch()
@@ -0,0 +1,166 @@
+"""Run the stages of the pipeline, without any exploratory display.
+
+The stages form a DAG (see ``dag``), so reference data is loaded
+concurrently and only the stages whose parameters or files changed are rerun
+when a cache is used. The enrichment stages copy the dataframe they are given
+because their inputs may be cached or read by other stages at the same time.
+"""
+
+from pathlib import Path
+
+from . import (cellgrid, config, dag, enrich, feeds, instrument, lgatable, load, model, names, poi, polystore,
+               regions, scrape)
+# aliased, the isochrones stage takes an ``isochrones`` parameter
+from . import isochrones as iso
+
+
+def _suburb_store(data_dir, suburb_store):
+    store = polystore.load_or_compile(f"{data_dir}/{config.SUBURB_SHAPEFILE}", suburb_store)
+    return cellgrid.load_or_build(store, f"{suburb_store}/grid")
+
+
+def _lga_dict(data_dir, lga_text, cache_dir):
+    if lga_text is not None:
+        return enrich.read_lga_dict(lga_text)
+    return lgatable.load_lga_dict(f"{data_dir}/{config.LGA_PDF}", cache_dir)
+
+
+def _regions(grid, lga_dict, data_dir, lga_store):
+    if lga_store is None:
+        return None
+    return regions.load_or_compile(f"{data_dir}/{config.LGA_SHAPEFILE}", lga_store, grid, lga_dict)
+
+
+def _feeds(data_dir, gtfs_feeds, travel_date, cache_dir):
+    store = None if cache_dir is None else Path(cache_dir) / config.FEED_STORE.name
+    return feeds.load_feeds(data_dir, gtfs_feeds, travel_date, store)
+
+
+def _suburbs(prop_df, store, region_index):
+    if region_index is not None:
+        return enrich.add_regions(prop_df.copy(), region_index)
+    return enrich.add_suburbs_from_store(prop_df.copy(), store)
+
+
+def _lga(prop_df, lga_index, region_index):
+    if region_index is not None:
+        # located along with the suburbs, the suburbs outside every LGA polygon are looked up by name
+        return enrich.fill_lga_indexed(prop_df.copy(), lga_index)
+    return enrich.add_lga_indexed(prop_df.copy(), lga_index)
+
+
+def _stations(prop_df, stops_dict, layers):
+    return poi.add_nearest(prop_df.copy(), [poi.Layer.from_stops(stops_dict)] + layers)
+
+
+def _travel(prop_df, compiled, transfers):
+    if transfers:
+        return enrich.add_travel_time_transfers(prop_df.copy(), compiled)
+    return enrich.add_travel_time_compiled(prop_df.copy(), compiled)
+
+
+def _isochrones(prop_df, stops_dict, compiled, transfers, isochrones, walking_speed):
+    if not isochrones:
+        return prop_df
+
+    travel_times = enrich.station_travel_times(stops_dict, compiled, transfers)
+    return iso.add_isochrones(prop_df.copy(), stops_dict, travel_times, isochrones, walking_speed)
+
+
+def _covid_cases(prop_df, covid_date):
+    return scrape.scrape_cases(prop_df["lga"].unique(), covid_date)
+
+
+def _covid(prop_df, cases_dict):
+    return scrape.add_covid_cases(prop_df.copy(), cases_dict)
+
+
+STAGES = [
+    dag.Stage("properties", load.load_properties, params=["data_dir"],
+              files=["{data_dir}/" + config.JSON_FILE, "{data_dir}/" + config.XML_FILE]),
+    dag.Stage("suburb_store", _suburb_store, params=["data_dir", "suburb_store"], version=2,
+              files=["{data_dir}/" + config.SUBURB_SHAPEFILE + ext for ext in (".shp", ".dbf")]),
+    dag.Stage("lga_dict", _lga_dict, params=["data_dir", "lga_text", "cache_dir"],
+              files=["{data_dir}/" + config.LGA_PDF, "{lga_text}"], version=3),
+    dag.Stage("regions", _regions, inputs=["suburb_store", "lga_dict"], params=["data_dir", "lga_store"],
+              files=["{data_dir}/" + config.LGA_SHAPEFILE + ext for ext in (".shp", ".dbf")]),
+    dag.Stage("feeds", _feeds, params=["data_dir", "gtfs_feeds", "travel_date", "cache_dir"], files=[feeds.feed_files],
+              version=2),
+    dag.Stage("layers", poi.read_layers, params=["poi_layers"], files=[poi.layer_files]),
+    dag.Stage("stops", lambda loaded: loaded.stops, inputs=["feeds"], version=2),
+    dag.Stage("timetable", lambda loaded: loaded.timetable, inputs=["feeds"]),
+    dag.Stage("suburbs", _suburbs, inputs=["properties", "suburb_store", "regions"], version=2),
+    dag.Stage("lga_index", names.NameIndex, inputs=["lga_dict"]),
+    dag.Stage("lga", _lga, inputs=["suburbs", "lga_index", "regions"], version=3),
+    dag.Stage("stations", _stations, inputs=["lga", "stops", "layers"], version=2),
+    dag.Stage("travel", _travel, inputs=["stations", "timetable"], params=["transfers"], version=2),
+    dag.Stage("covid_cases", _covid_cases, inputs=["lga"], params=["covid_date"]),
+    dag.Stage("isochrones", _isochrones, inputs=["travel", "stops", "timetable"],
+              params=["transfers", "isochrones", "walking_speed"]),
+    dag.Stage("covid", _covid, inputs=["isochrones", "covid_cases"]),
+]
+
+PIPELINE = dag.DAG(STAGES)
+
+# the parameters read by the stages, ``run`` and ``point.PointEnricher.from_pipeline`` replace some of them
+DEFAULT_PARAMS = {"data_dir": config.DATA_DIR, "lga_text": None, "cache_dir": None, "covid_date": config.COVID_DATE,
+                  "suburb_store": config.SUBURB_STORE, "transfers": False, "travel_date": None,
+                  "gtfs_feeds": list(config.GTFS_FEEDS), "lga_store": None, "poi_layers": [], "isochrones": [],
+                  "walking_speed": iso.WALKING_SPEED_KMH}
+
+
+def run_params(**params):
+    """Return ``DEFAULT_PARAMS`` with ``params`` replaced."""
+    unknown = sorted(set(params) - set(DEFAULT_PARAMS))
+    if unknown:
+        raise TypeError(f"unknown pipeline parameters {unknown}")
+
+    return {**DEFAULT_PARAMS, **params}
+
+
+def run(data_dir=config.DATA_DIR, lga_text=None, covid_date=config.COVID_DATE, covid=True,
+        cache_dir=None, workers=4, suburb_store=config.SUBURB_STORE, transfers=False,
+        travel_date=None, gtfs_feeds=config.GTFS_FEEDS, lga_store=None, poi_layers=(),
+        isochrone_minutes=(), walking_speed=iso.WALKING_SPEED_KMH):
+    """Build the property dataframe with every integrated column.
+
+    The COVID columns need network access, they are skipped when ``covid`` is
+    False. Stage results are cached in ``cache_dir`` when it is given, e.g.
+    changing only ``covid_date`` then reruns only the COVID stages, and so is
+    the LGA table parsed from the pdf. The
+    locality shapefile is compiled once into ``suburb_store``, along with the
+    grid of cells used to locate the properties. The LGA table is read from
+    the pdf unless a converted ``lga_text`` file is given. With ``transfers``
+    the travel times include journeys changing trains, see ``journeys``. They
+    are for the trips running on every weekday, or on ``travel_date`` if given.
+    Stations and trips come from the ``gtfs_feeds`` selected, see ``feeds``.
+    With an ``lga_store`` directory the LGA shapefile is compiled there and
+    the LGAs are located from their polygons along with the suburbs, see
+    ``regions``, rather than looked up by suburb name, except for the
+    properties outside every LGA polygon. The closest point of
+    each of the ``poi_layers`` files is added along with the closest station,
+    see ``poi``. With ``isochrone_minutes`` each property gets its time to
+    Melbourne Central walking ``walking_speed`` km/h to a station, and the
+    smallest of these thresholds it is within, see ``isochrones``.
+    """
+    params = run_params(data_dir=data_dir, lga_text=lga_text, cache_dir=cache_dir, covid_date=covid_date,
+                        suburb_store=suburb_store, transfers=transfers, travel_date=travel_date,
+                        gtfs_feeds=list(gtfs_feeds), lga_store=lga_store, poi_layers=list(poi_layers),
+                        isochrones=list(isochrone_minutes), walking_speed=walking_speed)
+    target = "covid" if covid else "isochrones"
+    cache = dag.DiskCache(cache_dir) if cache_dir is not None else None
+
+    return PIPELINE.run(params, [target], cache, workers)[target]
+
+
+def run_model(prop_df, model_path=None):
+    """Fit the final COVID model, optionally saving it to ``model_path``."""
+    with instrument.stage("model") as record:
+        covid = model.covid_frame(prop_df)
+        final_model = model.fit_final_model(covid)
+        record["rows"] = len(covid)
+
+    if model_path is not None:
+        final_model.save(model_path)
+
+    return final_model
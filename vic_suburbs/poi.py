@@ -0,0 +1,148 @@
+"""Closest point of interest of each property, over any number of point layers.
+
+A ``Layer`` is a named set of points, such as schools, hospitals or parks,
+read from a csv file with latitude and longitude columns or from a GeoJSON
+file of Point features, and indexed with a ``neighbours.PointIndex``. The
+stations are the layer named "train_station" (``Layer.from_stops``).
+
+``add_nearest`` makes a single pass over the properties: each block of
+coordinates is converted to radians once and queried against every layer,
+adding ``closest_<name>_id`` and ``distance_to_closest_<name>`` (haversine km,
+3 decimals) for each layer, e.g. ``closest_train_station_id``. Both are "not
+available" for properties without finite coordinates.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import config, distance, neighbours
+
+# column names recognised in csv layers, compared in lower case
+LAT_COLUMNS = ["lat", "latitude", "stop_lat", "y"]
+LNG_COLUMNS = ["lng", "lon", "long", "longitude", "stop_lon", "x"]
+ID_COLUMNS = ["id", "stop_id", "name"]
+
+
+def layer_files(poi_layers, **params):
+    """Return the files of the selected layers, the DAG fingerprints them."""
+    return [str(path) for path in poi_layers]
+
+
+def read_layers(poi_layers):
+    """Read the layer of each file, ``poi_layers`` is the parameter of the layers stage."""
+    return [Layer.read(path) for path in poi_layers]
+
+
+def find_column(columns, names, path):
+    lower = {str(column).lower(): column for column in columns}
+    for name in names:
+        if name in lower:
+            return lower[name]
+
+    raise ValueError(f"{path} has none of the columns {names}")
+
+
+def read_csv_points(path):
+    """Return the ids, latitudes and longitudes of a csv layer, ids are row numbers without an id column."""
+    points = pd.read_csv(path)
+    lat = points[find_column(points.columns, LAT_COLUMNS, path)].to_numpy(dtype="float64")
+    lng = points[find_column(points.columns, LNG_COLUMNS, path)].to_numpy(dtype="float64")
+
+    try:
+        ids = points[find_column(points.columns, ID_COLUMNS, path)].to_numpy()
+    except ValueError:
+        ids = np.arange(len(points))
+
+    return ids, lat, lng
+
+
+def read_geojson_points(path):
+    """Return the ids, latitudes and longitudes of the Point features of a GeoJSON file.
+
+    The id of a feature is its "id", or the "id" or "name" of its properties,
+    or else its position.
+    """
+    with open(path, "r") as infile:
+        features = json.load(infile)["features"]
+
+    ids, lat, lng = [], [], []
+    for position, feature in enumerate(features):
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") != "Point":
+            raise ValueError(f"feature {position} of {path} is not a Point")
+
+        properties = feature.get("properties") or {}
+        ids.append(next((value for value in (feature.get("id"), properties.get("id"), properties.get("name"))
+                         if value is not None), position))
+        lng.append(geometry["coordinates"][0])
+        lat.append(geometry["coordinates"][1])
+
+    return np.array(ids), np.array(lat, dtype="float64"), np.array(lng, dtype="float64")
+
+
+class Layer:
+    def __init__(self, name, ids, lat, lng):
+        if len(ids) == 0:
+            raise ValueError(f"layer {name} has no points")
+
+        self.name = name
+        self.index = neighbours.PointIndex(distance.Coordinates(lat, lng), np.asarray(ids))
+
+    @property
+    def id_column(self):
+        return f"closest_{self.name}_id"
+
+    @property
+    def distance_column(self):
+        return f"distance_to_closest_{self.name}"
+
+    @classmethod
+    def read(cls, path, name=None):
+        """Read a csv or GeoJSON layer, named after the file unless ``name`` is given."""
+        path = Path(path)
+        if path.suffix.lower() in (".geojson", ".json"):
+            points = read_geojson_points(path)
+        else:
+            points = read_csv_points(path)
+
+        return cls(name or path.stem, *points)
+
+    @classmethod
+    def from_stops(cls, stops_dict, name="train_station"):
+        coords = np.array(list(stops_dict.values()), dtype="float64").reshape(-1, 2)
+        return cls(name, np.array(list(stops_dict), dtype="int64"), coords[:, 0], coords[:, 1])
+
+
+def add_nearest(prop_df, layers, block_size=neighbours.BLOCK_SIZE):
+    """Add the closest point of every layer and the distance to it, in one pass over the properties."""
+    lat = prop_df["lat"].to_numpy(dtype="float64")
+    lng = prop_df["lng"].to_numpy(dtype="float64")
+    ids = {layer.name: np.empty(len(prop_df), dtype=layer.index.ids.dtype) for layer in layers}
+    distances = {layer.name: np.empty(len(prop_df)) for layer in layers}
+
+    for start in range(0, len(prop_df), block_size):
+        block = slice(start, start + block_size)
+        # converted once, queried against every layer
+        points = distance.Coordinates(lat[block], lng[block])
+
+        for layer in layers:
+            result = layer.index.nearest(points, 1, block_size)
+            ids[layer.name][block] = layer.index.ids[result.indices]
+            distances[layer.name][block] = result.distances
+
+    # their nearest point is at index -1
+    missing = ~(np.isfinite(lat) & np.isfinite(lng))
+
+    for layer in layers:
+        layer_ids, layer_distances = ids[layer.name], np.round(distances[layer.name], 3)
+        if missing.any():
+            layer_ids, layer_distances = layer_ids.astype(object), layer_distances.astype(object)
+            layer_ids[missing] = layer_distances[missing] = config.NOT_AVAILABLE
+
+        prop_df[layer.id_column] = layer_ids
+        prop_df[layer.distance_column] = layer_distances
+
+    return prop_df
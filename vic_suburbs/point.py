@@ -0,0 +1,209 @@
+"""Enrichment of individual points from reference data held in memory.
+
+``PointEnricher`` answers suburb, LGA, closest station and travel time
+queries for arrays of coordinates with the same results as the pipeline
+stages, without a dataframe. It backs the service mode (see ``service``).
+
+Many properties share coordinates, so results can be memoized in a bounded
+LRU cache keyed by the coordinates quantized to ``precision`` decimal places.
+``enrich_parallel`` splits large arrays of points between worker processes
+that attach to the reference data in shared memory (see ``shared``).
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from . import config, distance, names, shared
+
+FIELDS = ["suburb", "lga", "closest_train_station_id", "distance_to_closest_train_station",
+          "travel_min_to_MC", "direct_journey_flag"]
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used key, counting hits and misses."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxsize": self.maxsize}
+
+
+def quantize(lat, lng, precision):
+    """Return lat and lng as int64 multiples of 10 ** -precision, equal for points that round together."""
+    scale = 10 ** precision
+    lat_q = np.round(np.asarray(lat, dtype="float64") * scale).astype("int64")
+    lng_q = np.round(np.asarray(lng, dtype="float64") * scale).astype("int64")
+    return lat_q, lng_q
+
+
+class PointEnricher:
+    def __init__(self, grid, lga_dict, stops_dict, travel_times, cache_size=0, precision=7, direct_times=None):
+        """``travel_times`` and ``direct_times`` map stop ids to minutes, see ``enrich.station_travel_times``.
+
+        ``direct_journey_flag`` marks the stops with a direct time, the travel
+        times themselves when ``direct_times`` is None.
+        """
+        self.grid = grid
+        self.lga_dict = lga_dict
+        self.lga_index = names.NameIndex(lga_dict)
+
+        self.stops_dict = stops_dict
+        self.stop_ids = np.array(list(stops_dict), dtype="int64")
+        self.stops = distance.Coordinates(*np.array(list(stops_dict.values()), dtype="float64").T)
+        self.travel_times = travel_times
+        self.direct_times = travel_times if direct_times is None else direct_times
+
+        # the pipeline rounds coordinates to 7 decimal places, so that precision loses nothing
+        self.cache = LRUCache(cache_size) if cache_size > 0 else None
+        self.precision = precision
+
+    @classmethod
+    def from_pipeline(cls, data_dir=config.DATA_DIR, lga_text=None, suburb_store=config.SUBURB_STORE,
+                      cache_dir=None, transfers=False, travel_date=None,
+                      gtfs_feeds=config.GTFS_FEEDS, **kwargs):
+        """Load the reference data through the pipeline stages and compute the travel time of every stop.
+
+        With ``transfers`` the travel times include journeys changing trains,
+        they are for ``travel_date`` if given, over the ``gtfs_feeds``, see ``pipeline.run``.
+        """
+        from . import dag, enrich, pipeline
+
+        params = pipeline.run_params(data_dir=data_dir, lga_text=lga_text, cache_dir=cache_dir,
+                                     suburb_store=suburb_store, transfers=transfers, travel_date=travel_date,
+                                     gtfs_feeds=list(gtfs_feeds))
+        cache = dag.DiskCache(cache_dir) if cache_dir is not None else None
+        ref = pipeline.PIPELINE.run(params, ["suburb_store", "lga_dict", "stops", "timetable"], cache)
+
+        # with transfers the direct journeys are still those flagged, as in the pipeline
+        direct_times = enrich.station_travel_times(ref["stops"], ref["timetable"])
+        travel_times = enrich.station_travel_times(ref["stops"], ref["timetable"], True) if transfers else direct_times
+        return cls(ref["suburb_store"], ref["lga_dict"], ref["stops"], travel_times, direct_times=direct_times,
+                   **kwargs)
+
+    @classmethod
+    def from_reference(cls, reference, **kwargs):
+        """Build an enricher on the ``shared.ReferenceData`` attached by a worker."""
+        return cls(reference.grid, reference.lga_dict, reference.stops_dict, reference.travel_times,
+                   direct_times=reference.direct_times, **kwargs)
+
+    def share(self):
+        """Place the reference data in shared memory, see ``shared.share_reference``."""
+        return shared.share_reference(self.grid, self.stops_dict, self.travel_times, self.lga_dict,
+                                      direct_times=self.direct_times)
+
+    def closest_stations(self, lat, lng):
+        """Return the closest stop of each point and its haversine distance in km."""
+        index, dist = distance.nearest(distance.Coordinates(lat, lng), self.stops)
+        return self.stop_ids[index], dist
+
+    def enrich(self, lat, lng):
+        """Return a dictionary of lists, one per column of ``FIELDS``, for arrays of coordinates.
+
+        With a cache, each distinct quantized coordinate missing from it is
+        computed once and the whole row of columns is cached.
+        """
+        if self.cache is None:
+            return self._enrich(lat, lng)
+
+        lat = np.asarray(lat, dtype="float64")
+        lng = np.asarray(lng, dtype="float64")
+        keys = list(zip(*(q.tolist() for q in quantize(lat, lng, self.precision))))
+
+        first = {}
+        for i, key in enumerate(keys):
+            first.setdefault(key, i)
+
+        rows = {key: self.cache.get(key) for key in first}
+        # repeats of a key within the batch are served like cache hits
+        self.cache.hits += len(keys) - len(first)
+        missing = [key for key, row in rows.items() if row is None]
+
+        if missing:
+            index = np.array([first[key] for key in missing], dtype="int64")
+            computed = self._enrich(lat[index], lng[index])
+            for key, row in zip(missing, zip(*(computed[field] for field in FIELDS))):
+                self.cache.put(key, row)
+                rows[key] = row
+
+        rows = [rows[key] for key in keys]
+        return {field: list(values) for field, values in zip(FIELDS, zip(*rows))} if rows \
+            else {field: [] for field in FIELDS}
+
+    def cache_info(self):
+        return self.cache.info() if self.cache is not None else None
+
+    def _enrich(self, lat, lng):
+        suburbs = self.grid.locate_names(lat, lng)
+        stops, distances = self.closest_stations(lat, lng)
+        travel = [self.travel_times.get(stop, config.NOT_AVAILABLE) for stop in stops.tolist()]
+        direct = [self.direct_times.get(stop, config.NOT_AVAILABLE) for stop in stops.tolist()]
+
+        return {
+            "suburb": suburbs.tolist(),
+            "lga": [self.lga_index.lookup(suburb) for suburb in suburbs],
+            "closest_train_station_id": stops.tolist(),
+            "distance_to_closest_train_station": np.round(distances, 3).tolist(),
+            "travel_min_to_MC": travel,
+            "direct_journey_flag": [int(time != config.NOT_AVAILABLE) for time in direct],
+        }
+
+    def enrich_point(self, lat, lng):
+        """Return the columns of ``FIELDS`` for a single point, as a dictionary."""
+        return {field: values[0] for field, values in self.enrich([lat], [lng]).items()}
+
+
+# the enricher of a pool worker, built on the first chunk it gets
+_worker_enricher = None
+
+
+def worker_enricher():
+    """Return the ``PointEnricher`` of the current ``shared.map_chunks`` worker."""
+    global _worker_enricher
+    if _worker_enricher is None:
+        _worker_enricher = PointEnricher.from_reference(shared.worker_reference())
+
+    return _worker_enricher
+
+
+def _enrich_chunk(chunk):
+    return worker_enricher().enrich(*chunk)
+
+
+def enrich_parallel(enricher, lat, lng, workers=None, chunk_size=100_000):
+    """Same as ``enricher.enrich`` with chunks of the points enriched by worker processes.
+
+    The workers attach to the reference data in shared memory instead of
+    receiving a copy each, and do not use the enricher's cache.
+    """
+    lat = np.asarray(lat, dtype="float64")
+    lng = np.asarray(lng, dtype="float64")
+    chunks = [(lat[i:i + chunk_size], lng[i:i + chunk_size]) for i in range(0, len(lat), chunk_size)]
+
+    reference, descriptor = enricher.share()
+    with reference:
+        results = list(shared.map_chunks(_enrich_chunk, chunks, descriptor, workers))
+
+    return {field: [value for result in results for value in result[field]] for field in FIELDS}
@@ -0,0 +1,226 @@
+"""Compact binary store of the locality polygons.
+
+The shapefile is compiled once into flat numpy arrays saved as ``.npy``
+files, so later runs memory-map them instead of parsing the shapefile:
+
+- ``vertices``: (n_vertices, 2) float64 lng/lat of every ring, back to back
+- ``ring_offsets``: start of each ring in ``vertices``, plus the end
+- ``polygon_offsets``: first ring of each polygon in ``ring_offsets``, plus the end
+- ``bboxes``: (n_polygons, 4) float64 lng_min, lat_min, lng_max, lat_max
+- ``meta.json``: the polygon names and the fingerprint of the source shapefile
+
+Every part of a shape is kept and containment uses the even-odd rule, so
+holes and multi-part localities are handled. ``load_or_compile`` compiles
+the store on first use, or explicitly::
+
+    python -m vic_suburbs.polystore data/vic_suburb_bounadry/VIC_LOCALITY_POLYGON_shp .vic_suburbs_cache/localities
+
+The LGA boundaries are compiled the same way, see ``regions``.
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from . import config
+
+# the locality name is the 7th field of each record
+NAME_FIELD = 6
+# and the LGA name that of the LGA shapefile, e.g. "BAYSIDE CITY"
+LGA_NAME_FIELD = 6
+
+# maximum number of point/edge pairs tested at once
+BLOCK_SIZE = 2 ** 22
+
+ARRAYS = ["vertices", "ring_offsets", "polygon_offsets", "bboxes"]
+
+
+def source_fingerprint(shapefile):
+    stat = os.stat(f"{shapefile}.shp")
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def points_in_ring(lng, lat, ring):
+    """Return which points are inside the closed ``ring`` by counting edge crossings."""
+    x0, y0 = ring[:, 0], ring[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    inside = np.zeros(len(lng), dtype=bool)
+    step = max(1, BLOCK_SIZE // len(ring))
+
+    for start in range(0, len(lng), step):
+        px = lng[start:start + step, None]
+        py = lat[start:start + step, None]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crosses = ((y0 > py) != (y1 > py)) & (px < (x1 - x0) * (py - y0) / (y1 - y0) + x0)
+
+        inside[start:start + step] = np.count_nonzero(crosses, axis=1) % 2 == 1
+
+    return inside
+
+
+class PolygonStore:
+    def __init__(self, names, vertices, ring_offsets, polygon_offsets, bboxes):
+        self.names = list(names)
+        self.vertices = vertices
+        self.ring_offsets = ring_offsets
+        self.polygon_offsets = polygon_offsets
+        self.bboxes = bboxes
+        self.directory = None
+        self.source = None
+
+    @classmethod
+    def from_rings(cls, named_rings):
+        """Build a store from an iterable of (name, list of (n, 2) lng/lat rings)."""
+        names, rings, polygon_offsets = [], [], [0]
+
+        for name, polygon_rings in named_rings:
+            names.append(name)
+            rings.extend(np.asarray(ring, dtype="float64") for ring in polygon_rings)
+            polygon_offsets.append(len(rings))
+
+        ring_offsets = np.concatenate([[0], np.cumsum([len(ring) for ring in rings])]).astype("int64")
+        vertices = np.concatenate(rings) if rings else np.empty((0, 2))
+        polygon_offsets = np.array(polygon_offsets, dtype="int64")
+
+        starts = ring_offsets[polygon_offsets[:-1]]
+        ends = ring_offsets[polygon_offsets[1:]]
+        bboxes = np.array([np.concatenate([vertices[s:e].min(axis=0), vertices[s:e].max(axis=0)])
+                           for s, e in zip(starts, ends)]).reshape(-1, 4)
+
+        return cls(names, vertices, ring_offsets, polygon_offsets, bboxes)
+
+    @classmethod
+    def from_shapefile(cls, shapefile, name_field=NAME_FIELD):
+        """Build a store from a shapefile, such as the locality one, streaming one shape at a time."""
+        import shapefile as pyshp
+
+        def named_rings():
+            for rs in pyshp.Reader(str(shapefile)).iterShapeRecords():
+                pts = np.array(rs.shape.points)
+                par = list(rs.shape.parts) + [len(pts)]
+                yield rs.record[name_field], [pts[par[i]:par[i + 1]] for i in range(len(rs.shape.parts))]
+
+        return cls.from_rings(named_rings())
+
+    @classmethod
+    def from_subs_bounds(cls, subs_bounds):
+        """Build a store from a ``subs_bounds`` dictionary of matplotlib polygons."""
+        return cls.from_rings((sub, [poly.get_xy()]) for sub, poly in subs_bounds.items())
+
+    def save(self, directory, source=None):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for name in ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+
+        # meta.json is written last, a store without it is incomplete
+        with open(directory / "meta.json", "w") as outfile:
+            json.dump({"names": self.names, "source": source}, outfile)
+
+        self.directory = directory
+        self.source = source
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-map a saved store."""
+        directory = Path(directory)
+
+        with open(directory / "meta.json", "r") as infile:
+            meta = json.load(infile)
+
+        store = cls(meta["names"], *(np.load(directory / f"{name}.npy", mmap_mode="r") for name in ARRAYS))
+        store.directory = directory
+        store.source = meta["source"]
+        return store
+
+    def __reduce__(self):
+        # a saved store pickles as its location, e.g. when the pipeline caches it
+        if self.directory is not None:
+            return (PolygonStore.load, (str(self.directory),))
+        return (PolygonStore, (self.names, np.asarray(self.vertices), np.asarray(self.ring_offsets),
+                               np.asarray(self.polygon_offsets), np.asarray(self.bboxes)))
+
+    def __len__(self):
+        return len(self.names)
+
+    def rings(self, p):
+        return [self.vertices[self.ring_offsets[r]:self.ring_offsets[r + 1]]
+                for r in range(self.polygon_offsets[p], self.polygon_offsets[p + 1])]
+
+    def contains(self, p, lng, lat):
+        """Return which points are inside polygon ``p``, with the even-odd rule over its rings."""
+        inside = np.zeros(len(lng), dtype=bool)
+
+        for ring in self.rings(p):
+            inside ^= points_in_ring(lng, lat, ring)
+
+        return inside
+
+    def locate(self, lat, lng):
+        """Return the index of the first polygon containing each point, -1 if there is none.
+
+        The points are sorted by longitude once so that the candidates of each
+        polygon's bounding box are found with a binary search.
+        """
+        lat = np.asarray(lat, dtype="float64")
+        lng = np.asarray(lng, dtype="float64")
+        result = np.full(len(lat), -1, dtype="int64")
+
+        order = np.argsort(lng, kind="stable")
+        sorted_lng = lng[order]
+
+        for p, (lng_min, lat_min, lng_max, lat_max) in enumerate(self.bboxes):
+            lo = np.searchsorted(sorted_lng, lng_min, side="left")
+            hi = np.searchsorted(sorted_lng, lng_max, side="right")
+            candidates = order[lo:hi]
+            candidates = candidates[(result[candidates] == -1) & (lat[candidates] >= lat_min)
+                                    & (lat[candidates] <= lat_max)]
+
+            if len(candidates):
+                result[candidates[self.contains(p, lng[candidates], lat[candidates])]] = p
+
+        return result
+
+    def locate_names(self, lat, lng):
+        """Return the name of the polygon containing each point, "not available" if there is none."""
+        names = np.array(self.names + [config.NOT_AVAILABLE], dtype=object)
+        return names[self.locate(lat, lng)]
+
+
+def load_or_compile(shapefile, directory, name_field=NAME_FIELD):
+    """Load the store in ``directory``, compiling it first if it is missing or the shapefile changed."""
+    source = source_fingerprint(shapefile)
+
+    try:
+        store = PolygonStore.load(directory)
+        if store.source == source:
+            return store
+    except FileNotFoundError:
+        pass
+
+    store = PolygonStore.from_shapefile(shapefile, name_field)
+    store.save(directory, source)
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vic_suburbs.polystore", description="Compile a polygon shapefile.")
+    parser.add_argument("shapefile", nargs="?", default=f"{config.DATA_DIR}/{config.SUBURB_SHAPEFILE}",
+                        help="shapefile path without extension")
+    parser.add_argument("directory", nargs="?", default=config.SUBURB_STORE, help="directory to write the store to")
+    parser.add_argument("--name-field", type=int, default=NAME_FIELD,
+                        help=f"field of the record holding the name, {LGA_NAME_FIELD} for the LGA shapefile")
+    args = parser.parse_args(argv)
+
+    store = PolygonStore.from_shapefile(args.shapefile, args.name_field)
+    store.save(args.directory, source_fingerprint(args.shapefile))
+    print(f"{len(store)} polygons, {len(store.vertices)} vertices written to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Suburb and LGA of each point in one pass, from the LGA and locality polygons.
+
+The LGA boundary shapefile is compiled like the localities (see
+``polystore``) with a ``cellgrid.ContainmentGrid`` of its own, so the LGA of
+a point no longer goes through the name of its suburb. ``RegionIndex``
+locates each point in its LGA first. A point in a locality boundary cell then
+first tests the localities of its cell found in that LGA, which prunes the
+candidates of the cells along LGA borders. Localities are found in LGAs by
+sampling them, so the other candidates are still tested for the points left
+without a locality: the results are those of the locality grid alone wherever
+localities do not overlap. Points outside every LGA test all the candidates
+of their cell.
+
+The LGA polygon names are matched to the LGA table (see ``names.match_lgas``)
+so the lga column holds the names the COVID figures are scraped with.
+"""
+
+import numpy as np
+
+from . import cellgrid, config, names, polystore
+
+
+def memberships(lga_grid, suburb_grid):
+    """Return a boolean (n_lgas, n_suburbs) matrix of the LGAs each locality was found in.
+
+    A locality is sampled at the centres of the cells it owns and of the
+    boundary cells whose centre it contains. A locality without any sample
+    is a member of every LGA.
+    """
+    store = suburb_grid.store
+    owner = np.asarray(suburb_grid.owner).ravel()
+    cells = np.flatnonzero(owner >= 0)
+    suburbs = owner[cells].astype("int64")
+
+    counts, candidates = suburb_grid.candidates_of(np.asarray(suburb_grid.boundary_cells))
+    boundary = np.repeat(np.asarray(suburb_grid.boundary_cells), counts)
+    for p in np.unique(candidates):
+        p_cells = boundary[candidates == p]
+        lat, lng = suburb_grid.cell_centres(p_cells)
+        inside = p_cells[store.contains(p, lng, lat)]
+        cells = np.concatenate([cells, inside])
+        suburbs = np.concatenate([suburbs, np.full(len(inside), p)])
+
+    lgas = lga_grid.locate(*suburb_grid.cell_centres(cells))
+    member = np.zeros((len(lga_grid.store), len(store)), dtype=bool)
+    member[lgas[lgas >= 0], suburbs[lgas >= 0]] = True
+    member[:, np.bincount(suburbs, minlength=len(store)) == 0] = True
+    return member
+
+
+class RegionIndex:
+    def __init__(self, suburbs, lgas, lga_names, member):
+        self.suburbs = suburbs
+        self.lgas = lgas
+        self.lga_names = list(lga_names)
+        self.member = member
+
+    @classmethod
+    def build(cls, suburbs, lgas, lga_dict):
+        """Index the locality grid ``suburbs`` under the LGA grid ``lgas``, named after ``lga_dict``."""
+        return cls(suburbs, lgas, names.match_lgas(lgas.store.names, lga_dict), memberships(lgas, suburbs))
+
+    def locate(self, lat, lng):
+        """Return the index of the locality and of the LGA containing each point, -1 where there is none."""
+        lat = np.asarray(lat, dtype="float64")
+        lng = np.asarray(lng, dtype="float64")
+
+        lga = self.lgas.locate(lat, lng)
+        suburb, pair_points, pair_polygons = self.suburbs.lookup(lat, lng)
+
+        pair_lgas = lga[pair_points]
+        keep = (pair_lgas < 0) | self.member[pair_lgas, pair_polygons]
+        suburb = self.suburbs.resolve(suburb, pair_points[keep], pair_polygons[keep], lat, lng)
+
+        # a locality whose samples missed the LGA is still found, after the others
+        rest = ~keep & (suburb[pair_points] < 0)
+        return self.suburbs.resolve(suburb, pair_points[rest], pair_polygons[rest], lat, lng), lga
+
+    def locate_names(self, lat, lng):
+        """Return the suburb and LGA names of each point, "not available" where there is none."""
+        suburb, lga = self.locate(lat, lng)
+        suburb_names = np.array(self.suburbs.store.names + [config.NOT_AVAILABLE], dtype=object)
+        lga_names = np.array(self.lga_names + [config.NOT_AVAILABLE], dtype=object)
+        return suburb_names[suburb], lga_names[lga]
+
+
+def load_or_compile(shapefile, directory, suburbs, lga_dict):
+    """Build the ``RegionIndex`` of the locality grid ``suburbs``, compiling the LGA shapefile into ``directory`` once."""
+    store = polystore.load_or_compile(shapefile, directory, polystore.LGA_NAME_FIELD)
+    return RegionIndex.build(suburbs, cellgrid.load_or_build(store, f"{directory}/grid"), lga_dict)
@@ -0,0 +1,75 @@
+"""Scrape COVID-19 case figures per LGA from covidlive.com.au."""
+
+import datetime as dt
+from urllib.request import urlopen
+
+import pandas as pd
+
+from . import config
+
+# (column, number of days averaged over), the first column holds the cases on the date itself
+COVID_COLUMNS = [("30_sep_cases", 1), ("last_14_days_cases", 14),
+                 ("last_30_days_cases", 30), ("last_60_days_cases", 60)]
+
+
+def lga_url(lga):
+    # replace space in name with "-"
+    return config.COVID_URL + lga.replace(" ", "-").lower()
+
+
+def fetch_cumulative_cases(lga):
+    """Return a dataframe of the dates and cumulative cases listed for the LGA."""
+    from bs4 import BeautifulSoup
+
+    bsObj = BeautifulSoup(urlopen(lga_url(lga)), "html.parser")
+
+    dates = [date.get_text() for date in bsObj.find_all("td", "COL1 DATE")]
+    cases = [case.get_text() for case in bsObj.find_all("td", "COL4 CASES")]
+    numbers = [int(num.replace(",", "")) for num in cases]
+
+    return pd.DataFrame({"dates": dates, "cases": numbers})
+
+
+def case_figures(df, date=config.COVID_DATE):
+    """Difference the cumulative cases into the figures of each COVID column.
+
+    The averages run backwards from the day before ``date``, e.g. for the 30th
+    of September the 14 day average is (29 Sep - 16 Sep) / 14.
+    """
+    date = dt.date.fromisoformat(str(date))
+    day_before = date - dt.timedelta(days=1)
+
+    def cases_on(day):
+        return df.loc[df["dates"] == day.strftime("%d %b"), "cases"].values[0]
+
+    figures = {COVID_COLUMNS[0][0]: cases_on(date) - cases_on(day_before)}
+
+    for column, days in COVID_COLUMNS[1:]:
+        start = day_before - dt.timedelta(days=days - 1)
+        figures[column] = round((cases_on(day_before) - cases_on(start)) / days)
+
+    return figures
+
+
+def scrape_cases(lgas, date=config.COVID_DATE):
+    """Map each LGA to its COVID figures, LGAs without any listed cases are left out."""
+    cases_dict = {}
+
+    for lga in lgas:
+        if lga == config.NOT_AVAILABLE:
+            continue
+
+        df = fetch_cumulative_cases(lga)
+
+        if len(df) > 0:
+            cases_dict[lga] = case_figures(df, date)
+
+    return cases_dict
+
+
+def add_covid_cases(prop_df, cases_dict):
+    for column, _ in COVID_COLUMNS:
+        prop_df[column] = prop_df["lga"].apply(
+            lambda lga: cases_dict[lga][column] if lga in cases_dict else config.NOT_AVAILABLE)
+
+    return prop_df
@@ -0,0 +1,166 @@
+"""Long-lived local service answering enrichment queries.
+
+The reference data is loaded once (see ``point.PointEnricher``), then the
+service answers HTTP/1.1 requests over TCP or a Unix socket, keeping
+connections alive between requests::
+
+    python -m vic_suburbs.service --port 8765
+    curl 'http://127.0.0.1:8765/enrich?lat=-37.815113&lng=144.891492'
+    curl -d '{"lat": [-37.815113, -37.799076], "lng": [144.891492, 145.174236]}' http://127.0.0.1:8765/enrich/batch
+
+``GET /enrich`` returns one object with the columns of ``point.FIELDS``,
+``POST /enrich/batch`` returns an object of lists, ``GET /stats`` returns the
+hits and misses of the enrichment cache, and ``GET /health`` returns
+``{"status": "ok"}``.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from . import config, services
+from .point import PointEnricher
+
+logger = logging.getLogger(__name__)
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+# largest request body accepted, in bytes
+MAX_BODY = 64 * 2 ** 20
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def coordinates(values, name):
+    try:
+        return [float(value) for value in values]
+    except (TypeError, ValueError):
+        raise RequestError(400, f"{name} must be numbers")
+
+
+class EnrichmentService:
+    def __init__(self, enricher):
+        self.enricher = enricher
+
+    def handle(self, method, target, body):
+        """Return (status, json-serialisable response) for a request."""
+        url = urlsplit(target)
+
+        if url.path == "/health":
+            return 200, {"status": "ok"}
+
+        if url.path == "/stats":
+            return 200, {"cache": self.enricher.cache_info()}
+
+        if url.path == "/enrich":
+            if method != "GET":
+                raise RequestError(405, "use GET")
+            query = parse_qs(url.query)
+            if "lat" not in query or "lng" not in query:
+                raise RequestError(400, "lat and lng are required")
+            lat, lng = coordinates(query["lat"][:1], "lat")[0], coordinates(query["lng"][:1], "lng")[0]
+            return 200, self.enricher.enrich_point(lat, lng)
+
+        if url.path == "/enrich/batch":
+            if method != "POST":
+                raise RequestError(405, "use POST")
+            try:
+                payload = json.loads(body)
+                lat, lng = coordinates(payload["lat"], "lat"), coordinates(payload["lng"], "lng")
+            except (ValueError, KeyError, TypeError):
+                raise RequestError(400, 'body must be {"lat": [...], "lng": [...]}')
+            if len(lat) != len(lng):
+                raise RequestError(400, "lat and lng must have the same length")
+            return 200, self.enricher.enrich(lat, lng)
+
+        raise RequestError(404, f"unknown path {url.path}")
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                try:
+                    if length > MAX_BODY:
+                        raise RequestError(413, "request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, response = self.handle(method, target, body)
+                except RequestError as error:
+                    status, response = error.status, {"error": str(error)}
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                # numpy scalars convert through item()
+                payload = json.dumps(response, default=lambda value: value.item()).encode()
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError) as error:
+            logger.debug("dropping connection: %s", error)
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, unix_socket=None):
+        if unix_socket is not None:
+            server = await asyncio.start_unix_server(self.serve_connection, path=str(unix_socket))
+        else:
+            server = await asyncio.start_server(self.serve_connection, host, port)
+
+        logger.info("serving on %s", ", ".join(str(sock.getsockname()) for sock in server.sockets))
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vic_suburbs.service", description="Serve enrichment queries.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", type=Path, help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--data-dir", type=Path, default=config.DATA_DIR)
+    parser.add_argument("--lga-text", type=Path, help="LGA to suburb text file, the pdf is read directly by default")
+    parser.add_argument("--suburb-store", type=Path, default=config.SUBURB_STORE)
+    parser.add_argument("--cache-dir", type=Path, default=config.CACHE_DIR)
+    parser.add_argument("--lru-size", type=int, default=100_000,
+                        help="number of quantized coordinates whose enrichment is memoized, 0 to disable")
+    parser.add_argument("--precision", type=int, default=7, help="decimal places the coordinates are quantized to")
+    parser.add_argument("--transfers", action="store_true",
+                        help="travel times to Melbourne Central include journeys changing trains")
+    parser.add_argument("--travel-date", help="travel times for the trips running on this date (YYYY-MM-DD)")
+    parser.add_argument("--feeds", nargs="+", default=config.GTFS_FEEDS, help="GTFS feeds to take the stations from")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    try:
+        enricher = PointEnricher.from_pipeline(args.data_dir, args.lga_text, args.suburb_store, args.cache_dir,
+                                               transfers=args.transfers, travel_date=args.travel_date,
+                                               gtfs_feeds=args.feeds, cache_size=args.lru_size,
+                                               precision=args.precision)
+    except services.TravelDateError as error:
+        raise SystemExit(f"--travel-date: {error}")
+    asyncio.run(EnrichmentService(enricher).serve(args.host, args.port, args.unix_socket))
+
+
+if __name__ == "__main__":
+    main()
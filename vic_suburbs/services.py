@@ -0,0 +1,123 @@
+"""Service calendar of a GTFS feed as per-date bitsets.
+
+Each service_id of calendar.txt is expanded into one bit per day between
+the first and last date of the feed: set on the days of its weekly pattern
+between its start and end dates, then changed by the calendar_dates.txt
+exceptions (1 adds the date, 2 removes it). The bits are packed with
+``np.packbits``, so the services running on a date or set of dates are
+found with a bitwise and over every service at once.
+"""
+
+import datetime as dt
+import os
+
+import numpy as np
+import pandas as pd
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# exception_type of calendar_dates.txt adding a date, 2 removes it
+SERVICE_ADDED = 1
+
+
+class TravelDateError(ValueError):
+    """A travel date outside the dates of a feed's calendar."""
+
+
+def to_date(date):
+    """Convert a date, or a string such as "2021-09-30" or "20210930", to a ``datetime.date``."""
+    return pd.Timestamp(date).date()
+
+
+class ServiceCalendar:
+    def __init__(self, service_ids, start, bits, n_days, weekly):
+        self.service_ids = list(service_ids)
+        self.start = start
+        # (n_services, ceil(n_days / 8)) uint8, bit k of a row is day start + k
+        self.bits = bits
+        self.n_days = n_days
+        # bit k is set when calendar.txt runs the service on WEEKDAYS[k]
+        self.weekly = weekly
+        self.index = pd.Index(self.service_ids)
+
+    @property
+    def end(self):
+        """Last date of the feed, before ``start`` when the calendar is empty."""
+        return self.start + dt.timedelta(days=self.n_days - 1)
+
+    @classmethod
+    def from_gtfs(cls, gtfs_dir):
+        calendar = pd.read_csv(f"{gtfs_dir}/calendar.txt", dtype={"service_id": str, "start_date": str, "end_date": str})
+
+        dates_path = f"{gtfs_dir}/calendar_dates.txt"
+        if os.path.exists(dates_path):
+            exceptions = pd.read_csv(dates_path, dtype={"service_id": str, "date": str})
+        else:
+            exceptions = pd.DataFrame({"service_id": [], "date": [], "exception_type": []})
+
+        return cls.from_frames(calendar, exceptions)
+
+    @classmethod
+    def from_frames(cls, calendar, exceptions):
+        """Build the calendar from the calendar.txt and calendar_dates.txt dataframes."""
+        starts = pd.to_datetime(calendar["start_date"].astype(str), format="%Y%m%d").to_numpy()
+        ends = pd.to_datetime(calendar["end_date"].astype(str), format="%Y%m%d").to_numpy()
+        exception_dates = pd.to_datetime(exceptions["date"].astype(str), format="%Y%m%d").to_numpy()
+
+        all_dates = np.concatenate([starts, ends, exception_dates])
+        if len(all_dates) == 0:
+            return cls([], dt.date.today(), np.zeros((0, 0), dtype="uint8"), 0, np.zeros(0, dtype="uint8"))
+
+        days = pd.date_range(all_dates.min(), all_dates.max(), freq="D")
+
+        # services only listed in calendar_dates.txt have no weekly pattern
+        service_ids = list(dict.fromkeys(list(calendar["service_id"].astype(str))
+                                         + list(exceptions["service_id"].astype(str))))
+        n_listed = len(calendar)
+        pattern = np.zeros((len(service_ids), 7), dtype=bool)
+        pattern[:n_listed] = calendar[WEEKDAYS].to_numpy() == 1
+
+        active = np.zeros((len(service_ids), len(days)), dtype=bool)
+        day_values = days.to_numpy()
+        active[:n_listed] = (pattern[:n_listed][:, days.weekday]
+                             & (day_values >= starts[:, None]) & (day_values <= ends[:, None]))
+
+        positions = {service_id: index for index, service_id in enumerate(service_ids)}
+        rows = [positions[service_id] for service_id in exceptions["service_id"].astype(str)]
+        columns = ((exception_dates - day_values[0]) // np.timedelta64(1, "D")).astype("int64")
+        kinds = exceptions["exception_type"].astype("int64").to_numpy()
+        active[rows, columns] = kinds == SERVICE_ADDED
+
+        weekly = (pattern * (1 << np.arange(7))).sum(axis=1).astype("uint8")
+        return cls(service_ids, days[0].date(), np.packbits(active, axis=1, bitorder="little"), len(days), weekly)
+
+    def date_mask(self, dates):
+        """Return a packed row with the bits of ``dates`` set, dates outside the feed are ignored."""
+        if isinstance(dates, (str, dt.date)):
+            dates = [dates]
+
+        offsets = np.array([(to_date(date) - self.start).days for date in dates], dtype="int64")
+        offsets = offsets[(offsets >= 0) & (offsets < self.n_days)]
+
+        mask = np.zeros(self.n_days, dtype=bool)
+        mask[offsets] = True
+        return np.packbits(mask, bitorder="little")
+
+    def running_on(self, dates):
+        """Return which services run on at least one of ``dates``, a date or a list of dates."""
+        return (self.bits & self.date_mask(dates)).any(axis=1)
+
+    def running_every(self, dates):
+        """Return which services run on every one of ``dates``."""
+        mask = self.date_mask(dates)
+        return ((self.bits & mask) == mask).all(axis=1)
+
+    def running_weekly(self, weekdays):
+        """Return which services calendar.txt runs on every one of ``weekdays``, e.g. ["monday", "friday"]."""
+        wanted = sum(1 << WEEKDAYS.index(day) for day in weekdays)
+        return (self.weekly & wanted) == wanted
+
+    def select(self, service_ids, running):
+        """Return which of ``service_ids``, e.g. the column of trips.txt, are running services."""
+        # unknown services are at -1, the appended False, and never run
+        return np.append(running, False)[self.index.get_indexer(pd.Series(service_ids).astype(str))]
@@ -0,0 +1,182 @@
+"""Reference data in shared memory, attached by worker processes without copying.
+
+``SharedArrays`` lays named numpy arrays out in one
+``multiprocessing.shared_memory`` block. Its ``descriptor`` is a small
+picklable record of the block name and the dtype, shape and offset of each
+array, from which ``SharedArrays.attach`` maps read-only views of the same
+memory in another process.
+
+``share_reference`` places the containment grid and its polygons, the
+stations and optionally the compiled timetable in a block, keeping only the
+small metadata (locality names, LGA table, travel times) in the descriptor.
+``attach_reference`` rebuilds the objects on top of the views, and
+``map_chunks`` runs a function over chunks in a process pool whose workers
+attach once, so the reference data is never pickled per task.
+"""
+
+import os
+import sys
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import cellgrid, polystore, timetable
+
+# offsets of the arrays in a block are multiples of this, for aligned loads
+ALIGNMENT = 64
+
+ReferenceDescriptor = namedtuple("ReferenceDescriptor", ["arrays", "meta"])
+
+ReferenceData = namedtuple("ReferenceData", ["grid", "stops_dict", "travel_times", "lga_dict", "timetable",
+                                             "direct_times"])
+
+
+def open_block(name):
+    """Attach an existing block, leaving its cleanup to the process that created it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    # earlier versions register it again with the resource tracker, which pool
+    # workers share with their parent, so this is harmless for them
+    return shared_memory.SharedMemory(name=name)
+
+
+class SharedArrays:
+    def __init__(self, block, layout, owner):
+        self.block = block
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {}
+
+        for key, (dtype, shape, offset) in layout.items():
+            array = np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+            array.flags.writeable = owner
+            self.arrays[key] = array
+
+    @classmethod
+    def create(cls, arrays):
+        """Copy a dictionary of arrays into a new block, owned by this process."""
+        arrays = {key: np.ascontiguousarray(array) for key, array in arrays.items()}
+        layout, size = {}, 0
+
+        for key, array in arrays.items():
+            size = -(-size // ALIGNMENT) * ALIGNMENT
+            layout[key] = (array.dtype.str, array.shape, size)
+            size += array.nbytes
+
+        shared = cls(shared_memory.SharedMemory(create=True, size=max(size, 1)), layout, owner=True)
+        for key, array in arrays.items():
+            shared.arrays[key][...] = array
+            shared.arrays[key].flags.writeable = False
+
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor):
+        name, layout = descriptor
+        return cls(open_block(name), layout, owner=False)
+
+    @property
+    def descriptor(self):
+        return self.block.name, self.layout
+
+    def __getitem__(self, key):
+        return self.arrays[key]
+
+    def close(self):
+        """Detach from the block, and free it if this process created it."""
+        self.arrays = {}
+        try:
+            self.block.close()
+        except BufferError:
+            # views are still referenced, the mapping goes when the process exits
+            pass
+
+        if self.owner:
+            self.block.unlink()
+            self.owner = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def share_reference(grid, stops_dict, travel_times, lga_dict, compiled=None, direct_times=None):
+    """Place the reference data in shared memory and return the ``SharedArrays`` and their descriptor.
+
+    The caller keeps the returned ``SharedArrays`` open while workers use
+    the descriptor, and closes it afterwards.
+    """
+    store = grid.store
+    arrays = {f"store/{name}": getattr(store, name) for name in polystore.ARRAYS}
+    arrays.update({f"grid/{name}": getattr(grid, name) for name in cellgrid.ARRAYS})
+    arrays["stops/ids"] = np.array(list(stops_dict), dtype="int64")
+    arrays["stops/coords"] = np.array(list(stops_dict.values()), dtype="float64").reshape(-1, 2)
+
+    if compiled is not None:
+        arrays.update({f"timetable/{name}": getattr(compiled, name) for name in timetable.ARRAYS})
+        arrays["timetable/trip_ids"] = np.array(compiled.trip_ids, dtype=str)
+
+    shared = SharedArrays.create(arrays)
+    meta = {"names": store.names, "origin": grid.origin, "cell_size": grid.cell_size,
+            "travel_times": travel_times, "direct_times": direct_times, "lga_dict": lga_dict,
+            "timetable": compiled is not None}
+    return shared, ReferenceDescriptor(shared.descriptor, meta)
+
+
+def attach_reference(descriptor):
+    """Rebuild the ``ReferenceData`` on views of the shared block, returned with the ``SharedArrays``."""
+    shared = SharedArrays.attach(descriptor.arrays)
+    meta = descriptor.meta
+
+    store = polystore.PolygonStore(meta["names"], *(shared[f"store/{name}"] for name in polystore.ARRAYS))
+    grid = cellgrid.ContainmentGrid(store, meta["origin"], meta["cell_size"],
+                                    *(shared[f"grid/{name}"] for name in cellgrid.ARRAYS))
+    stops_dict = dict(zip(shared["stops/ids"].tolist(), map(tuple, shared["stops/coords"].tolist())))
+
+    compiled = None
+    if meta["timetable"]:
+        compiled = timetable.Timetable(shared["timetable/trip_ids"],
+                                       *(shared[f"timetable/{name}"] for name in timetable.ARRAYS))
+
+    return ReferenceData(grid, stops_dict, meta["travel_times"], meta["lga_dict"], compiled,
+                         meta["direct_times"]), shared
+
+
+# the reference data attached by a pool worker, with its SharedArrays
+_attached = None
+
+
+def _attach_worker(descriptor):
+    global _attached
+    _attached = attach_reference(descriptor)
+
+
+def worker_reference():
+    """Return the ``ReferenceData`` attached by the current ``map_chunks`` worker."""
+    return _attached[0]
+
+
+def map_chunks(func, chunks, descriptor, workers=None):
+    """Yield ``func(chunk)`` for each chunk, in order, computed by workers attached to ``descriptor``.
+
+    ``func`` must be a module-level function, it reads the reference data
+    with ``worker_reference``. At most two chunks per worker are in flight,
+    so ``chunks`` can be a generator over more data than fits in memory.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker, initargs=(descriptor,)) as pool:
+        pending = deque()
+
+        for chunk in chunks:
+            pending.append(pool.submit(func, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
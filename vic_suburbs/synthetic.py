@@ -0,0 +1,186 @@
+"""Reproducible synthetic inputs for the benchmarks.
+
+Properties are drawn uniformly within locality polygons (the real locality
+shapefile or a synthetic grid of localities) grouped into rectangular LGAs, GTFS feeds are written with
+trips running into Melbourne Central, and COVID series are cumulative case
+counts in the format scraped from covidlive.com.au.
+"""
+
+import datetime as dt
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import config
+
+# (lng_min, lat_min, lng_max, lat_max) of metropolitan Melbourne
+MELBOURNE_BBOX = (144.5, -38.3, 145.6, -37.5)
+MELBOURNE_CENTRAL_COORDS = (-37.8100, 144.9628)
+
+
+def polygon_area(xy):
+    x, y = xy[:, 0], xy[:, 1]
+    return 0.5 * abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1)))
+
+
+def synthetic_localities(n_side=20, vertices_per_edge=50, bbox=MELBOURNE_BBOX):
+    """Return ``subs_bounds`` for a grid of ``n_side`` x ``n_side`` rectangular localities.
+
+    Each edge is split into ``vertices_per_edge`` vertices so that containment
+    tests cost about as much as for real locality boundaries.
+    """
+    from matplotlib.patches import Polygon
+
+    lng_edges = np.linspace(bbox[0], bbox[2], n_side + 1)
+    lat_edges = np.linspace(bbox[1], bbox[3], n_side + 1)
+    steps = np.linspace(0, 1, vertices_per_edge, endpoint=False)
+
+    subs_bounds = {}
+
+    for i in range(n_side):
+        for j in range(n_side):
+            x0, x1 = lng_edges[i], lng_edges[i + 1]
+            y0, y1 = lat_edges[j], lat_edges[j + 1]
+            ring = np.concatenate([
+                np.column_stack([x0 + (x1 - x0) * steps, np.full(vertices_per_edge, y0)]),
+                np.column_stack([np.full(vertices_per_edge, x1), y0 + (y1 - y0) * steps]),
+                np.column_stack([x1 - (x1 - x0) * steps, np.full(vertices_per_edge, y1)]),
+                np.column_stack([np.full(vertices_per_edge, x0), y1 - (y1 - y0) * steps]),
+            ])
+            subs_bounds[f"SYNTHETIC {i:03d}-{j:03d}"] = Polygon(ring)
+
+    return subs_bounds
+
+
+def synthetic_lgas(subs_bounds, n_side=5, vertices_per_edge=200):
+    """Return a ``polystore.PolygonStore`` of ``n_side`` x ``n_side`` rectangular LGAs and their LGA table.
+
+    Each suburb is listed under the LGA containing the centre of its bounding
+    box, so LGAs are contiguous as in the real table.
+    """
+    from .polystore import PolygonStore
+
+    rings = [poly.get_xy() for poly in subs_bounds.values()]
+    lower = np.min([ring.min(axis=0) for ring in rings], axis=0)
+    upper = np.max([ring.max(axis=0) for ring in rings], axis=0)
+    rectangles = synthetic_localities(n_side, vertices_per_edge, (*lower, *upper))
+    store = PolygonStore.from_rings((f"LGA {k:02d}", [poly.get_xy()]) for k, poly in enumerate(rectangles.values()))
+
+    centres = np.array([(ring.min(axis=0) + ring.max(axis=0)) / 2 for ring in rings])
+    lga_dict = {lga: [] for lga in store.names}
+    for suburb, k in zip(subs_bounds, store.locate(centres[:, 1], centres[:, 0])):
+        if k >= 0:
+            lga_dict[store.names[k]].append(suburb)
+
+    return store, lga_dict
+
+
+def synthetic_properties(n, subs_bounds, seed=0, chunk=1_000_000):
+    """Return ``n`` properties drawn uniformly within the union of the localities.
+
+    A locality is picked for each point with probability proportional to its
+    area, then points are rejection sampled within its bounding box.
+    """
+    from matplotlib.path import Path
+
+    rng = np.random.default_rng(seed)
+    rings = [poly.get_xy() for poly in subs_bounds.values()]
+    areas = np.array([polygon_area(ring) for ring in rings])
+
+    lat = np.empty(n)
+    lng = np.empty(n)
+    counts = np.bincount(rng.choice(len(rings), size=n, p=areas / areas.sum()), minlength=len(rings))
+    filled = 0
+
+    for ring, count in zip(rings, counts):
+        if count == 0:
+            continue
+
+        path = Path(ring)
+        (x0, y0), (x1, y1) = ring.min(axis=0), ring.max(axis=0)
+        need = count
+
+        while need:
+            size = min(max(2 * need, 16), chunk)
+            points = np.column_stack([rng.uniform(x0, x1, size), rng.uniform(y0, y1, size)])
+            points = points[path.contains_points(points)][:need]
+
+            lng[filled:filled + len(points)] = points[:, 0]
+            lat[filled:filled + len(points)] = points[:, 1]
+            filled += len(points)
+            need -= len(points)
+
+    order = rng.permutation(n)
+
+    return pd.DataFrame({"property_id": np.arange(n), "lat": lat[order].round(7), "lng": lng[order].round(7),
+                         "addr_street": [f"{k} Synthetic Street" for k in range(n)]})
+
+
+def write_gtfs_feed(directory, n_stops=220, n_trips=2000, stops_per_trip=15, bbox=MELBOURNE_BBOX, seed=0):
+    """Write a synthetic GTFS feed to ``directory``.
+
+    Stop ``MELBOURNE_CENTRAL`` is always included. Every trip visits stops in
+    decreasing distance to Melbourne Central, two minutes apart, and most of
+    them end there. Half of the trips run on weekdays.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    stop_ids = np.arange(config.MELBOURNE_CENTRAL - n_stops + 1, config.MELBOURNE_CENTRAL + 1)
+    stop_lat = rng.uniform(bbox[1], bbox[3], n_stops)
+    stop_lng = rng.uniform(bbox[0], bbox[2], n_stops)
+    stop_lat[-1], stop_lng[-1] = MELBOURNE_CENTRAL_COORDS
+    mc_dist = np.hypot(stop_lat - stop_lat[-1], stop_lng - stop_lng[-1])
+
+    with open(os.path.join(directory, "stops.txt"), "w") as outfile:
+        outfile.write("stop_id,stop_name,stop_short_name,stop_lat,stop_lon\n")
+        for stop, lat, lng in zip(stop_ids, stop_lat, stop_lng):
+            outfile.write(f'"{stop}","Stop {stop} Railway Station","Stop {stop}","{float(lat)!r}","{float(lng)!r}"\n')
+
+    pd.DataFrame({"service_id": ["WD", "WE"], "monday": [1, 0], "tuesday": [1, 0], "wednesday": [1, 0],
+                  "thursday": [1, 0], "friday": [1, 0], "saturday": [0, 1], "sunday": [0, 1],
+                  "start_date": [20211001, 20211001], "end_date": [20211231, 20211231]}
+                 ).to_csv(os.path.join(directory, "calendar.txt"), index=False)
+    pd.DataFrame(columns=["service_id", "date", "exception_type"]).to_csv(
+        os.path.join(directory, "calendar_dates.txt"), index=False)
+
+    trip_ids = [f"trip-{k}" for k in range(n_trips)]
+    pd.DataFrame({"route_id": [f"route-{k % 20}" for k in range(n_trips)],
+                  "service_id": ["WD" if k % 2 == 0 else "WE" for k in range(n_trips)],
+                  "trip_id": trip_ids, "shape_id": "", "trip_headsign": "City", "direction_id": 0}
+                 ).to_csv(os.path.join(directory, "trips.txt"), index=False)
+
+    rows = []
+    for trip_id in trip_ids:
+        stops = rng.choice(n_stops - 1, size=stops_per_trip - 1, replace=False)
+        # most trips finish at Melbourne Central
+        if rng.random() < 0.8:
+            stops = np.append(stops, n_stops - 1)
+        stops = stops[np.argsort(-mc_dist[stops])]
+
+        start = int(rng.integers(6 * 60, 22 * 60))
+        for sequence, stop in enumerate(stops):
+            minutes = start + 2 * sequence
+            time = f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+            rows.append((trip_id, time, time, stop_ids[stop], sequence + 1))
+
+    pd.DataFrame(rows, columns=["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"]
+                 ).to_csv(os.path.join(directory, "stop_times.txt"), index=False)
+
+    return directory
+
+
+def synthetic_covid_series(lgas, date=config.COVID_DATE, days=90, seed=0):
+    """Map each LGA to a dataframe of cumulative cases for the ``days`` up to ``date``."""
+    rng = np.random.default_rng(seed)
+    end = dt.date.fromisoformat(str(date))
+    dates = [(end - dt.timedelta(days=k)).strftime("%d %b") for k in range(days)]
+
+    series = {}
+    for lga in lgas:
+        daily = rng.poisson(rng.uniform(0, 50), days)
+        # newest first, like the scraped tables
+        series[lga] = pd.DataFrame({"dates": dates, "cases": np.cumsum(daily[::-1])[::-1]})
+
+    return series
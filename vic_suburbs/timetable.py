@@ -0,0 +1,179 @@
+"""Compiled GTFS timetable in flat integer arrays.
+
+The stop times are sorted by trip and stop sequence and packed into flat
+int32 arrays, with stops renumbered densely:
+
+- ``stops``: stop index of every stop time, trip after trip
+- ``arrivals``, ``departures``: seconds since midnight of the service day
+- ``trip_offsets``: start of each trip in the flat arrays, plus the end
+
+plus an inverted index from each stop to the trips visiting it:
+
+- ``stop_offsets``: start of each stop in ``stop_trips``, plus the end
+- ``stop_trips``, ``stop_positions``: trip index and position in the trip of
+  every visit, ordered by stop, trip and position
+
+so "all trips through stop A then stop B" is the intersection of two slices
+of the inverted index rather than a scan of every trip.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import config
+
+ARRAYS = ["stop_ids", "stops", "arrivals", "departures", "trip_offsets", "stop_offsets", "stop_trips",
+          "stop_positions"]
+
+EMPTY = np.empty(0, dtype="int32")
+
+
+def gtfs_seconds(times):
+    """Convert "HH:MM:SS" strings, which may go past 24:00:00, or parsed datetimes to seconds since midnight."""
+    times = pd.Series(times)
+    if pd.api.types.is_datetime64_any_dtype(times):
+        return ((times - times.dt.normalize()) // pd.Timedelta(seconds=1)).to_numpy(dtype="int32")
+
+    hms = times.str.strip().str.split(":", expand=True).astype("int32")
+    return (hms[0] * 3600 + hms[1] * 60 + hms[2]).to_numpy(dtype="int32")
+
+
+class Timetable:
+    def __init__(self, trip_ids, stop_ids, stops, arrivals, departures, trip_offsets, stop_offsets, stop_trips,
+                 stop_positions):
+        # an array of trip ids, e.g. in shared memory, is kept as it is
+        self.trip_ids = trip_ids if isinstance(trip_ids, np.ndarray) else list(trip_ids)
+        self.stop_ids = stop_ids
+        self.stops = stops
+        self.arrivals = arrivals
+        self.departures = departures
+        self.trip_offsets = trip_offsets
+        self.stop_offsets = stop_offsets
+        self.stop_trips = stop_trips
+        self.stop_positions = stop_positions
+        self.directory = None
+        self.source = None
+
+    @classmethod
+    def from_stop_times(cls, stop_times):
+        """Compile a stop_times dataframe, such as the one of ``enrich.read_weekday_stop_times``."""
+        stop_times = stop_times.sort_values(["trip_id", "stop_sequence"], kind="stable")
+
+        trip_ids, trips = np.unique(stop_times["trip_id"].to_numpy(), return_inverse=True)
+        stop_ids, stops = np.unique(stop_times["stop_id"].to_numpy(dtype="int64"), return_inverse=True)
+        trip_offsets = np.concatenate([[0], np.cumsum(np.bincount(trips, minlength=len(trip_ids)))]).astype("int64")
+
+        return cls.from_arrays(trip_ids.tolist(), stop_ids, stops, gtfs_seconds(stop_times["arrival_time"]),
+                               gtfs_seconds(stop_times["departure_time"]), trip_offsets)
+
+    @classmethod
+    def from_arrays(cls, trip_ids, stop_ids, stops, arrivals, departures, trip_offsets):
+        """Build the inverted index of stop times already in trip and sequence order."""
+        trips = np.repeat(np.arange(len(trip_ids)), np.diff(trip_offsets))
+        positions = np.arange(len(trips)) - trip_offsets[trips]
+
+        # the visits of each stop, in trip then position order
+        order = np.lexsort((positions, trips, stops))
+        stop_offsets = np.concatenate([[0], np.cumsum(np.bincount(stops, minlength=len(stop_ids)))]).astype("int64")
+
+        return cls(trip_ids, stop_ids, np.asarray(stops, dtype="int32"), arrivals, departures, trip_offsets,
+                   stop_offsets, trips[order].astype("int32"), positions[order].astype("int32"))
+
+    @classmethod
+    def merge(cls, timetables):
+        """Concatenate timetables whose trip and stop ids do not collide, see ``feeds``."""
+        timetables = list(timetables)
+        stop_ids = np.unique(np.concatenate([np.asarray(t.stop_ids) for t in timetables] + [np.empty(0, "int64")]))
+        # each timetable's dense stop indexes in the merged stops
+        stops = [np.searchsorted(stop_ids, t.stop_ids)[t.stops] for t in timetables]
+        trip_counts = np.concatenate([np.diff(t.trip_offsets) for t in timetables] + [np.empty(0, "int64")])
+
+        return cls.from_arrays([trip for t in timetables for trip in t.trip_ids], stop_ids,
+                               np.concatenate(stops + [np.empty(0, "int64")]),
+                               np.concatenate([t.arrivals for t in timetables] + [EMPTY]),
+                               np.concatenate([t.departures for t in timetables] + [EMPTY]),
+                               np.concatenate([[0], np.cumsum(trip_counts)]).astype("int64"))
+
+    def save(self, directory, source=None):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for name in ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+
+        # meta.json is written last, a timetable without it is incomplete
+        with open(directory / "meta.json", "w") as outfile:
+            json.dump({"trip_ids": [str(trip) for trip in self.trip_ids], "source": source}, outfile)
+
+        self.directory = directory
+        self.source = source
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        directory = Path(directory)
+        with open(directory / "meta.json") as infile:
+            meta = json.load(infile)
+
+        timetable = cls(meta["trip_ids"], *(np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)
+                                            for name in ARRAYS))
+        timetable.directory = directory
+        timetable.source = meta["source"]
+        return timetable
+
+    def __reduce__(self):
+        # a saved timetable is sent to other processes as its path and memory-mapped there
+        if self.directory is not None:
+            return type(self).load, (str(self.directory),)
+        return object.__reduce__(self)
+
+    def stop_index(self, stop):
+        """Return the dense index of a stop id, or -1 if no trip visits it."""
+        index = np.searchsorted(self.stop_ids, stop)
+        if index < len(self.stop_ids) and self.stop_ids[index] == stop:
+            return int(index)
+        return -1
+
+    def visits(self, stop):
+        """Return the trips visiting the stop and the positions of the visits in the flat arrays."""
+        index = self.stop_index(stop)
+        if index < 0:
+            return EMPTY, EMPTY
+
+        start, end = self.stop_offsets[index], self.stop_offsets[index + 1]
+        trips = self.stop_trips[start:end]
+        return trips, self.trip_offsets[trips] + self.stop_positions[start:end]
+
+    def trips_between(self, origin, destination):
+        """Return the trips visiting ``origin`` and later ``destination``, and the positions of both visits.
+
+        As with ``list.index`` on a trip's stops, the first visit of each stop counts.
+        """
+        origin_trips, origin_events = self.visits(origin)
+        destination_trips, destination_events = self.visits(destination)
+        # the indices returned are those of the first occurrence of each trip
+        trips, i, j = np.intersect1d(origin_trips, destination_trips, return_indices=True)
+        origin_events, destination_events = origin_events[i], destination_events[j]
+
+        later = origin_events < destination_events
+        return trips[later], origin_events[later], destination_events[later]
+
+    def direct_minutes(self, stop, destination=config.MELBOURNE_CENTRAL, latest_hour=9):
+        """Same as ``enrich.melb_cen_time`` from the compiled arrays.
+
+        Returns the average direct journey time in minutes over the trips
+        leaving the stop up to ``latest_hour`` o'clock inclusive.
+        """
+        if stop == destination:
+            return 0
+
+        _, origin_events, destination_events = self.trips_between(stop, destination)
+        depart = self.departures[origin_events]
+        keep = depart < (latest_hour + 1) * 3600
+
+        if not keep.any():
+            return config.NOT_AVAILABLE
+
+        return round(np.mean((self.arrivals[destination_events[keep]] - depart[keep]) / 60))